@@ -0,0 +1,56 @@
+"""
+Bar-by-bar backtest of an aggregated indicator strategy.
+
+At every bar the strategy only sees candles up to and including that bar. A
+'buy' opens a long position at the bar's close if none is open and a 'sell'
+closes it, mirroring how execute_trade manages a single active trade.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List
+from lazy_imports import LazyModule
+from trading_strategy import BTC_WEIGHTS, BTC_indicator_signals, aggregate_signals
+
+pd = LazyModule("pandas")
+
+def run_backtest(prices_df: pd.DataFrame, indicators: Callable[[pd.DataFrame], Dict[str, str]] = BTC_indicator_signals, weights: Dict[str, float] = BTC_WEIGHTS, warmup: int = 30, fee: float = 0.0) -> dict:
+    """
+    Replays the strategy over historical candles.
+
+    :param prices_df: OHLCV DataFrame as returned by fetch_historical_data.
+    :param indicators: Maps the candles seen so far to a dict of indicator signals.
+    :param weights: Indicator weights passed to aggregate_signals.
+    :param warmup: Number of bars to skip before the first decision.
+    :param fee: Proportional cost charged on entry and on exit.
+    :return: Dictionary with the equity curve, closed trade returns and summary statistics.
+    """
+    closes = prices_df['close']
+    equity = 1.0
+    entry_price = None
+    trade_returns: List[float] = []
+    equity_curve = []
+
+    for i in range(len(prices_df)):
+        price = float(closes.iloc[i])
+        if i >= max(warmup, 1):
+            signal = aggregate_signals(indicators(prices_df.iloc[:i + 1]), weights)
+            if signal == 'buy' and entry_price is None:
+                entry_price = price
+            elif signal == 'sell' and entry_price is not None:
+                trade_return = (price / entry_price) * (1 - fee) ** 2 - 1
+                trade_returns.append(trade_return)
+                equity *= 1 + trade_return
+                entry_price = None
+
+        # Mark open positions to market
+        open_return = (price / entry_price) * (1 - fee) ** 2 if entry_price is not None else 1.0
+        equity_curve.append(equity * open_return)
+
+    curve = pd.Series(equity_curve, index=prices_df.index, dtype=float)
+    return {
+        "equity_curve": curve,
+        "trade_returns": trade_returns,
+        "total_return": float(curve.iloc[-1] - 1) if len(curve) else 0.0,
+        "max_drawdown": float((curve / curve.cummax() - 1).min()) if len(curve) else 0.0,
+        "trades": len(trade_returns),
+        "win_rate": sum(r > 0 for r in trade_returns) / len(trade_returns) if trade_returns else 0.0,
+    }
@@ -0,0 +1,68 @@
+"""
+Compares the indicator kernels against the pandas expressions they replace.
+
+    python benchmarks/bench_indicator_kernels.py --symbols 500 --bars 365
+
+Reports the time for one symbol (the per-tick cost of BTC_trading_strategy)
+and for a (symbols x bars) batch, where pandas has to loop over symbols.
+"""
+import argparse
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicator_kernels
+
+def pandas_indicators(close: pd.Series, high: pd.Series, low: pd.Series, volume: pd.Series):
+    macd_line = close.ewm(span=20, adjust=False).mean() - close.ewm(span=30, adjust=False).mean()
+    macd_line.ewm(span=10, adjust=False).mean()
+    mvcd_line = close.ewm(span=20, adjust=False).std() - close.ewm(span=30, adjust=False).std()
+    mvcd_line.ewm(span=10, adjust=False).std()
+    typical_price = (high + low + close) / 3
+    (typical_price * volume).rolling(window=20).sum() / volume.rolling(window=20).sum()
+    ema1 = close.ewm(span=20, adjust=False).mean()
+    ema2 = ema1.ewm(span=20, adjust=False).mean()
+    3 * (ema1 - ema2) + ema2.ewm(span=20, adjust=False).mean()
+
+def kernel_indicators(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray):
+    macd_line = indicator_kernels.ema(close, 20) - indicator_kernels.ema(close, 30)
+    indicator_kernels.ema(macd_line, 10)
+    mvcd_line = indicator_kernels.ewm_std(close, 20) - indicator_kernels.ewm_std(close, 30)
+    indicator_kernels.ewm_std(mvcd_line, 10)
+    indicator_kernels.rolling_vwap(high, low, close, volume, 20)
+    indicator_kernels.tema(close, 20)
+
+def best_of(func, repeat: int = 5, number: int = 10) -> float:
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=365)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (args.symbols, args.bars)), axis=1))
+    high, low, volume = close * 1.01, close * 0.99, rng.uniform(1, 10, close.shape)
+    frames = [tuple(pd.Series(a[i]) for a in (close, high, low, volume)) for i in range(args.symbols)]
+
+    pandas_one = best_of(lambda: pandas_indicators(*frames[0]))
+    pandas_batch = best_of(lambda: [pandas_indicators(*f) for f in frames], repeat=3, number=1)
+
+    print(f"{'backend':<8} {'1 symbol':>12} {f'{args.symbols} symbols':>14}")
+    print(f"{'pandas':<8} {pandas_one * 1e6:10.0f}us {pandas_batch * 1e3:12.1f}ms")
+
+    backends = [("numpy", False)] + ([("numba", True)] if indicator_kernels.numba_available() else [])
+    for name, numba in backends:
+        indicator_kernels.use_numba(numba)
+        kernel_indicators(close[:1], high[:1], low[:1], volume[:1])  # Compile / warm up
+        one = best_of(lambda: kernel_indicators(close[0], high[0], low[0], volume[0]))
+        batch = best_of(lambda: kernel_indicators(close, high, low, volume), repeat=3, number=1)
+        print(f"{name:<8} {one * 1e6:10.0f}us {batch * 1e3:12.1f}ms   speed-up {pandas_one / one:5.1f}x / {pandas_batch / batch:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Measures how sharded signal evaluation scales with the number of worker processes.
+
+    python benchmarks/bench_sharded_scheduler.py --symbols 200 --bars 365
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharded_scheduler import ShardedRunner
+from trading_strategy import BTC_WEIGHTS, BTC_indicator_signals
+
+def synthetic_ohlcv(bars: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    timestamps = 1700000000000 + np.arange(bars) * 86400000
+    return np.column_stack([timestamps, close, close * 1.01, close * 0.99, close, rng.uniform(1, 10, bars)])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--bars", type=int, default=365)
+    parser.add_argument("--ticks", type=int, default=3)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}/USD" for i in range(args.symbols)]
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    baseline = None
+
+    for workers in worker_counts:
+        runner = ShardedRunner(symbols, BTC_indicator_signals, BTC_WEIGHTS, workers=workers, max_bars=args.bars)
+        for i, symbol in enumerate(symbols):
+            runner.load(symbol, synthetic_ohlcv(args.bars, i))
+        runner.start()
+        runner.tick()  # Warm up imports and caches in the workers
+
+        start = time.perf_counter()
+        for _ in range(args.ticks):
+            runner.tick()
+        elapsed = (time.perf_counter() - start) / args.ticks
+        runner.stop()
+
+        baseline = baseline or elapsed
+        print(f"{workers:3d} workers: {elapsed * 1000:8.1f} ms/tick  {args.symbols / elapsed:8.0f} symbols/s  speed-up {baseline / elapsed:4.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import os
 # API Configuration
 API_KEY = os.getenv("API_KEY", "your_api_key_here")
 BASE64_PRIVATE_KEY = os.getenv("PRIVATE_KEY", "your_private_key_here")
+API_BASE_URL = os.getenv("API_BASE_URL", "https://trading.robinhood.com")  # Point at mock_robinhood_server.py for offline testing
 
 # Logging Configuration
 LOGGING_CONFIG = {
@@ -10,3 +11,36 @@ LOGGING_CONFIG = {
     "level": "INFO",
     "format": "%(asctime)s - %(levelname)s - %(message)s",
 }
+
+# Warm-start snapshot Configuration
+SNAPSHOT_CONFIG = {
+    "filename": "scheduler_snapshot.bin",
+    "interval_seconds": 60,
+}
+
+# Order gateway Configuration
+GATEWAY_CONFIG = {
+    "state_file": "order_gateway_state.json",  # In-flight orders, rewritten whenever one is sent or settles
+}
+
+# Adaptive scheduling for strategies that declare a candle timeframe
+ADAPTIVE_CONFIG = {
+    "max_interval": 300,  # Longest gap between risk checks, in seconds
+    "move_threshold": 0.002,  # Poll often enough that the expected price move between checks is about this fraction
+    "bar_close_delay": 5,  # Seconds after a bar closes before it is evaluated, so the exchange has published it
+    "volatility_halflife": 20,  # Price samples for the volatility estimate to halve a sample's weight
+}
+
+# On-demand profiling ("profile N" at the scheduler prompt)
+PROFILING_CONFIG = {
+    "directory": "profiles",
+    "sample_interval": 0.005,  # Seconds between CPU stack samples
+    "top_allocations": 25,  # Allocation sites listed per strategy phase
+}
+
+# Trade journal Configuration
+JOURNAL_CONFIG = {
+    "directory": "journal",
+    "max_bytes": 64 * 1024 * 1024,  # Rotate to a new file at this size
+    "flush_interval": 1.0,  # Seconds between batched writes
+}
@@ -0,0 +1,389 @@
+"""
+Event-driven runtime for trading strategies.
+
+Instead of running every strategy on a wall-clock timer, market data is pushed
+through a chain of stages connected by bounded in-process queues:
+
+    market data -> indicators -> signal aggregation -> risk -> order routing
+
+Each stage runs in its own thread and drains up to ``batch_size`` events per
+wake-up. When a downstream queue is full, ``put`` blocks, so a slow stage
+throttles the stages feeding it instead of letting memory grow without bound.
+Strategies register a ``Subscription`` for the bars or quotes they need and
+only do work when new data for that symbol arrives.
+"""
+import abc
+import datetime
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from robinhood_api_trading import CryptoAPITrading
+from timeframes import closed_candles
+import trade_journal
+from trade_journal import DecisionRecord, IndicatorRecord
+from trading_strategy import BTC_WEIGHTS, BTC_execute_signal, BTC_indicator_signals, BTC_risk_check, aggregate_signals, evaluate_indicators, fetch_historical_data, signal_score
+
+# Sentinel pushed through the stages to shut the pipeline down in order
+STOP = object()
+
+@dataclass
+class MarketEvent:
+    kind: str  # "bar" or "quote"
+    symbol: str
+    data: Any
+    timeframe: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> Tuple[str, str, Optional[str]]:
+        return (self.kind, self.symbol, self.timeframe)
+
+@dataclass
+class Subscription:
+    """
+    A strategy's interest in one market data stream.
+
+    :param name: Name used in logs.
+    :param symbol: Symbol of the stream, e.g. "BTC/USD" for bars or "BTC-USD" for quotes.
+    :param indicators: Maps the event data to a dict of indicator signals. None
+        for subscriptions that only run a risk check.
+    :param weights: Indicator weights passed to aggregate_signals.
+    :param on_signal: Called with the API client and the aggregated signal.
+    :param kind: "bar" or "quote".
+    :param timeframe: Candle timeframe for bar subscriptions, e.g. "1d".
+    :param risk_check: Called with the API client in the risk stage on every new
+        event of the stream, e.g. to enforce stop-loss and take-profit levels.
+    """
+    name: str
+    symbol: str
+    indicators: Optional[Callable[[Any], Dict[str, str]]]
+    weights: Dict[str, float]
+    on_signal: Optional[Callable[[CryptoAPITrading, str], None]]
+    kind: str = "bar"
+    timeframe: Optional[str] = None
+    risk_check: Optional[Callable[[CryptoAPITrading], None]] = None
+
+    @property
+    def key(self) -> Tuple[str, str, Optional[str]]:
+        return (self.kind, self.symbol, self.timeframe)
+
+@dataclass
+class SignalEvent:
+    subscription: Subscription
+    signals: Dict[str, str]
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass
+class RiskCheckEvent:
+    subscription: Subscription
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass
+class DecisionEvent:
+    subscription: Subscription
+    signal: str
+    timestamp: float = field(default_factory=time.time)
+
+class Stage(threading.Thread):
+    """
+    A pipeline stage: pulls batches from a bounded inbox, hands them to
+    ``handler`` and forwards whatever it returns to the downstream stage.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[Any]], Iterable[Any]], maxsize: int = 100, batch_size: int = 32):
+        super().__init__(name=name, daemon=True)
+        self.handler = handler
+        self.batch_size = batch_size
+        self.inbox: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.downstream: Optional["Stage"] = None
+        self.processed = 0
+
+    def put(self, event: Any, timeout: Optional[float] = None):
+        """
+        Enqueue an event, blocking while the inbox is full (backpressure).
+        """
+        self.inbox.put(event, timeout=timeout)
+
+    def _next_batch(self) -> List[Any]:
+        batch = [self.inbox.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.inbox.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self._next_batch()
+            events = [event for event in batch if event is not STOP]
+
+            if events:
+                try:
+                    outputs = self.handler(events) or []
+                except Exception as e:
+                    logging.error(f"Error in pipeline stage {self.name}: {e}")
+                    outputs = []
+                self.processed += len(events)
+                if self.downstream is not None:
+                    for output in outputs:
+                        self.downstream.put(output)
+
+            if len(events) != len(batch):
+                if self.downstream is not None:
+                    self.downstream.put(STOP)
+                break
+
+def _latest_per_key(events: List[Any], key: Callable[[Any], Any]) -> List[Any]:
+    """
+    Collapse a batch to the newest event per key, preserving arrival order.
+    """
+    latest = {}
+    for event in events:
+        latest.pop(key(event), None)
+        latest[key(event)] = event
+    return list(latest.values())
+
+def _bar_close_time(data: Any) -> Any:
+    return data.index[-1] if len(data) else None
+
+class EventPipeline:
+    """
+    Wires the five stages together and dispatches events to subscriptions.
+
+    :param api_trading_client: Client used by the order routing stage.
+    :param risk_check: Returns True if a decision may be routed. By default
+        'hold' decisions are dropped since they never place orders.
+    :param maxsize: Capacity of every stage's inbox.
+    :param batch_size: Maximum number of events a stage handles per wake-up.
+    """
+
+    def __init__(self, api_trading_client: CryptoAPITrading, risk_check: Optional[Callable[[DecisionEvent], bool]] = None, maxsize: int = 100, batch_size: int = 32):
+        self.api_trading_client = api_trading_client
+        self.risk_check = risk_check or (lambda decision: decision.signal != 'hold')
+        self.subscriptions: Dict[Tuple[str, str, Optional[str]], List[Subscription]] = {}
+        self._last_seen: Dict[Tuple[str, str, Optional[str]], Any] = {}
+        self._feeds: List["MarketDataFeed"] = []
+
+        self.stages = [
+            Stage("market_data", self._handle_market_data, maxsize, batch_size),
+            Stage("indicators", self._handle_indicators, maxsize, batch_size),
+            Stage("aggregation", self._handle_aggregation, maxsize, batch_size),
+            Stage("risk", self._handle_risk, maxsize, batch_size),
+            Stage("order_routing", self._handle_order_routing, maxsize, batch_size),
+        ]
+        for upstream, downstream in zip(self.stages, self.stages[1:]):
+            upstream.downstream = downstream
+
+    def subscribe(self, subscription: Subscription):
+        self.subscriptions.setdefault(subscription.key, []).append(subscription)
+        logging.info(f"{subscription.name} subscribed to {subscription.kind} {subscription.symbol} {subscription.timeframe or ''}".rstrip())
+
+    def publish(self, event: MarketEvent, timeout: Optional[float] = None):
+        """
+        Push a market data event into the pipeline. Blocks while the market
+        data stage is saturated.
+        """
+        self.stages[0].put(event, timeout=timeout)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        for feed in self._feeds:
+            feed.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the feeds, then drain the stages in order.
+        """
+        for feed in self._feeds:
+            feed.stop()
+        self.stages[0].put(STOP)
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def add_feed(self, feed: "MarketDataFeed"):
+        self._feeds.append(feed)
+
+    def add_default_feeds(self, poll_seconds: float = 10):
+        """
+        Create one feed per subscribed stream, so only the data some strategy
+        actually needs is fetched.
+        """
+        for kind, symbol, timeframe in self.subscriptions:
+            if kind == "bar":
+                self.add_feed(BarFeed(self, symbol, timeframe or '1d', poll_seconds))
+            elif kind == "quote":
+                self.add_feed(QuoteFeed(self, symbol, poll_seconds))
+
+    def _handle_market_data(self, events: List[MarketEvent]) -> List[MarketEvent]:
+        fresh = []
+        for event in _latest_per_key(events, lambda e: e.key):
+            if event.key not in self.subscriptions:
+                continue
+            marker = _bar_close_time(event.data) if event.kind == "bar" else event.data
+            if marker is None or self._last_seen.get(event.key) == marker:
+                continue  # Nothing new since the last event for this stream
+            self._last_seen[event.key] = marker
+            fresh.append(event)
+        return fresh
+
+    def _handle_indicators(self, events: List[MarketEvent]) -> List[Any]:
+        signal_events = []
+        for event in events:
+            for subscription in self.subscriptions.get(event.key, []):
+                if subscription.risk_check is not None:
+                    signal_events.append(RiskCheckEvent(subscription))
+                if subscription.indicators is None:
+                    continue
+                try:
+                    signals, values = evaluate_indicators(subscription.indicators, event.data)
+                except Exception as e:
+                    logging.error(f"Error calculating indicators for {subscription.name}: {e}")
+                    continue
+                if event.kind == "bar":
+                    trade_journal.record(IndicatorRecord(subscription.name, subscription.symbol, str(event.data.index[-1]), float(event.data['close'].iloc[-1]), signals, values))
+                signal_events.append(SignalEvent(subscription, signals))
+        return signal_events
+
+    def _handle_aggregation(self, events: List[Any]) -> List[Any]:
+        # Risk checks pass straight through to the risk stage
+        decisions = _latest_per_key([e for e in events if isinstance(e, RiskCheckEvent)], lambda e: id(e.subscription))
+        for event in _latest_per_key([e for e in events if isinstance(e, SignalEvent)], lambda e: id(e.subscription)):
+            final_signal = aggregate_signals(event.signals, event.subscription.weights)
+            trade_journal.record(DecisionRecord(event.subscription.name, signal_score(event.signals, event.subscription.weights), final_signal, event.subscription.symbol))
+            logging.info(f"Signals for {event.subscription.name}: {event.signals}")
+            logging.info(f"Aggregated Signal for {event.subscription.name}: {final_signal}")
+            decisions.append(DecisionEvent(event.subscription, final_signal))
+        return decisions
+
+    def _handle_risk(self, events: List[Any]) -> List[DecisionEvent]:
+        for event in events:
+            if isinstance(event, RiskCheckEvent):
+                try:
+                    event.subscription.risk_check(self.api_trading_client)
+                except Exception as e:
+                    logging.error(f"Error running risk check for {event.subscription.name}: {e}")
+        return [decision for decision in events if isinstance(decision, DecisionEvent) and self.risk_check(decision)]
+
+    def _handle_order_routing(self, events: List[DecisionEvent]) -> List[Any]:
+        for decision in events:
+            try:
+                decision.subscription.on_signal(self.api_trading_client, decision.signal)
+            except Exception as e:
+                logging.error(f"Error routing {decision.signal} for {decision.subscription.name}: {e}")
+        return []
+
+class MarketDataFeed(threading.Thread, abc.ABC):
+    """
+    Polls one market data source and publishes what it gets. Repeated data is
+    filtered by the market data stage, so downstream work only happens when
+    something actually changed.
+    """
+
+    def __init__(self, pipeline: EventPipeline, poll_seconds: float):
+        super().__init__(daemon=True)
+        self.pipeline = pipeline
+        self.poll_seconds = poll_seconds
+        self._stopped = threading.Event()
+
+    @abc.abstractmethod
+    def fetch(self) -> Optional[MarketEvent]:
+        """
+        Fetch the current data, or None if there is nothing to publish.
+        """
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                event = self.fetch()
+                if event is not None:
+                    self.pipeline.publish(event)
+            except Exception as e:
+                logging.error(f"Error in market data feed {self.name}: {e}")
+            self._stopped.wait(self.poll_seconds)
+
+class BarFeed(MarketDataFeed):
+    def __init__(self, pipeline: EventPipeline, symbol: str, timeframe: str = '1d', poll_seconds: float = 10, lookback_days: int = 365):
+        super().__init__(pipeline, poll_seconds)
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.lookback_days = lookback_days
+
+    def fetch(self) -> Optional[MarketEvent]:
+        start_date = (datetime.datetime.now() - datetime.timedelta(days=self.lookback_days)).isoformat() + 'Z'
+        prices_df = fetch_historical_data(symbol=self.symbol, start_date=start_date, timeframe=self.timeframe)
+        # Publish closed bars only, so a new event means a bar has just closed
+        prices_df = closed_candles(prices_df, self.timeframe)
+        return MarketEvent("bar", self.symbol, prices_df, self.timeframe)
+
+class QuoteFeed(MarketDataFeed):
+    def __init__(self, pipeline: EventPipeline, symbol: str, poll_seconds: float = 10):
+        super().__init__(pipeline, poll_seconds)
+        self.symbol = symbol
+
+    def fetch(self) -> Optional[MarketEvent]:
+        price_info = self.pipeline.api_trading_client.get_best_bid_ask(self.symbol)
+        if not price_info or not price_info.get('results'):
+            return None
+        quote = price_info['results'][0]
+        return MarketEvent("quote", self.symbol, (quote.get('bid_inclusive_of_sell_spread'), quote.get('ask_inclusive_of_buy_spread')))
+
+def start_event_pipeline(subscriptions: List[Subscription], poll_seconds: float = 10):
+    """
+    Runs the event-driven pipeline for the given subscriptions until the user quits.
+
+    :param subscriptions: Strategy subscriptions to register.
+    :param poll_seconds: How often each feed checks its source for new data.
+    """
+    logging.info("Starting event pipeline...")
+    pipeline = EventPipeline(CryptoAPITrading())
+    for subscription in subscriptions:
+        pipeline.subscribe(subscription)
+    pipeline.add_default_feeds(poll_seconds)
+    pipeline.start()
+
+    try:
+        while True:
+            command = input("Type 'q' to quit the event pipeline:\n").strip().lower()
+            if command == 'q':
+                print("\nStopping event pipeline...")
+                pipeline.stop(timeout=5)
+                logging.info("Event pipeline stopped.")
+                break
+    except KeyboardInterrupt:
+        print("Event pipeline stopped by user.")
+
+def BTC_subscription() -> Subscription:
+    """
+    Subscription running the Bitcoin strategy on every new daily candle.
+    """
+    return Subscription(
+        name="BTC_trading_strategy",
+        symbol="BTC/USD",
+        timeframe='1d',
+        indicators=BTC_indicator_signals,
+        weights=BTC_WEIGHTS,
+        on_signal=BTC_execute_signal,
+    )
+
+def BTC_risk_subscription() -> Subscription:
+    """
+    Subscription checking stop-loss and take-profit on every new BTC-USD quote,
+    as the scheduler does on every tick.
+    """
+    return Subscription(
+        name="BTC_risk_check",
+        symbol="BTC-USD",
+        kind="quote",
+        indicators=None,
+        weights={},
+        on_signal=None,
+        risk_check=BTC_risk_check,
+    )
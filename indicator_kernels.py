@@ -0,0 +1,342 @@
+"""
+Array kernels for the indicators in trading_strategy.
+
+Every kernel takes float arrays shaped (symbols x bars) -- a 1-D array is
+treated as a single symbol and a 1-D result is returned -- and reproduces the
+pandas expression it replaces (``ewm(span, adjust=False).mean()``, ``.std()``,
+``rolling(window).sum()``) without building intermediate Series.
+
+Two backends are available:
+
+- Numba: fused single-pass loops compiled on first use, with scalar state and
+  no temporaries. Used automatically when numba is installed.
+- NumPy: the exponential recurrences are linear filters, y[t] = c * y[t-1] + b * u[t],
+  evaluated a block of bars at a time with cumulative sums, vectorised over all
+  symbols. Blocks are short enough that the c**-k rescaling stays well
+  conditioned. Rows with NaNs after their first valid value fall back to a
+  plain loop.
+
+Set INDICATOR_KERNELS_NUMBA=0 or call ``use_numba(False)`` to force the NumPy
+backend. numpy and numba are imported on first use.
+"""
+from __future__ import annotations
+import math
+import os
+from typing import Callable, Dict, Optional
+from lazy_imports import LazyModule
+
+np = LazyModule("numpy")
+
+# Largest factor the blocked filter rescales by (c**-block); bounds rounding error
+_MAX_BLOCK_GROWTH = 1e3
+
+_numba_enabled = os.getenv("INDICATOR_KERNELS_NUMBA", "1") != "0"
+_numba_kernels: Optional[Dict[str, Callable]] = None
+
+def use_numba(enabled: bool):
+    """
+    Enable or disable the Numba backend (it is still only used if numba is installed).
+    """
+    global _numba_enabled
+    _numba_enabled = enabled
+
+def numba_available() -> bool:
+    return _jit() is not None
+
+def _as_2d(values) -> np.ndarray:
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+def _shape_like(result: np.ndarray, values) -> np.ndarray:
+    return result[0] if np.ndim(values) == 1 else result
+
+def _alpha(span: float) -> float:
+    if span < 1:
+        raise ValueError("span must be >= 1")
+    return 2.0 / (span + 1.0)
+
+# ---------------------------------------------------------------------------
+# Loop kernels. Plain Python, written so Numba can compile them unchanged.
+# They follow pandas' ewma/ewmcov recurrences with adjust=False, ignore_na=False.
+# ---------------------------------------------------------------------------
+
+def _ema_loop(x, alpha, out):
+    old_wt_factor = 1.0 - alpha
+    for r in range(x.shape[0]):
+        weighted = x[r, 0]
+        old_wt = 1.0
+        out[r, 0] = weighted
+        for i in range(1, x.shape[1]):
+            cur = x[r, i]
+            if weighted == weighted:
+                old_wt *= old_wt_factor
+                if cur == cur:
+                    if weighted != cur:
+                        weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                    old_wt = 1.0
+            elif cur == cur:
+                weighted = cur
+            out[r, i] = weighted
+
+def _ewm_var_loop(x, alpha, out):
+    old_wt_factor = 1.0 - alpha
+    for r in range(x.shape[0]):
+        mean = x[r, 0]
+        cov = 0.0
+        sum_wt = 1.0
+        sum_wt2 = 1.0
+        old_wt = 1.0
+        out[r, 0] = math.nan
+        for i in range(1, x.shape[1]):
+            cur = x[r, i]
+            if mean == mean:
+                sum_wt *= old_wt_factor
+                sum_wt2 *= old_wt_factor * old_wt_factor
+                old_wt *= old_wt_factor
+                if cur == cur:
+                    old_mean = mean
+                    if mean != cur:
+                        mean = (old_wt * old_mean + alpha * cur) / (old_wt + alpha)
+                    cov = (old_wt * (cov + (old_mean - mean) * (old_mean - mean)) + alpha * (cur - mean) * (cur - mean)) / (old_wt + alpha)
+                    sum_wt += alpha
+                    sum_wt2 += alpha * alpha
+                    old_wt += alpha
+                    sum_wt /= old_wt
+                    sum_wt2 /= old_wt * old_wt
+                    old_wt = 1.0
+            elif cur == cur:
+                mean = cur
+            numerator = sum_wt * sum_wt
+            denominator = numerator - sum_wt2
+            out[r, i] = (numerator / denominator) * cov if denominator > 0 and mean == mean else math.nan
+
+def _tema_loop(x, alpha, out):
+    # Three chained EMAs in one pass; inputs must not contain NaN
+    for r in range(x.shape[0]):
+        ema1 = x[r, 0]
+        ema2 = ema1
+        ema3 = ema1
+        out[r, 0] = ema1
+        for i in range(1, x.shape[1]):
+            ema1 += alpha * (x[r, i] - ema1)
+            ema2 += alpha * (ema1 - ema2)
+            ema3 += alpha * (ema2 - ema3)
+            out[r, i] = 3.0 * (ema1 - ema2) + ema3
+
+def _rolling_vwap_loop(high, low, close, volume, window, out):
+    for r in range(close.shape[0]):
+        price_volume = 0.0
+        total_volume = 0.0
+        for i in range(close.shape[1]):
+            price_volume += (high[r, i] + low[r, i] + close[r, i]) / 3.0 * volume[r, i]
+            total_volume += volume[r, i]
+            if i >= window:
+                j = i - window
+                price_volume -= (high[r, j] + low[r, j] + close[r, j]) / 3.0 * volume[r, j]
+                total_volume -= volume[r, j]
+            out[r, i] = price_volume / total_volume if i >= window - 1 else math.nan
+
+def _jit() -> Optional[Dict[str, Callable]]:
+    """
+    Compile the loop kernels with Numba once; None if disabled or unavailable.
+    """
+    global _numba_kernels
+    if not _numba_enabled:
+        return None
+    if _numba_kernels is None:
+        try:
+            import numba
+        except ImportError:
+            _numba_kernels = {}
+        else:
+            jit = numba.njit(cache=True, nogil=True)
+            _numba_kernels = {
+                "ema": jit(_ema_loop),
+                "ewm_var": jit(_ewm_var_loop),
+                "tema": jit(_tema_loop),
+                "rolling_vwap": jit(_rolling_vwap_loop),
+            }
+    return _numba_kernels or None
+
+# ---------------------------------------------------------------------------
+# NumPy backend
+# ---------------------------------------------------------------------------
+
+def _block_size(decay: float) -> int:
+    if decay <= 0:
+        return 1
+    return max(1, int(math.log(_MAX_BLOCK_GROWTH) / -math.log(decay)))
+
+def _linear_filter(u: np.ndarray, y0: np.ndarray, decay: float, gain: float) -> np.ndarray:
+    """
+    y[:, t] = decay * y[:, t-1] + gain * u[:, t] for t >= 1, with y[:, 0] = y0.
+    """
+    n_bars = u.shape[1]
+    out = np.empty_like(u)
+    out[:, 0] = y0
+    if n_bars == 1:
+        return out
+    if decay == 0:
+        out[:, 1:] = gain * u[:, 1:]
+        return out
+
+    block = _block_size(decay)
+    powers = decay ** np.arange(block + 1)
+    inverse_powers = 1.0 / powers[:block]
+    previous = out[:, 0]
+    for start in range(1, n_bars, block):
+        stop = min(start + block, n_bars)
+        k = stop - start
+        # y[start + j] = decay**j * (decay * y[start - 1] + gain * sum_{i<=j} decay**-i * u[start + i])
+        scaled = np.cumsum(u[:, start:stop] * inverse_powers[:k], axis=1)
+        out[:, start:stop] = powers[:k] * (decay * previous[:, None] + gain * scaled)
+        previous = out[:, stop - 1]
+    return out
+
+def _leading_nan_rows(x: np.ndarray):
+    """
+    Index of each row's first valid value, and whether the NumPy backend can
+    handle the array (no NaN after a row's first valid value).
+    """
+    valid = ~np.isnan(x)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+    supported = bool((valid.sum(axis=1) == x.shape[1] - first).all())
+    return first, supported
+
+def _fill_leading(x: np.ndarray, first: np.ndarray):
+    bars = np.arange(x.shape[1])
+    prefix = bars[None, :] < first[:, None]
+    if not prefix.any():
+        return x, prefix
+    seed = x[np.arange(x.shape[0]), np.minimum(first, x.shape[1] - 1)]
+    filled = np.where(prefix, seed[:, None], x)
+    return filled, prefix
+
+def _ema_numpy(x: np.ndarray, alpha: float) -> np.ndarray:
+    first, supported = _leading_nan_rows(x)
+    if not supported:
+        out = np.empty_like(x)
+        _ema_loop(x, alpha, out)
+        return out
+    # Leading NaNs: holding the first valid value through the prefix leaves the EMA unchanged
+    filled, prefix = _fill_leading(x, first)
+    out = _linear_filter(filled, filled[:, 0], 1.0 - alpha, alpha)
+    out[prefix] = np.nan
+    return out
+
+def _ewm_var_numpy(x: np.ndarray, alpha: float) -> np.ndarray:
+    first, supported = _leading_nan_rows(x)
+    if not supported:
+        out = np.empty_like(x)
+        _ewm_var_loop(x, alpha, out)
+        return out
+    decay = 1.0 - alpha
+    filled, prefix = _fill_leading(x, first)
+
+    # With adjust=False the mean is an EMA, and the biased variance follows
+    # cov[t] = decay * cov[t-1] + alpha * decay * (x[t] - mean[t-1])**2
+    mean = _linear_filter(filled, filled[:, 0], decay, alpha)
+    deviation = np.zeros_like(filled)
+    deviation[:, 1:] = filled[:, 1:] - mean[:, :-1]
+    cov = _linear_filter(deviation * deviation, np.zeros(x.shape[0]), decay, alpha * decay)
+
+    # Bias correction: the sum of squared weights after k observations
+    steps = np.maximum(np.arange(x.shape[1])[None, :] - first[:, None], 0)
+    decay_2k = decay ** (2 * steps)
+    sum_wt2 = decay_2k + alpha * alpha * (1 - decay_2k) / (1 - decay * decay)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(steps > 0, cov / (1.0 - sum_wt2), np.nan)
+    out[prefix] = np.nan
+    return out
+
+def _tema_numpy(x: np.ndarray, alpha: float) -> np.ndarray:
+    ema1 = _ema_numpy(x, alpha)
+    ema2 = _ema_numpy(ema1, alpha)
+    ema3 = _ema_numpy(ema2, alpha)
+    return 3 * (ema1 - ema2) + ema3
+
+def _rolling_vwap_numpy(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, window: int) -> np.ndarray:
+    price_volume = np.cumsum((high + low + close) / 3 * volume, axis=1)
+    total_volume = np.cumsum(volume, axis=1)
+    out = np.full_like(close, np.nan)
+    if window <= close.shape[1]:
+        window_price_volume = price_volume[:, window - 1:].copy()
+        window_volume = total_volume[:, window - 1:].copy()
+        window_price_volume[:, 1:] -= price_volume[:, :-window]
+        window_volume[:, 1:] -= total_volume[:, :-window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, window - 1:] = window_price_volume / window_volume
+    return out
+
+# ---------------------------------------------------------------------------
+# Public kernels
+# ---------------------------------------------------------------------------
+
+def ema(values, span: float) -> np.ndarray:
+    """
+    Exponential moving average, equal to ``ewm(span=span, adjust=False).mean()``.
+    """
+    x = _as_2d(values)
+    kernels = _jit()
+    if kernels:
+        out = np.empty_like(x)
+        kernels["ema"](x, _alpha(span), out)
+    else:
+        out = _ema_numpy(x, _alpha(span))
+    return _shape_like(out, values)
+
+def ewm_var(values, span: float) -> np.ndarray:
+    """
+    Bias-corrected exponentially weighted variance, equal to ``ewm(span=span, adjust=False).var()``.
+    """
+    x = _as_2d(values)
+    kernels = _jit()
+    if kernels:
+        out = np.empty_like(x)
+        kernels["ewm_var"](x, _alpha(span), out)
+    else:
+        out = _ewm_var_numpy(x, _alpha(span))
+    return _shape_like(out, values)
+
+def ewm_std(values, span: float) -> np.ndarray:
+    """
+    Exponentially weighted standard deviation, equal to ``ewm(span=span, adjust=False).std()``.
+    """
+    variance = ewm_var(values, span)
+    return np.sqrt(np.maximum(variance, 0))
+
+def tema(values, span: float) -> np.ndarray:
+    """
+    Triple exponential moving average, 3 * (EMA1 - EMA2) + EMA3, for NaN-free input.
+    """
+    x = _as_2d(values)
+    kernels = _jit()
+    if kernels:
+        out = np.empty_like(x)
+        kernels["tema"](x, _alpha(span), out)
+    else:
+        out = _tema_numpy(x, _alpha(span))
+    return _shape_like(out, values)
+
+def rolling_vwap(high, low, close, volume, window: int) -> np.ndarray:
+    """
+    Rolling VWAP of the typical price (high + low + close) / 3 over ``window`` bars,
+    NaN until a full window is available. Inputs must not contain NaN.
+    """
+    arrays = [_as_2d(values) for values in (high, low, close, volume)]
+    kernels = _jit()
+    if kernels:
+        out = np.empty_like(arrays[2])
+        kernels["rolling_vwap"](*arrays, int(window), out)
+    else:
+        out = _rolling_vwap_numpy(*arrays, int(window))
+    return _shape_like(out, close)
+
+def crossover_signals(line, reference) -> np.ndarray:
+    """
+    'buy' where ``line`` crossed above ``reference`` on the last bar, 'sell'
+    where it crossed below, 'hold' otherwise. One signal per row.
+    """
+    line, reference = _as_2d(line), _as_2d(reference)
+    above = (line[:, -1] > reference[:, -1]) & (line[:, -2] <= reference[:, -2])
+    below = (line[:, -1] < reference[:, -1]) & (line[:, -2] >= reference[:, -2])
+    return np.where(above, 'buy', np.where(below, 'sell', 'hold'))
@@ -0,0 +1,38 @@
+"""
+Deferred imports for heavy dependencies.
+
+ccxt, pandas and numpy together add most of the start-up time of every
+process, even for commands that never touch market data. Modules that need
+them bind a ``LazyModule`` instead, which performs the real import the first
+time an attribute is accessed:
+
+    pd = LazyModule("pandas")
+    ...
+    pd.DataFrame(...)  # pandas is imported here
+
+Annotations that mention the module must not be evaluated at import time, so
+modules using this also use ``from __future__ import annotations``.
+"""
+import importlib
+from types import ModuleType
+from typing import Any
+
+class LazyModule:
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            # importlib holds a per-module lock, so concurrent first uses import once
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
@@ -1,23 +1,169 @@
-# main.py
-from trading_scheduler import start_scheduler
-from robinhood_api_trading import CryptoAPITrading
-from trading_strategy import BTC_trading_strategy
+"""
+Command line entry point.
 
-def main():
+    python main.py                      # same as "run"
+    python main.py run [--runtime events] [--interval 10]
+    python main.py run --runtime sharded --symbols BTC/USD,ETH/USD,SOL/USD [--workers 4]
+    python main.py account
+    python main.py fetch --symbol BTC/USD --timeframe 1d --days 365 [--output candles.csv]
+    python main.py backtest --symbol BTC/USD --timeframe 1d --days 365
+    python main.py walkforward --days 1095 --train 180 --test 30 [--resamples 10000]
+    python main.py journal --type DecisionRecord [--replay]
+
+Only the modules a subcommand needs are imported, and ccxt/pandas are loaded
+lazily on first use, so short commands like "account" start quickly.
+"""
+import argparse
+import datetime
+import os
+from typing import List, Optional
+
+def run(args: argparse.Namespace):
+    from config.api_config import GATEWAY_CONFIG, JOURNAL_CONFIG
+    from order_gateway import OrderGateway, set_order_gateway
+    from robinhood_api_trading import CryptoAPITrading
+    from trade_journal import TradeJournal, set_journal
+    from trading_scheduler import configure_logging, start_scheduler
+    from trading_strategy import BTC_trading_strategy
+
+    log_listener = configure_logging()
+    journal = TradeJournal(JOURNAL_CONFIG["directory"], JOURNAL_CONFIG["max_bytes"], JOURNAL_CONFIG["flush_interval"]).start()
+    set_journal(journal)
     api_trading_client = CryptoAPITrading()
-    
-    # Fetch and print account details
-    print("Account details:")
-    print(api_trading_client.get_account())
-
-    # Start the scheduler with the trading strategy function and desired interval
-    start_scheduler(BTC_trading_strategy, 10)  # Run trading strategy every 10 seconds
-    
-    # Fetch and print account details
-    print("Account details:")
-    print(api_trading_client.get_account())
-    
+    # All strategies place their orders through one gateway for the account; it
+    # re-sends the orders the last run left in flight
+    gateway = OrderGateway(api_trading_client, **GATEWAY_CONFIG).start()
+    set_order_gateway(gateway)
+
+    try:
+        # Fetch and print account details
+        print("Account details:")
+        print(api_trading_client.get_account())
+
+        if args.runtime == "sharded":
+            from sharded_scheduler import start_sharded_scheduler, wait_for_quit
+            from trading_strategy import BTC_WEIGHTS, BTC_indicator_signals
+            # Every symbol runs the BTC indicators in worker processes; orders go through the gateway
+            sharded = start_sharded_scheduler(args.symbols.split(","), BTC_indicator_signals, BTC_WEIGHTS, args.interval, args.workers)
+            try:
+                wait_for_quit()
+            finally:
+                sharded.stop()  # Workers and the shared-memory segment do not outlive the run
+        elif args.runtime == "events":
+            from event_pipeline import BTC_risk_subscription, BTC_subscription, start_event_pipeline
+            start_event_pipeline([BTC_subscription(), BTC_risk_subscription()], args.interval)  # Evaluate whenever a new candle arrives, check risk on every new quote
+        else:
+            # Start the scheduler with the trading strategy function and desired interval
+            start_scheduler([(BTC_trading_strategy, args.interval)])  # Run trading strategy every --interval seconds (default 10)
+
+        # Fetch and print account details
+        print("Account details:")
+        print(api_trading_client.get_account())
+    finally:
+        # Orders still in flight stay in the gateway's state file for the next run
+        set_order_gateway(None)
+        gateway.stop()
+        set_journal(None)
+        journal.stop()
+        log_listener.stop()
     print("Done!")
 
+def account(args: argparse.Namespace):
+    from robinhood_api_trading import CryptoAPITrading
+    print(CryptoAPITrading().get_account())
+
+def _fetch(args: argparse.Namespace):
+    from timeframes import timeframe_seconds
+    from trading_strategy import fetch_historical_data
+    start_date = (datetime.datetime.now() - datetime.timedelta(days=args.days)).isoformat() + 'Z'
+    # By default fetch every bar in the requested window
+    limit = args.limit or args.days * 86400 // timeframe_seconds(args.timeframe)
+    return fetch_historical_data(symbol=args.symbol, start_date=start_date, timeframe=args.timeframe, limit=limit)
+
+def fetch(args: argparse.Namespace):
+    prices_df = _fetch(args)
+    if args.output:
+        prices_df.to_csv(args.output)
+        print(f"Wrote {len(prices_df)} candles to {args.output}")
+    else:
+        print(prices_df.tail(args.tail))
+
+def backtest(args: argparse.Namespace):
+    from backtest import run_backtest
+    result = run_backtest(_fetch(args), fee=args.fee)
+    print(f"Total return: {result['total_return']:.2%}")
+    print(f"Max drawdown: {result['max_drawdown']:.2%}")
+    print(f"Trades: {result['trades']}  Win rate: {result['win_rate']:.0%}")
+
+def walkforward(args: argparse.Namespace):
+    from walk_forward import evaluate
+    result = evaluate(_fetch(args), resamples=args.resamples, seed=args.seed, workers=args.workers, train_bars=args.train, test_bars=args.test, objective=args.objective, fee=args.fee)
+    for fold in result.folds:
+        print(f"Test bars {fold.test[0]}-{fold.test[1]}: return {fold.test_return:.2%}, trades {fold.test_trades}, params {fold.params}, weights {fold.weights}")
+    print(f"Out-of-sample return: {result.total_return:.2%}")
+    for metric, (median, low, high) in result.monte_carlo.items():
+        print(f"{metric}: {median:.4f} (95% CI {low:.4f} to {high:.4f})")
+
+def journal(args: argparse.Namespace):
+    import trade_journal
+    if not os.path.exists(args.path):
+        print(f"No trade journal found at {args.path}")
+        return
+    if args.replay:
+        trade_journal.replay_journal(args.path, print, args.speed)
+        return
+    record_type = {record_type.__name__: record_type for record_type in trade_journal.RECORD_TYPES}[args.type]
+    print(trade_journal.journal_to_frame(args.path, record_type).tail(args.tail))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Algorithmic trading in Python")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Run the trading strategies until 'q' is entered")
+    run_parser.add_argument("--runtime", choices=["scheduler", "events", "sharded"], default="scheduler", help="Fixed-interval scheduler, event-driven pipeline, or multi-process scheduler for many symbols")
+    run_parser.add_argument("--interval", type=int, default=10, help="Seconds between strategy runs (scheduler) or data polls (events)")
+    run_parser.add_argument("--symbols", default="BTC/USD", help="Comma-separated ccxt symbols for --runtime sharded")
+    run_parser.add_argument("--workers", type=int, help="Worker processes for --runtime sharded (default: one per CPU)")
+    run_parser.set_defaults(func=run)
+
+    account_parser = subparsers.add_parser("account", help="Print the trading account details")
+    account_parser.set_defaults(func=account)
+
+    for name, func, help_text in (("fetch", fetch, "Download historical candles"), ("backtest", backtest, "Backtest the BTC strategy on historical candles"), ("walkforward", walkforward, "Walk-forward optimisation with Monte Carlo confidence intervals")):
+        data_parser = subparsers.add_parser(name, help=help_text)
+        data_parser.add_argument("--symbol", default="BTC/USD")
+        data_parser.add_argument("--timeframe", default="1d")
+        data_parser.add_argument("--days", type=int, default=365)
+        data_parser.add_argument("--limit", type=int, help="Maximum number of candles (default: every candle in --days)")
+        data_parser.set_defaults(func=func)
+
+    journal_parser = subparsers.add_parser("journal", help="Inspect or replay a recorded trade journal")
+    journal_parser.add_argument("--path", default="journal", help="Journal directory or file")
+    journal_parser.add_argument("--type", default="DecisionRecord", choices=["TickRecord", "IndicatorRecord", "DecisionRecord", "OrderRecord", "FillRecord"])
+    journal_parser.add_argument("--tail", type=int, default=20, help="Number of records to print")
+    journal_parser.add_argument("--replay", action="store_true", help="Print every record in order instead of a table")
+    journal_parser.add_argument("--speed", type=float, help="Replay with the recorded timing, sped up by this factor")
+    journal_parser.set_defaults(func=journal)
+
+    subparsers.choices["fetch"].add_argument("--output", help="Write the candles to this CSV file instead of printing them")
+    subparsers.choices["fetch"].add_argument("--tail", type=int, default=10, help="Number of candles to print")
+    subparsers.choices["backtest"].add_argument("--fee", type=float, default=0.0, help="Proportional cost per side")
+    walkforward_parser = subparsers.choices["walkforward"]
+    walkforward_parser.add_argument("--train", type=int, default=180, help="Bars in each optimisation window")
+    walkforward_parser.add_argument("--test", type=int, default=30, help="Bars in each out-of-sample window")
+    walkforward_parser.add_argument("--objective", choices=["return", "sharpe"], default="return")
+    walkforward_parser.add_argument("--fee", type=float, default=0.0, help="Proportional cost per side")
+    walkforward_parser.add_argument("--resamples", type=int, default=10000, help="Monte Carlo resamples")
+    walkforward_parser.add_argument("--seed", type=int, help="Random seed for the resamples")
+    walkforward_parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(["run"])  # Plain "python main.py" keeps starting the scheduler
+    args.func(args)
+
 if __name__ == "__main__":
     main()
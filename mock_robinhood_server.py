@@ -0,0 +1,411 @@
+"""
+Local stand-in for the Robinhood Crypto Trading API.
+
+Implements the ``/api/v1/crypto/...`` endpoints CryptoAPITrading uses, checks
+the ``x-api-key``/``x-timestamp``/``x-signature`` headers against the client's
+Ed25519 public key, and simulates fills, latency, server errors and rate
+limits. Point a client at it to run integration and load tests offline:
+
+    server = MockRobinhoodServer(latency=0.01).start()
+    client = server.client()
+    client.place_order(str(uuid.uuid4()), 'bid', 'market', 'BTC-USD', {"asset_quantity": "0.1"})
+    print(run_load_test(client.get_account, requests=1000, concurrency=16))
+    server.stop()
+
+It can also be run standalone; it prints the environment variables
+(API_KEY, PRIVATE_KEY, API_BASE_URL) that point the rest of the code at it:
+
+    python mock_robinhood_server.py --port 8000 --latency 0.05 --error-rate 0.01 --rate-limit 100
+"""
+import argparse
+import base64
+import datetime
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat
+from robinhood_api_trading import CryptoAPITrading
+
+# Signed requests older or newer than this are rejected, like the real API
+TIMESTAMP_TOLERANCE_SECONDS = 30
+
+DEFAULT_PRICES = {"BTC-USD": 60000.0, "ETH-USD": 3000.0, "DOGE-USD": 0.15}
+
+def _now_iso() -> str:
+    return datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
+
+class MockAPIState:
+    """
+    Account, holdings, prices and orders held by the mock server.
+    """
+
+    def __init__(self, buying_power: float, prices: Dict[str, float], spread: float, fill_delay: float):
+        self.account_number = "MOCK-ACCOUNT"
+        self.buying_power = buying_power
+        self.prices = dict(prices)
+        self.spread = spread
+        self.fill_delay = fill_delay
+        self.holdings: Dict[str, float] = {}
+        self.orders: Dict[str, dict] = {}
+        self.orders_by_client_id: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def quote(self, symbol: str) -> dict:
+        price = self.prices[symbol]
+        return {
+            "symbol": symbol,
+            "price": str(price),
+            "bid_inclusive_of_sell_spread": str(price * (1 - self.spread)),
+            "sell_spread": str(self.spread),
+            "ask_inclusive_of_buy_spread": str(price * (1 + self.spread)),
+            "buy_spread": str(self.spread),
+            "timestamp": _now_iso(),
+        }
+
+    def place_order(self, body: dict) -> Tuple[int, dict]:
+        symbol = body.get("symbol")
+        side = body.get("side")
+        order_type = body.get("type")
+        if symbol not in self.prices or side not in ("bid", "ask") or not order_type:
+            return 400, {"errors": [{"detail": "Invalid order."}]}
+
+        config = body.get(f"{order_type}_order_config") or {}
+        try:
+            quantity = float(config.get("asset_quantity", config.get("amount")))
+        except (TypeError, ValueError):
+            return 400, {"errors": [{"detail": "Invalid order quantity."}]}
+
+        # Orders are idempotent on client_order_id, as with the real API
+        existing = self.orders_by_client_id.get(body.get("client_order_id"))
+        if existing is not None:
+            return 201, self._refresh(self.orders[existing])
+
+        price = float(self.quote(symbol)["ask_inclusive_of_buy_spread" if side == "bid" else "bid_inclusive_of_sell_spread"])
+        asset_code = symbol.split("-")[0]
+        if side == "bid" and quantity * price > self.buying_power:
+            return 400, {"errors": [{"detail": "Insufficient buying power."}]}
+        if side == "ask" and quantity > self.holdings.get(asset_code, 0):
+            return 400, {"errors": [{"detail": "Insufficient holdings."}]}
+
+        order = {
+            "id": str(uuid.uuid4()),
+            "account_number": self.account_number,
+            "client_order_id": body.get("client_order_id"),
+            "side": side,
+            "type": order_type,
+            "symbol": symbol,
+            "state": "open",
+            "executions": [],
+            "average_price": None,
+            "filled_asset_quantity": "0",
+            "created_at": _now_iso(),
+            "updated_at": _now_iso(),
+            f"{order_type}_order_config": config,
+            "_quantity": quantity,
+            "_price": price,
+            "_fill_at": time.monotonic() + self.fill_delay,
+        }
+        self.orders[order["id"]] = order
+        self.orders_by_client_id[order["client_order_id"]] = order["id"]
+        return 201, self._refresh(order)
+
+    def _refresh(self, order: dict) -> dict:
+        """
+        Fill the order if its simulated fill time has passed, then return its public view.
+        """
+        if order["state"] == "open" and time.monotonic() >= order["_fill_at"]:
+            asset_code = order["symbol"].split("-")[0]
+            quantity, price = order["_quantity"], order["_price"]
+            sign = 1 if order["side"] == "bid" else -1
+            self.holdings[asset_code] = self.holdings.get(asset_code, 0) + sign * quantity
+            self.buying_power -= sign * quantity * price
+            order["state"] = "filled"
+            order["average_price"] = str(price)
+            order["filled_asset_quantity"] = str(quantity)
+            order["executions"] = [{"effective_price": str(price), "quantity": str(quantity), "timestamp": _now_iso()}]
+            order["updated_at"] = _now_iso()
+        return {key: value for key, value in order.items() if not key.startswith("_")}
+
+    def cancel_order(self, order_id: str) -> Tuple[int, Any]:
+        order = self.orders.get(order_id)
+        if order is None:
+            return 404, {"errors": [{"detail": "Not found."}]}
+        self._refresh(order)
+        if order["state"] != "open":
+            return 400, {"errors": [{"detail": f"Order is {order['state']}."}]}
+        order["state"] = "canceled"
+        order["updated_at"] = _now_iso()
+        return 200, "Cancel request has been submitted."
+
+    def handle(self, method: str, path: str, query: Dict[str, list], body: dict) -> Tuple[int, Any]:
+        with self.lock:
+            if method == "GET" and path == "/api/v1/crypto/trading/accounts/":
+                return 200, {"account_number": self.account_number, "status": "active", "buying_power": f"{self.buying_power:.2f}", "buying_power_currency": "USD"}
+
+            if method == "GET" and path == "/api/v1/crypto/trading/trading_pairs/":
+                symbols = query.get("symbol") or list(self.prices)
+                return 200, {"next": None, "previous": None, "results": [
+                    {"asset_code": s.split("-")[0], "quote_code": "USD", "symbol": s, "status": "tradable"} for s in symbols if s in self.prices
+                ]}
+
+            if method == "GET" and path == "/api/v1/crypto/trading/holdings/":
+                for order in self.orders.values():
+                    self._refresh(order)
+                asset_codes = query.get("asset_code") or list(self.holdings)
+                return 200, {"next": None, "previous": None, "results": [
+                    {"account_number": self.account_number, "asset_code": code, "total_quantity": str(self.holdings[code]), "quantity_available_for_trading": str(self.holdings[code])}
+                    for code in asset_codes if self.holdings.get(code)
+                ]}
+
+            if method == "GET" and path == "/api/v1/crypto/marketdata/best_bid_ask/":
+                symbols = query.get("symbol") or list(self.prices)
+                return 200, {"results": [self.quote(s) for s in symbols if s in self.prices]}
+
+            if method == "GET" and path == "/api/v1/crypto/marketdata/estimated_price/":
+                symbol = query.get("symbol", [""])[0]
+                if symbol not in self.prices:
+                    return 400, {"errors": [{"detail": "Invalid symbol."}]}
+                quote = self.quote(symbol)
+                sides = ["bid", "ask"] if query.get("side", [""])[0] == "both" else query.get("side", ["bid"])
+                return 200, {"results": [
+                    {"symbol": symbol, "side": side, "price": quote["bid_inclusive_of_sell_spread" if side == "bid" else "ask_inclusive_of_buy_spread"], "quantity": quantity}
+                    for side in sides for quantity in query.get("quantity", ["1"])[0].split(",")
+                ]}
+
+            if path == "/api/v1/crypto/trading/orders/":
+                if method == "POST":
+                    return self.place_order(body)
+                return 200, {"next": None, "previous": None, "results": [self._refresh(order) for order in self.orders.values()]}
+
+            parts = path.strip("/").split("/")
+            if len(parts) >= 6 and parts[:5] == ["api", "v1", "crypto", "trading", "orders"]:
+                order_id = parts[5]
+                if method == "POST" and parts[6:] == ["cancel"]:
+                    return self.cancel_order(order_id)
+                if method == "GET" and len(parts) == 6 and order_id in self.orders:
+                    return 200, self._refresh(self.orders[order_id])
+
+            return 404, {"errors": [{"detail": "Not found."}]}
+
+class _TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so client connection pooling is exercised
+    server: "_MockHTTPServer"
+
+    def log_message(self, format: str, *args: Any):
+        logging.debug("mock api: " + format % args)
+
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        try:
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. timed out) before the response was written
+            logging.debug(f"mock api: client disconnected before {status} response to {self.path}")
+            self.close_connection = True
+
+    def _verify(self, method: str, path: str, body: str) -> Optional[str]:
+        api_key = self.headers.get("x-api-key")
+        timestamp = self.headers.get("x-timestamp")
+        signature = self.headers.get("x-signature")
+        if api_key != self.server.mock.api_key or not timestamp or not signature:
+            return "Missing or unknown API key."
+        try:
+            if abs(time.time() - int(timestamp)) > TIMESTAMP_TOLERANCE_SECONDS:
+                return "Timestamp is outside the allowed window."
+            message = f"{api_key}{timestamp}{path}{method}{body}"
+            self.server.mock.public_key.verify(base64.b64decode(signature), message.encode("utf-8"))
+        except (ValueError, InvalidSignature):
+            return "Invalid signature."
+        return None
+
+    def _dispatch(self, method: str):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+
+        with mock.concurrency:
+            mock.count("requests")
+            if mock.latency:
+                time.sleep(random.uniform(*mock.latency))
+
+            error = self._verify(method, self.path, body)
+            if error:
+                mock.count("401")
+                return self._send(401, {"errors": [{"detail": error}]})
+            if mock.rate_limiter is not None and not mock.rate_limiter.take():
+                mock.count("429")
+                return self._send(429, {"errors": [{"detail": "Request was throttled."}]}, {"Retry-After": "1"})
+            if mock.error_rate and random.random() < mock.error_rate:
+                mock.count("500")
+                return self._send(500, {"errors": [{"detail": "Simulated server error."}]})
+
+            url = urlparse(self.path)
+            try:
+                status, payload = mock.state.handle(method, url.path, parse_qs(url.query), json.loads(body) if body else {})
+            except json.JSONDecodeError:
+                status, payload = 400, {"errors": [{"detail": "Invalid JSON body."}]}
+            mock.count(str(status))
+            self._send(status, payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockRobinhoodServer"
+
+class MockRobinhoodServer:
+    """
+    Threaded HTTP server emulating the Robinhood Crypto Trading API.
+
+    :param host: Interface to bind.
+    :param port: Port to bind; 0 picks a free one.
+    :param api_key: API key clients must send.
+    :param private_key: Key pair clients sign with; generated if omitted.
+    :param latency: Seconds of simulated latency per request, a (min, max) range or a single value.
+    :param error_rate: Probability of answering a request with a 500.
+    :param rate_limit: Requests per second allowed before answering 429; None disables it.
+    :param max_concurrency: Requests processed at the same time; the rest wait, like a server with N workers.
+    :param fill_delay: Seconds before a placed order is filled.
+    :param buying_power: Starting buying power in USD.
+    :param prices: Mid prices per symbol, e.g. {"BTC-USD": 60000.0}.
+    :param spread: Proportional spread applied on each side of the mid price.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, api_key: str = "mock-api-key", private_key: Optional[ed25519.Ed25519PrivateKey] = None, latency: Any = 0.0, error_rate: float = 0.0, rate_limit: Optional[float] = None, max_concurrency: int = 64, fill_delay: float = 0.0, buying_power: float = 100000.0, prices: Optional[Dict[str, float]] = None, spread: float = 0.001):
+        self.api_key = api_key
+        self.private_key = private_key or ed25519.Ed25519PrivateKey.generate()
+        self.public_key = self.private_key.public_key()
+        self.latency = tuple(latency) if isinstance(latency, (tuple, list)) else ((latency, latency) if latency else None)
+        self.error_rate = error_rate
+        self.rate_limiter = _TokenBucket(rate_limit) if rate_limit else None
+        self.concurrency = threading.BoundedSemaphore(max_concurrency)
+        self.state = MockAPIState(buying_power, prices or DEFAULT_PRICES, spread, fill_delay)
+        self.stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+
+        self._httpd = _MockHTTPServer((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-robinhood-api", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base64_private_key(self) -> str:
+        return base64.b64encode(self.private_key.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())).decode("utf-8")
+
+    def count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def client(self, pool_maxsize: int = 10) -> CryptoAPITrading:
+        """
+        A CryptoAPITrading client configured to talk to this server.
+        """
+        return CryptoAPITrading(pool_maxsize=pool_maxsize, api_key=self.api_key, base64_private_key=self.base64_private_key, base_url=self.url)
+
+    def start(self) -> "MockRobinhoodServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def run_load_test(request: Callable[[], Any], requests: int = 1000, concurrency: int = 16) -> dict:
+    """
+    Call ``request`` ``requests`` times from ``concurrency`` threads.
+
+    :return: Throughput, latency percentiles and the number of failed calls:
+        exceptions, None responses and error bodies with an "errors" key, which
+        is how make_api_request returns 4xx/5xx responses by default.
+    """
+    def timed_call(_: int) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            response = request()
+            ok = response is not None and not (isinstance(response, dict) and "errors" in response)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_call, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "failed": sum(not ok for _, ok in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock of the Robinhood Crypto Trading API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a simulated 500")
+    parser.add_argument("--rate-limit", type=float, help="Requests per second before answering 429")
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--fill-delay", type=float, default=0.0, help="Seconds before orders are filled")
+    args = parser.parse_args()
+
+    server = MockRobinhoodServer(args.host, args.port, latency=args.latency, error_rate=args.error_rate, rate_limit=args.rate_limit, max_concurrency=args.max_concurrency, fill_delay=args.fill_delay)
+    print(f"Mock Robinhood API listening on {server.url}")
+    print(f"API_KEY={server.api_key}")
+    print(f"PRIVATE_KEY={server.base64_private_key}")
+    print(f"API_BASE_URL={server.url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
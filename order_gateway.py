@@ -0,0 +1,470 @@
+"""
+Order gateway shared by all strategies.
+
+Strategies submit OrderIntents instead of placing orders themselves. A single
+gateway thread collects the intents that arrive within one batch window, nets
+buys against sells per symbol and places at most one order per symbol for the
+difference. Each order is sent with a client_order_id derived from the intents
+it carries. The API treats that id as an idempotency key, so timeouts and
+transient errors are retried without risking a second fill.
+
+The IntentBook keeps every intent, its outcome and each strategy's resulting
+position, so strategies sharing one account can check their own exposure and
+pending orders without calling the API. Orders whose outcome is unknown (every
+attempt timed out) stay in flight: the gateway keeps re-sending them, with the
+same client_order_id and a growing delay, until the API answers, and only then
+resolves their intents. In-flight orders and their intents are written to the
+gateway's state file whenever an order is sent or settles, in every runtime,
+and re-sent when the next gateway starts. Nothing in the new process waits on
+those intents, so their results go to the handlers registered with
+``register_recovery_handler``.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import trade_journal
+from robinhood_api_trading import APIRequestError, APITimeoutError, CryptoAPITrading
+from trade_journal import FillRecord, OrderRecord
+
+# Strategy signal -> API order side
+SIDES = {'buy': 'bid', 'sell': 'ask'}
+
+# Net quantities smaller than this are treated as fully crossed
+QUANTITY_EPSILON = 1e-12
+
+# Longest delay between re-sends of an order whose outcome is unknown, in seconds
+MAX_RETRY_INTERVAL = 300
+
+@dataclass
+class OrderIntent:
+    strategy: str
+    symbol: str
+    side: str  # 'buy' or 'sell'
+    quantity: float
+    client_order_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created: float = field(default_factory=time.time)
+    trade: Dict[str, Any] = field(default_factory=dict)  # What the strategy records once the order settles; JSON serialisable
+
+@dataclass
+class OrderResult:
+    status: str  # 'placed', 'netted', 'failed' or 'unknown'
+    client_order_id: Optional[str] = None  # Of the order sent to the API, if one was needed
+    order_id: Optional[str] = None
+    response: Any = None
+
+@dataclass
+class GatewayOrder:
+    client_order_id: str
+    symbol: str
+    side: str  # 'bid' or 'ask'
+    quantity: float
+    intents: List[str]  # client_order_ids of the intents this order nets
+    order_type: str = 'market'
+
+    @property
+    def order_config(self) -> Dict[str, str]:
+        return {"amount": f"{self.quantity:.8f}".rstrip("0").rstrip(".")}
+
+def journal_order(client_order_id: str, side: str, order_type: str, symbol: str, order_config: dict, response: Any):
+    """
+    Record a placed order, and any executions already reported for it, in the trade journal.
+    """
+    response = response if isinstance(response, dict) else {}
+    trade_journal.record(OrderRecord(
+        client_order_id=client_order_id,
+        symbol=symbol,
+        side=side,
+        order_type=order_type,
+        amount=order_config.get("amount", ""),
+        order_id=response.get("id"),
+        state=response.get("state"),
+    ))
+    for execution in response.get("executions", []) or []:
+        trade_journal.record(FillRecord(
+            order_id=response.get("id", ""),
+            symbol=symbol,
+            side=side,
+            quantity=float(execution.get("quantity", 0)),
+            price=float(execution.get("effective_price", 0)),
+        ))
+
+def net_intents(intents: List[OrderIntent]) -> List[Tuple[Optional[GatewayOrder], List[OrderIntent], List[OrderIntent]]]:
+    """
+    Net opposing intents per symbol.
+
+    :return: One (order, carried, crossed) entry per symbol. ``order`` is None
+        when buys and sells cancel out exactly. ``carried`` are the intents on
+        the side of the order and ``crossed`` those matched against them
+        internally.
+    """
+    by_symbol: Dict[str, List[OrderIntent]] = {}
+    for intent in intents:
+        by_symbol.setdefault(intent.symbol, []).append(intent)
+
+    netted = []
+    for symbol, group in by_symbol.items():
+        net = sum(intent.quantity if intent.side == 'buy' else -intent.quantity for intent in group)
+        if abs(net) < QUANTITY_EPSILON:
+            netted.append((None, [], group))
+            continue
+        side = 'buy' if net > 0 else 'sell'
+        carried = [intent for intent in group if intent.side == side]
+        crossed = [intent for intent in group if intent.side != side]
+        # A lone intent keeps its own id; a combined order gets an id derived from its
+        # intents, so re-sending the same set of intents is still idempotent.
+        if len(group) == 1:
+            client_order_id = group[0].client_order_id
+        else:
+            client_order_id = str(uuid.uuid5(uuid.NAMESPACE_OID, ",".join(sorted(intent.client_order_id for intent in group))))
+        order = GatewayOrder(client_order_id, symbol, SIDES[side], abs(net), [intent.client_order_id for intent in group])
+        netted.append((order, carried, crossed))
+    return netted
+
+def place_order_with_retries(api_trading_client: CryptoAPITrading, order: GatewayOrder, max_retries: int = 3, backoff: float = 0.5) -> OrderResult:
+    """
+    Place an order, retrying timeouts and transient errors with the same client_order_id.
+
+    :return: 'placed' with the API response, 'failed' if the order was
+        rejected or could not be sent, or 'unknown' if it may have reached the
+        API but no attempt got a usable answer: a timeout, a server error, or a
+        success response that is not a JSON object. Once an attempt may have
+        reached the API, a later rejection (e.g. of the duplicate id) is
+        'unknown' as well, since the earlier attempt may have filled.
+    """
+    uncertain = False
+    for attempt in range(max_retries + 1):
+        try:
+            response = api_trading_client.place_order(order.client_order_id, order.side, order.order_type, order.symbol, order.order_config, raise_errors=True)
+        except APIRequestError as e:
+            status_code = e.status_code or 0
+            uncertain = uncertain or isinstance(e, APITimeoutError) or status_code >= 500 or 200 <= status_code < 300
+            if not e.retryable:
+                if uncertain:
+                    logging.error(f"Order {order.client_order_id} for {order.symbol} may have been placed; outcome unknown: {e}")
+                    return OrderResult('unknown', order.client_order_id)
+                logging.error(f"Order {order.client_order_id} for {order.symbol} rejected: {e}")
+                return OrderResult('failed', order.client_order_id)
+            logging.warning(f"Order {order.client_order_id} for {order.symbol} attempt {attempt + 1} failed: {e}")
+            if attempt < max_retries:
+                time.sleep(backoff * 2 ** attempt)
+            continue
+        if not isinstance(response, dict):
+            logging.error(f"Order {order.client_order_id} for {order.symbol} got an unexpected response {response!r}; outcome unknown.")
+            return OrderResult('unknown', order.client_order_id)
+        journal_order(order.client_order_id, order.side, order.order_type, order.symbol, order.order_config, response)
+        return OrderResult('placed', order.client_order_id, response.get("id"), response)
+    return OrderResult('unknown' if uncertain else 'failed', order.client_order_id)
+
+class IntentBook:
+    """
+    Local record of submitted intents, their outcomes and per-strategy positions.
+
+    :param max_history: Resolved intents kept before the oldest are forgotten.
+    """
+
+    def __init__(self, max_history: int = 10000):
+        self.max_history = max_history
+        self.intents: Dict[str, OrderIntent] = {}
+        self.results: Dict[str, OrderResult] = {}
+        self.positions: Dict[Tuple[str, str], float] = {}
+        self.in_flight: Dict[str, GatewayOrder] = {}
+        self._lock = threading.Lock()
+
+    def add(self, intent: OrderIntent):
+        with self._lock:
+            self.intents[intent.client_order_id] = intent
+
+    def resolve(self, intent: OrderIntent, result: OrderResult):
+        with self._lock:
+            previous = self.results.pop(intent.client_order_id, None)
+            self.results[intent.client_order_id] = result
+            if result.status in ('placed', 'netted') and (previous is None or previous.status not in ('placed', 'netted')):
+                key = (intent.strategy, intent.symbol)
+                self.positions[key] = self.positions.get(key, 0.0) + (intent.quantity if intent.side == 'buy' else -intent.quantity)
+            while len(self.results) > self.max_history:
+                oldest = next(iter(self.results))
+                del self.results[oldest]
+                self.intents.pop(oldest, None)
+
+    def pending(self, strategy: Optional[str] = None, symbol: Optional[str] = None) -> List[OrderIntent]:
+        """
+        Intents not yet settled: waiting to be sent, being sent, or with an unknown outcome.
+        """
+        with self._lock:
+            return [
+                intent for client_order_id, intent in self.intents.items()
+                if (client_order_id not in self.results or self.results[client_order_id].status == 'unknown')
+                and strategy in (None, intent.strategy) and symbol in (None, intent.symbol)
+            ]
+
+    def position(self, strategy: str, symbol: str) -> float:
+        with self._lock:
+            return self.positions.get((strategy, symbol), 0.0)
+
+    def track(self, order: GatewayOrder):
+        with self._lock:
+            self.in_flight[order.client_order_id] = order
+
+    def untrack(self, order: GatewayOrder):
+        with self._lock:
+            self.in_flight.pop(order.client_order_id, None)
+
+    def in_flight_orders(self) -> List[GatewayOrder]:
+        with self._lock:
+            return list(self.in_flight.values())
+
+class OrderGateway:
+    """
+    Background thread that places all orders for one account.
+
+    :param api_trading_client: Client used to place the orders.
+    :param batch_window: Seconds intents are collected for, after the first
+        one arrives, before they are netted and sent.
+    :param max_retries: Retries per order for timeouts and transient errors.
+    :param backoff: Seconds before the first retry; doubled for each retry after it.
+    :param retry_interval: Seconds before an order whose outcome is unknown is
+        re-sent; doubled for each round it stays unknown, up to MAX_RETRY_INTERVAL.
+    :param state_file: JSON file the in-flight orders and their intents are
+        written to whenever they change, and recovered from on ``start``.
+    """
+
+    def __init__(self, api_trading_client: CryptoAPITrading, batch_window: float = 0.25, max_retries: int = 3, backoff: float = 0.5, retry_interval: float = 5.0, state_file: Optional[str] = None):
+        self.api_trading_client = api_trading_client
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retry_interval = retry_interval
+        self.state_file = state_file
+        self.book = IntentBook()
+        self.orders_sent = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._futures: Dict[str, Future] = {}  # Intents waiting for an order with an unknown outcome
+        self._retries: Dict[str, Tuple[float, Optional[float]]] = {}  # client_order_id -> (next attempt, last delay)
+        self._state_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="order-gateway", daemon=True)
+
+    def start(self) -> "OrderGateway":
+        """
+        Recover the orders left in flight by the previous gateway, then start the thread.
+        """
+        if self.state_file is not None and os.path.exists(self.state_file):
+            try:
+                orders, intents = load_gateway_state(self.state_file)
+            except (OSError, ValueError, TypeError) as e:
+                logging.error(f"Error reading order gateway state from {self.state_file}: {e}")
+            else:
+                if orders:
+                    logging.info(f"Recovered {len(orders)} in-flight orders from {self.state_file}.")
+                    self.recover(orders, intents)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 30):
+        """
+        Send everything already submitted, then stop the thread. Orders whose
+        outcome is still unknown stay in the state file for the next gateway.
+        """
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def submit(self, intent: OrderIntent) -> Future:
+        """
+        Queue an intent for the next batch.
+
+        :return: Future resolved with the intent's OrderResult, once the
+            outcome is known or, for an unknown outcome, when the gateway stops.
+        """
+        future: Future = Future()
+        self.book.add(intent)
+        self._queue.put((intent, future))
+        return future
+
+    def recover(self, orders: List[GatewayOrder], intents: List[OrderIntent] = ()):
+        """
+        Re-send orders whose outcome was unknown, e.g. when recovered from the state file.
+
+        :param intents: The intents the orders carry. They count as pending
+            until their order settles, and their results are passed to the
+            recovery handlers.
+        """
+        for intent in intents:
+            self.book.add(intent)
+        for order in orders:
+            self.book.track(order)  # Sent by the gateway thread on its next pass
+        self._save_state()
+
+    def _save_state(self):
+        if self.state_file is None:
+            return
+        with self._state_lock:
+            try:
+                save_gateway_state(self.state_file, self.book)
+            except OSError as e:
+                logging.error(f"Error writing order gateway state to {self.state_file}: {e}")
+
+    def _send(self, order: GatewayOrder) -> OrderResult:
+        self.book.track(order)
+        self._save_state()  # Before the order can reach the API
+        self.orders_sent += 1
+        result = place_order_with_retries(self.api_trading_client, order, self.max_retries, self.backoff)
+        if result.status == 'unknown':
+            _, delay = self._retries.get(order.client_order_id, (0.0, None))
+            delay = self.retry_interval if delay is None else min(2 * delay, MAX_RETRY_INTERVAL)
+            self._retries[order.client_order_id] = (time.monotonic() + delay, delay)
+        else:
+            self._retries.pop(order.client_order_id, None)
+            self.book.untrack(order)
+            self._save_state()
+        return result
+
+    def _resolve(self, intent: OrderIntent, result: OrderResult, future: Optional[Future]):
+        self.book.resolve(intent, result)
+        if result.status == 'unknown':
+            if future is not None:
+                self._futures[intent.client_order_id] = future  # Resolved once a re-send gets an answer
+            return
+        future = self._futures.pop(intent.client_order_id, future)
+        if future is None:
+            _recovered_result(intent, result)
+        elif not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _crossed_result(result: OrderResult) -> OrderResult:
+        # Crossed intents only happen if the order they were matched against does
+        if result.status == 'placed':
+            return OrderResult('netted', result.client_order_id, result.order_id)
+        return result
+
+    def _process(self, batch: List[Tuple[OrderIntent, Future]]):
+        futures = {intent.client_order_id: future for intent, future in batch}
+        for order, carried, crossed in net_intents([intent for intent, _ in batch]):
+            if order is None:
+                logging.info(f"Intents for {crossed[0].symbol} netted out; no order sent.")
+                for intent in crossed:
+                    self._resolve(intent, OrderResult('netted'), futures[intent.client_order_id])
+                continue
+
+            result = self._send(order)
+            crossed_result = self._crossed_result(result)
+            for intent in carried:
+                self._resolve(intent, result, futures[intent.client_order_id])
+            for intent in crossed:
+                self._resolve(intent, crossed_result, futures[intent.client_order_id])
+
+    def _resend_in_flight(self):
+        """
+        Re-send in-flight orders that are due: unknown outcomes and recovered orders.
+        """
+        now = time.monotonic()
+        for order in self.book.in_flight_orders():
+            due, _ = self._retries.get(order.client_order_id, (0.0, None))
+            if due > now:
+                continue
+            result = self._send(order)
+            logging.info(f"Re-sent order {order.client_order_id} for {order.symbol}: {result.status}")
+            crossed_result = self._crossed_result(result)
+            for client_order_id in order.intents:
+                intent = self.book.intents.get(client_order_id)
+                if intent is not None:
+                    self._resolve(intent, result if SIDES[intent.side] == order.side else crossed_result, None)
+
+    def _run(self):
+        while True:
+            self._resend_in_flight()
+            if self._stopped.is_set() and self._queue.empty():
+                # Nothing in this process will hear about these orders again; let waiters go
+                for client_order_id, future in list(self._futures.items()):
+                    if not future.done():
+                        future.set_result(self.book.results.get(client_order_id, OrderResult('unknown')))
+                self._futures.clear()
+                return
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.batch_window
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except Exception as e:
+                logging.error(f"Error processing order batch: {e}")
+                for intent, future in batch:
+                    if not future.done():
+                        self._resolve(intent, OrderResult('failed'), future)
+
+def save_gateway_state(path: str, book: IntentBook):
+    """
+    Atomically write the book's in-flight orders and the intents they carry to ``path``.
+    """
+    orders = book.in_flight_orders()
+    intents = [book.intents[client_order_id] for order in orders for client_order_id in order.intents if client_order_id in book.intents]
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump({"orders": [asdict(order) for order in orders], "intents": [asdict(intent) for intent in intents]}, file)
+    os.replace(temporary, path)
+
+def load_gateway_state(path: str) -> Tuple[List[GatewayOrder], List[OrderIntent]]:
+    """
+    Read the in-flight orders and intents written by ``save_gateway_state``.
+    """
+    with open(path) as file:
+        state = json.load(file)
+    return [GatewayOrder(**order) for order in state.get("orders", [])], [OrderIntent(**intent) for intent in state.get("intents", [])]
+
+_gateway: Optional[OrderGateway] = None
+_recovery_handlers: List[Callable[[OrderIntent, OrderResult], None]] = []
+
+def register_recovery_handler(handler: Callable[[OrderIntent, OrderResult], None]):
+    """
+    Register ``handler(intent, result)``, called when an intent recovered from
+    the gateway's state file settles, in place of the callbacks of the process that submitted it.
+    """
+    _recovery_handlers.append(handler)
+
+def _recovered_result(intent: OrderIntent, result: OrderResult):
+    logging.info(f"Restored {intent.side} intent {intent.client_order_id} for {intent.symbol}: {result.status}")
+    for handler in _recovery_handlers:
+        try:
+            handler(intent, result)
+        except Exception as e:
+            logging.error(f"Error applying recovered result for {intent.client_order_id}: {e}")
+
+def set_order_gateway(gateway: Optional[OrderGateway]):
+    """
+    Install the process-wide gateway used by ``submit_intent``. None places orders directly.
+    """
+    global _gateway
+    _gateway = gateway
+
+def get_order_gateway() -> Optional[OrderGateway]:
+    return _gateway
+
+def submit_intent(api_trading_client: CryptoAPITrading, intent: OrderIntent) -> Future:
+    """
+    Submit an intent to the installed gateway, or place it right away (with
+    retries) if none is running.
+
+    :return: Future resolved with the intent's OrderResult.
+    """
+    if _gateway is not None:
+        return _gateway.submit(intent)
+    order = GatewayOrder(intent.client_order_id, intent.symbol, SIDES[intent.side], intent.quantity, [intent.client_order_id])
+    future: Future = Future()
+    future.set_result(place_order_with_retries(api_trading_client, order))
+    return future
@@ -0,0 +1,185 @@
+"""
+On-demand CPU and memory profiling of scheduler jobs.
+
+Typing ``profile N`` at the scheduler prompt starts a ProfilingSession that
+covers the next N jobs and then writes two files to PROFILING_CONFIG["directory"]:
+
+    profile-<time>.folded        sampled call stacks, one "frame;frame;... count" line
+                                 per distinct stack, rooted at the strategy phase.
+                                 Render with flamegraph.pl or speedscope.
+    profile-<time>-memory.txt    net allocations per phase and their top source lines
+
+CPU samples are taken by a background thread reading the job thread's frame
+from sys._current_frames() every ``sample_interval`` seconds, so the profiled
+code is not instrumented. Memory is measured by tracemalloc snapshots taken at
+the start and end of each phase; CPU sampling is paused while they are taken
+and compared. Strategies mark their phases with ``with profiling.phase("fetch"):``.
+When no session is running, ``profile_job`` and ``phase`` return a shared
+no-op context manager and tracemalloc is off.
+"""
+import contextlib
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+_NO_PROFILE = contextlib.nullcontext()
+_OWN_FILES = {tracemalloc.__file__, __file__}
+
+class ProfilingSession:
+    """
+    Samples CPU stacks and allocation sites for a fixed number of jobs.
+
+    :param jobs: Number of jobs to profile before writing the results.
+    :param directory: Directory the result files are written to.
+    :param sample_interval: Seconds between CPU stack samples.
+    :param top_allocations: Allocation sites listed per phase.
+    """
+
+    def __init__(self, jobs: int, directory: str, sample_interval: float = 0.005, top_allocations: int = 25):
+        self.jobs_remaining = jobs
+        self.directory = directory
+        self.sample_interval = sample_interval
+        self.top_allocations = top_allocations
+        self.stacks: Counter = Counter()
+        self.allocations: Dict[str, Counter] = {}  # phase -> {source line: net bytes}
+        self.outputs: List[str] = []
+        self._phases: List[str] = []
+        self._thread_id: Optional[int] = None
+        self._in_job = threading.Event()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._owns_tracemalloc = False
+
+    def start(self) -> "ProfilingSession":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._sampler.start()
+        return self
+
+    def _fold(self, frame) -> str:
+        names = []
+        while frame is not None:
+            names.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+            frame = frame.f_back
+        names.append("/".join(self._phases))
+        return ";".join(reversed(names))
+
+    def _sample(self):
+        while not self._stopped.is_set():
+            if not self._in_job.wait(0.1):
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None and self._in_job.is_set():
+                self.stacks[self._fold(frame)] += 1
+            del frame
+            time.sleep(self.sample_interval)
+
+    @contextlib.contextmanager
+    def _paused(self) -> Iterator[None]:
+        # Keep the profiler's own snapshot and comparison cost out of the CPU stacks
+        sampling = self._in_job.is_set()
+        self._in_job.clear()
+        try:
+            yield
+        finally:
+            if sampling:
+                self._in_job.set()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._phases.append(name)
+        path = "/".join(self._phases)
+        with self._paused():
+            before = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            with self._paused():
+                after = tracemalloc.take_snapshot()
+                self._phases.pop()
+                sites = self.allocations.setdefault(path, Counter())
+                for stat in after.compare_to(before, 'lineno'):
+                    # Skip the profiler's own bookkeeping (snapshots, stack strings)
+                    if stat.size_diff and stat.traceback[0].filename not in _OWN_FILES:
+                        sites[str(stat.traceback[0])] += stat.size_diff
+
+    @contextlib.contextmanager
+    def job(self, name: str) -> Iterator[None]:
+        self._thread_id = threading.get_ident()
+        self._in_job.set()
+        try:
+            with self.phase(name):
+                yield
+        finally:
+            self._in_job.clear()
+            self.jobs_remaining -= 1
+            if self.jobs_remaining <= 0:
+                self.finish()
+
+    def in_job(self) -> bool:
+        return self._in_job.is_set() and threading.get_ident() == self._thread_id
+
+    def finish(self):
+        """
+        Stop sampling, write the results and uninstall the session.
+        """
+        global _session
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if _session is self:
+            _session = None
+        self._sampler.join()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.join(self.directory, f"profile-{datetime.datetime.now():%Y%m%d-%H%M%S}")
+        with open(prefix + ".folded", "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        with open(prefix + "-memory.txt", "w") as file:
+            for path, sites in self.allocations.items():
+                file.write(f"{path}: net {sum(sites.values()) / 1024:+.1f} KiB\n")
+                for site, size in sorted(sites.items(), key=lambda item: -abs(item[1]))[:self.top_allocations]:
+                    file.write(f"    {size / 1024:+10.1f} KiB  {site}\n")
+        self.outputs = [prefix + ".folded", prefix + "-memory.txt"]
+        logging.info(f"Profile written to {', '.join(self.outputs)} ({sum(self.stacks.values())} samples).")
+
+_session: Optional[ProfilingSession] = None
+
+def start_profiling(jobs: int, directory: str = "profiles", sample_interval: float = 0.005, top_allocations: int = 25) -> ProfilingSession:
+    """
+    Profile the next ``jobs`` scheduler jobs. Replaces any session in progress.
+    """
+    global _session
+    if _session is not None:
+        _session.finish()
+    _session = ProfilingSession(jobs, directory, sample_interval, top_allocations).start()
+    logging.info(f"Profiling the next {jobs} jobs.")
+    return _session
+
+def profile_job(name: str):
+    """
+    Context manager around one scheduler job; a no-op unless profiling is on.
+    """
+    session = _session
+    if session is None:
+        return _NO_PROFILE
+    return session.job(name)
+
+def phase(name: str):
+    """
+    Context manager marking a phase of a strategy; a no-op unless the current job is being profiled.
+    """
+    session = _session
+    if session is None or not session.in_job():
+        return _NO_PROFILE
+    return session.phase(name)
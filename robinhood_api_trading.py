@@ -5,15 +5,43 @@ from typing import Any, Dict, Optional
 import uuid
 import requests
 from cryptography.hazmat.primitives.asymmetric import ed25519
-from config.api_config import API_KEY, BASE64_PRIVATE_KEY
+from config.api_config import API_BASE_URL, API_KEY, BASE64_PRIVATE_KEY
+
+class APIRequestError(Exception):
+    """
+    A request that failed, raised by make_api_request(..., raise_errors=True).
+
+    :param status_code: HTTP status of the response, or None if no response was received.
+    :param retryable: Whether sending the same request again may succeed.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+class APITimeoutError(APIRequestError):
+    """
+    No response arrived in time. The request may still have been processed.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=True)
 
 class CryptoAPITrading:
-    def __init__(self):
-        self.api_key = API_KEY
-        private_bytes = base64.b64decode(BASE64_PRIVATE_KEY)
+    def __init__(self, pool_maxsize: int = 10, api_key: Optional[str] = None, base64_private_key: Optional[str] = None, base_url: Optional[str] = None, timeout: float = 10):
+        self.api_key = api_key or API_KEY
+        private_bytes = base64.b64decode(base64_private_key or BASE64_PRIVATE_KEY)
         # Note that the cryptography library used here only accepts a 32 byte ed25519 private key
         self.private_key = ed25519.Ed25519PrivateKey.from_private_bytes(private_bytes[:32])
-        self.base_url = "https://trading.robinhood.com"
+        self.base_url = base_url or API_BASE_URL
+        self.timeout = timeout
+
+        # Reuse TCP/TLS connections across requests instead of opening one per call
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
     @staticmethod
     def _get_current_timestamp() -> int:
@@ -30,7 +58,15 @@ class CryptoAPITrading:
 
         return "?" + "&".join(params)
 
-    def make_api_request(self, method: str, path: str, body: str = "") -> Any:
+    def make_api_request(self, method: str, path: str, body: str = "", raise_errors: bool = False) -> Any:
+        """
+        Send a signed request and return the decoded JSON response.
+
+        By default failures are printed and None is returned, and error
+        responses are returned like any other. With ``raise_errors`` a timeout
+        raises APITimeoutError and any other failure, including a 4xx/5xx
+        response, raises APIRequestError, so callers can tell them apart.
+        """
         timestamp = self._get_current_timestamp()
         headers = self.get_authorization_header(method, path, body, timestamp)
         url = self.base_url + path
@@ -38,11 +74,27 @@ class CryptoAPITrading:
         try:
             response = {}
             if method == "GET":
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
             elif method == "POST":
-                response = requests.post(url, headers=headers, json=json.loads(body), timeout=10)
+                response = self.session.post(url, headers=headers, json=json.loads(body) if body else None, timeout=self.timeout)
+            if raise_errors and response.status_code >= 400:
+                retryable = response.status_code == 429 or response.status_code >= 500
+                raise APIRequestError(f"{method} {path} returned {response.status_code}: {response.text}", response.status_code, retryable)
+            if raise_errors:
+                try:
+                    return response.json()
+                except ValueError as e:
+                    # The request was accepted but the answer is unreadable; keep its status so callers know
+                    raise APIRequestError(f"{method} {path} returned {response.status_code} with a body that is not JSON: {e}", response.status_code) from e
             return response.json()
+        except requests.Timeout as e:
+            if raise_errors:
+                raise APITimeoutError(f"{method} {path} timed out: {e}") from e
+            print(f"Error making API request: {e}")
+            return None
         except requests.RequestException as e:
+            if raise_errors:
+                raise APIRequestError(f"{method} {path} failed: {e}", retryable=isinstance(e, requests.ConnectionError)) from e
             print(f"Error making API request: {e}")
             return None
 
@@ -97,6 +149,7 @@ class CryptoAPITrading:
             order_type: str,
             symbol: str,
             order_config: Dict[str, str],
+            raise_errors: bool = False,
     ) -> Any:
         body = {
             "client_order_id": client_order_id,
@@ -106,7 +159,7 @@ class CryptoAPITrading:
             f"{order_type}_order_config": order_config,
         }
         path = "/api/v1/crypto/trading/orders/"
-        return self.make_api_request("POST", path, json.dumps(body))
+        return self.make_api_request("POST", path, json.dumps(body), raise_errors)
 
     def cancel_order(self, order_id: str) -> Any:
         path = f"/api/v1/crypto/trading/orders/{order_id}/cancel/"
@@ -0,0 +1,380 @@
+"""
+Multi-process execution mode for the scheduler.
+
+Indicator math in pandas holds the GIL, so a single process cannot keep up with
+hundreds of symbols. Here the parent process owns the market data: it writes
+candles for every symbol into one shared-memory segment. Symbols are
+partitioned across worker processes, which read their candles straight from
+that segment, compute and aggregate the indicator signals, and send the results
+back. Orders are only ever placed by the parent: by default each intent is
+sized by ``route_intent`` and submitted to the order gateway, with one trade
+data file per symbol.
+"""
+import datetime
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+import schedule
+import threading
+from lazy_imports import LazyModule
+from robinhood_api_trading import CryptoAPITrading
+import trade_journal
+from trade_journal import DecisionRecord, IndicatorRecord
+from trading_strategy import aggregate_signals, evaluate_indicators, execute_trade, fetch_historical_data, get_account_value, monitor_risk, signal_score
+
+ccxt = LazyModule("ccxt")
+
+# Sizing used by route_intent for every symbol, as BTC_execute_signal does for Bitcoin
+SHARDED_RISK = {
+    "risk_per_trade": 0.01,  # 1% risk
+    "stop_loss_percent": 0.02,  # 2% stop loss
+    "take_profit_percent": 0.05,  # 5% take profit
+    "confidence": 0.3,  # 30% confidence
+}
+
+# Column layout of a candle row in the shared segment, matching ccxt's fetch_ohlcv
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+class ShardIntent(NamedTuple):
+    symbol: str
+    signal: str
+    signals: Dict[str, str]
+    score: float = 0.0
+    values: Optional[Dict[str, float]] = None
+    last_bar: str = ""
+    close: float = 0.0
+
+class SharedCandleSegment:
+    """
+    Fixed-size OHLCV buffers for a set of symbols in one shared-memory block.
+
+    Layout: one int64 version counter and one int64 length per symbol, followed
+    by a (symbols x max_bars x 6) float64 candle array. Writers bump the version
+    to an odd number while a row is being updated and back to even afterwards,
+    so readers can detect and retry torn reads without taking a lock.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, symbols: List[str], max_bars: int, owner: bool):
+        self.shm = shm
+        self.symbols = list(symbols)
+        self.max_bars = max_bars
+        self.owner = owner
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        n = len(self.symbols)
+        self.versions = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.lengths = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=n * 8)
+        self.candles = np.ndarray((n, max_bars, len(CANDLE_COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=n * 16)
+
+    @staticmethod
+    def _size(n_symbols: int, max_bars: int) -> int:
+        return n_symbols * 16 + n_symbols * max_bars * len(CANDLE_COLUMNS) * 8
+
+    @classmethod
+    def create(cls, symbols: List[str], max_bars: int = 512) -> "SharedCandleSegment":
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(len(symbols), max_bars))
+        segment = cls(shm, symbols, max_bars, owner=True)
+        segment.versions[:] = 0
+        segment.lengths[:] = 0
+        return segment
+
+    @classmethod
+    def attach(cls, name: str, symbols: List[str], max_bars: int = 512) -> "SharedCandleSegment":
+        return cls(shared_memory.SharedMemory(name=name), symbols, max_bars, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, symbol: str, ohlcv: Any):
+        """
+        Store the most recent ``max_bars`` candles for a symbol.
+
+        :param ohlcv: Rows of [timestamp, open, high, low, close, volume], e.g. from ccxt's fetch_ohlcv.
+        """
+        rows = np.asarray(ohlcv, dtype=np.float64)[-self.max_bars:]
+        i = self._index[symbol]
+        self.versions[i] += 1
+        self.candles[i, :len(rows)] = rows
+        self.lengths[i] = len(rows)
+        self.versions[i] += 1
+
+    def read_array(self, symbol: str) -> np.ndarray:
+        i = self._index[symbol]
+        while True:
+            version = self.versions[i]
+            if version % 2:
+                time.sleep(0)  # A write is in progress
+                continue
+            rows = self.candles[i, :self.lengths[i]].copy()
+            if self.versions[i] == version:
+                return rows
+
+    def read(self, symbol: str) -> pd.DataFrame:
+        """
+        Read a symbol's candles in the same shape fetch_historical_data returns.
+        """
+        price_data = pd.DataFrame(self.read_array(symbol), columns=CANDLE_COLUMNS)
+        price_data['timestamp'] = pd.to_datetime(price_data['timestamp'], unit='ms')
+        return price_data.set_index('timestamp')
+
+    def close(self):
+        # Drop the numpy views first, SharedMemory refuses to close while they are exported
+        del self.versions, self.lengths, self.candles
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def partition_symbols(symbols: List[str], shards: int) -> List[List[str]]:
+    """
+    Split symbols round-robin into at most ``shards`` non-empty groups.
+    """
+    shards = max(1, min(shards, len(symbols)))
+    return [symbols[i::shards] for i in range(shards)]
+
+def _shard_worker(segment_name: str, symbols: List[str], max_bars: int, shard: List[str], indicators: Callable[[pd.DataFrame], Dict[str, str]], weights: Dict[str, float], ticks: Any, results: Any):
+    """
+    Worker process loop: on every tick, evaluate the shard's symbols from shared
+    memory and send back one batch of intents. Workers make no API calls; the
+    parent prices and sizes each intent when it routes it.
+    """
+    segment = SharedCandleSegment.attach(segment_name, symbols, max_bars)
+
+    try:
+        while True:
+            tick = ticks.get()
+            if tick is None:
+                break
+
+            intents = []
+            for symbol in shard:
+                try:
+                    prices_df = segment.read(symbol)
+                    if len(prices_df) < 2:
+                        continue
+                    signals, values = evaluate_indicators(indicators, prices_df)
+                    intents.append(ShardIntent(
+                        symbol,
+                        aggregate_signals(signals, weights),
+                        signals,
+                        signal_score(signals, weights),
+                        values,
+                        str(prices_df.index[-1]),
+                        float(prices_df['close'].iloc[-1]),
+                    ))
+                except Exception as e:
+                    logging.error(f"Error evaluating {symbol} in worker {os.getpid()}: {e}")
+            results.put((tick, intents))
+    finally:
+        segment.close()
+
+class ShardedRunner:
+    """
+    Owns the shared candle segment and the worker processes.
+
+    :param symbols: All symbols to evaluate (ccxt format, e.g. "BTC/USD").
+    :param indicators: Maps an OHLCV DataFrame to a dict of indicator signals. Must be picklable.
+    :param weights: Indicator weights passed to aggregate_signals.
+    :param workers: Number of worker processes, defaults to the CPU count.
+    :param max_bars: Candles kept per symbol.
+    """
+
+    def __init__(self, symbols: List[str], indicators: Callable[[pd.DataFrame], Dict[str, str]], weights: Dict[str, float], workers: Optional[int] = None, max_bars: int = 512):
+        self.symbols = list(symbols)
+        self.indicators = indicators
+        self.weights = weights
+        self.max_bars = max_bars
+        self.shards = partition_symbols(self.symbols, workers or os.cpu_count() or 1)
+        self.segment = SharedCandleSegment.create(self.symbols, max_bars)
+        self._results = multiprocessing.Queue()
+        self._ticks: List[Any] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._tick = 0
+
+    def start(self):
+        for shard in self.shards:
+            ticks = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_shard_worker,
+                args=(self.segment.name, self.symbols, self.max_bars, shard, self.indicators, self.weights, ticks, self._results),
+                daemon=True,
+            )
+            process.start()
+            self._ticks.append(ticks)
+            self._processes.append(process)
+        logging.info(f"Started {len(self._processes)} strategy shards for {len(self.symbols)} symbols.")
+
+    def load(self, symbol: str, ohlcv: Any):
+        self.segment.write(symbol, ohlcv)
+
+    def tick(self, timeout: Optional[float] = None) -> List[ShardIntent]:
+        """
+        Evaluate every symbol once and return the intents from all shards.
+        """
+        self._tick += 1
+        for ticks in self._ticks:
+            ticks.put(self._tick)
+
+        intents = []
+        pending = len(self._ticks)
+        while pending:
+            tick, shard_intents = self._results.get(timeout=timeout)
+            if tick != self._tick:
+                continue  # Late reply from a tick that already timed out
+            intents.extend(shard_intents)
+            pending -= 1
+        return intents
+
+    def stop(self, timeout: Optional[float] = 5):
+        for ticks in self._ticks:
+            ticks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.segment.close()
+
+def _fetch_ohlcv(symbol: str, timeframe: str, limit: int, exchange: Any = None) -> List[List[float]]:
+    start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).isoformat() + 'Z'
+    prices_df = fetch_historical_data(symbol=symbol, start_date=start_date, timeframe=timeframe, limit=limit, exchange=exchange)
+    timestamps = prices_df.index.astype('int64') // 10**6
+    return np.column_stack([timestamps, prices_df[CANDLE_COLUMNS[1:]].to_numpy()]).tolist()
+
+def _pair(symbol: str) -> str:
+    return symbol.replace('/', '-')  # ccxt "BTC/USD" -> API "BTC-USD"
+
+def trade_data_filename(symbol: str) -> str:
+    return f"{_pair(symbol)}_trade_data.json"
+
+def route_intent(api_trading_client: CryptoAPITrading, intent: ShardIntent, account_value: float):
+    """
+    Default on_signal: size the intent like BTC_execute_signal and submit it
+    through execute_trade, and so the order gateway, with the symbol's own trade data.
+    """
+    execute_trade(
+        api_trading_client,
+        intent.signal,
+        _pair(intent.symbol),
+        account_value,
+        strategy="sharded",
+        filename=trade_data_filename(intent.symbol),
+        **SHARDED_RISK,
+    )
+
+def check_symbol_risk(api_trading_client: CryptoAPITrading, symbol: str):
+    """
+    Default risk check: stop-loss/take-profit for the symbol's active trade, if any.
+    """
+    if os.path.exists(trade_data_filename(symbol)):
+        monitor_risk(api_trading_client, trade_data_filename(symbol), strategy="sharded")
+
+def sharded_job(runner: ShardedRunner, on_signal: Callable[[CryptoAPITrading, ShardIntent, float], None], api_trading_client: CryptoAPITrading, timeframe: str = '1d', fetch_threads: int = 8, risk_check: Optional[Callable[[CryptoAPITrading, str], None]] = check_symbol_risk):
+    """
+    One scheduler tick: check risk on open trades, refresh candles, fan out to
+    the shards, then journal and route the resulting intents from this process.
+    The account value is fetched once per tick and passed to every ``on_signal`` call.
+    """
+    try:
+        logging.info(f"trading {len(runner.symbols)} symbols across {len(runner.shards)} shards...")
+        if risk_check is not None:
+            for symbol in runner.symbols:
+                risk_check(api_trading_client, symbol)
+
+        exchange = ccxt.coinbase()  # One exchange (and connection pool) for the whole fetch pass
+        with ThreadPoolExecutor(max_workers=fetch_threads) as executor:
+            candles = executor.map(lambda symbol: (symbol, _fetch_ohlcv(symbol, timeframe, runner.max_bars, exchange)), runner.symbols)
+            for symbol, ohlcv in candles:
+                runner.load(symbol, ohlcv)
+
+        intents = []
+        for intent in runner.tick(timeout=60):
+            trade_journal.record(IndicatorRecord("sharded", intent.symbol, intent.last_bar, intent.close, intent.signals, intent.values or {}))
+            trade_journal.record(DecisionRecord("sharded", intent.score, intent.signal, intent.symbol))
+            if intent.signal != 'hold':
+                intents.append(intent)
+        if not intents:
+            return
+        account_value = get_account_value(api_trading_client)
+        for intent in intents:
+            try:
+                on_signal(api_trading_client, intent, account_value)
+            except Exception as e:
+                logging.error(f"Error routing {intent.signal} for {intent.symbol}: {e}")
+
+    except Exception as e:
+        logging.error(f"Error executing sharded job: {e}")
+
+def run_sharded_scheduler(symbols: List[str], indicators: Callable[[pd.DataFrame], Dict[str, str]], weights: Dict[str, float], on_signal: Callable[[CryptoAPITrading, ShardIntent, float], None] = route_intent, interval_seconds: int = 10, workers: Optional[int] = None, timeframe: str = '1d', stopped: Optional[threading.Event] = None):
+    """
+    Like run_scheduler, but evaluates ``symbols`` across worker processes.
+
+    :param on_signal: Called in the parent process with the API client, each
+        non-hold intent and the account value of the tick. Defaults to route_intent.
+    :param interval_seconds: How often all symbols are evaluated.
+    :param workers: Number of worker processes, defaults to the CPU count.
+    :param stopped: Runs until this is set, then stops the workers and frees
+        the shared-memory segment. Runs forever if None.
+    """
+    stopped = stopped or threading.Event()
+    api_trading_client = CryptoAPITrading()  # Order gateway connection
+    runner = ShardedRunner(symbols, indicators, weights, workers)
+    runner.start()
+
+    scheduler = schedule.Scheduler()  # Own job list, so stopping leaves the global schedule alone
+    scheduler.every(interval_seconds).seconds.do(sharded_job, runner, on_signal, api_trading_client, timeframe)
+    print(f"Sharded scheduler started for {len(symbols)} symbols on {len(runner.shards)} workers, will run every {interval_seconds} seconds.")
+
+    try:
+        while not stopped.is_set():
+            scheduler.run_pending()
+            stopped.wait(1)  # Sleep to avoid high CPU usage
+    finally:
+        runner.stop()
+
+class ShardedScheduler:
+    """
+    Handle on a sharded scheduler running in a background thread.
+    """
+
+    def __init__(self, thread: threading.Thread, stopped: threading.Event):
+        self.thread = thread
+        self._stopped = stopped
+
+    def stop(self, timeout: Optional[float] = 120):
+        """
+        Stop after the current tick, then wait for the workers to exit and the segment to be freed.
+        """
+        self._stopped.set()
+        self.thread.join(timeout)
+
+def start_sharded_scheduler(symbols: List[str], indicators: Callable[[pd.DataFrame], Dict[str, str]], weights: Dict[str, float], interval_seconds: int, workers: Optional[int] = None, timeframe: str = '1d') -> ShardedScheduler:
+    """
+    Runs the sharded scheduler in a separate thread.
+
+    :return: Handle whose ``stop`` must be called to shut the workers down.
+    """
+    logging.info("Starting sharded scheduler...")
+    stopped = threading.Event()
+    scheduler_thread = threading.Thread(target=run_sharded_scheduler, args=(symbols, indicators, weights, route_intent, interval_seconds, workers, timeframe, stopped), daemon=True)
+    scheduler_thread.start()
+    return ShardedScheduler(scheduler_thread, stopped)
+
+def wait_for_quit():
+    """
+    Block until the user types 'q' or interrupts.
+    """
+    try:
+        while True:
+            command = input("Type 'q' to quit the sharded scheduler:\n").strip().lower()
+            if command == 'q':
+                print("\nStopping sharded scheduler...")
+                logging.info("Sharded scheduler stopped.")
+                break
+    except KeyboardInterrupt:
+        print("Sharded scheduler stopped by user.")
@@ -0,0 +1,217 @@
+"""
+Warm-start snapshots of the scheduler's runtime state.
+
+A snapshot is a single binary file:
+
+    8 bytes   magic "ATSNAP01"
+    4 bytes   little-endian length of the JSON header
+    header    compact JSON: {"created": ..., "meta": {...}, "arrays": {name: {"dtype", "shape", "offset"}}}
+    arrays    raw array data, each starting on a 64 byte boundary
+
+Arrays are read back as zero-copy views on a read-only memory map, so loading a
+snapshot costs little more than parsing the header; providers copy whatever
+they keep and later modify. State is collected from and
+restored into the running process by named providers; candle buffers,
+indicator signals and open positions are registered by default, and other
+components (e.g. an order gateway) can register their own.
+"""
+from __future__ import annotations
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+from lazy_imports import LazyModule
+
+np = LazyModule("numpy")
+
+SNAPSHOT_MAGIC = b"ATSNAP01"
+_ALIGNMENT = 64
+
+# name -> (collect, restore). collect() returns (arrays, meta); restore(arrays, meta) applies them.
+SnapshotProvider = Tuple[Callable[[], Tuple[Dict[str, "np.ndarray"], Dict[str, Any]]], Callable[[Dict[str, "np.ndarray"], Dict[str, Any]], None]]
+_providers: Dict[str, SnapshotProvider] = {}
+
+def register_snapshot_provider(name: str, collect: Callable[[], Tuple[Dict[str, np.ndarray], Dict[str, Any]]], restore: Callable[[Dict[str, np.ndarray], Dict[str, Any]], None]):
+    """
+    Register a piece of runtime state to include in snapshots.
+
+    :param name: Unique section name; array names are prefixed with it.
+    :param collect: Returns (arrays, meta). Meta must be JSON serialisable.
+    :param restore: Receives the arrays and meta written by ``collect``.
+    """
+    _providers[name] = (collect, restore)
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGNMENT
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """
+    Write arrays and metadata to ``path`` atomically.
+    """
+    layout = {}
+    offset = 0
+    contiguous = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        offset += _padding(offset)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        contiguous[name] = array
+        offset += array.nbytes
+
+    header = json.dumps({"created": time.time(), "meta": meta, "arrays": layout}, separators=(",", ":")).encode("utf-8")
+    preamble = SNAPSHOT_MAGIC + struct.pack("<I", len(header)) + header
+    preamble += b"\0" * _padding(len(preamble))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(preamble)
+        written = 0
+        for name, array in contiguous.items():
+            file.write(b"\0" * (layout[name]["offset"] - written))
+            file.write(array.tobytes())
+            written = layout[name]["offset"] + array.nbytes
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)  # Readers never see a half-written snapshot
+
+def read_snapshot(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Memory-map a snapshot and return (arrays, meta). Arrays are read-only views.
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a snapshot file")
+    (header_length,) = struct.unpack_from("<I", mapped, len(SNAPSHOT_MAGIC))
+    header_start = len(SNAPSHOT_MAGIC) + 4
+    header = json.loads(mapped[header_start:header_start + header_length])
+    data_start = header_start + header_length
+    data_start += _padding(data_start)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + spec["offset"]).reshape(spec["shape"])
+    return arrays, header["meta"]
+
+def take_snapshot(path: str):
+    """
+    Collect the state of every registered provider and write it to ``path``.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    meta: Dict[str, Any] = {}
+    for name, (collect, _) in _providers.items():
+        try:
+            provider_arrays, provider_meta = collect()
+        except Exception as e:
+            logging.error(f"Error collecting snapshot state for {name}: {e}")
+            continue
+        arrays.update({f"{name}/{key}": value for key, value in provider_arrays.items()})
+        meta[name] = provider_meta
+    write_snapshot(path, arrays, meta)
+
+def restore_snapshot(path: str) -> bool:
+    """
+    Restore registered providers from ``path``.
+
+    :return: True if a snapshot was found and loaded.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        arrays, meta = read_snapshot(path)
+    except Exception as e:
+        logging.error(f"Error reading snapshot {path}: {e}")
+        return False
+
+    for name, (_, restore) in _providers.items():
+        if name not in meta:
+            continue
+        prefix = f"{name}/"
+        provider_arrays = {key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)}
+        try:
+            restore(provider_arrays, meta[name])
+        except Exception as e:
+            logging.error(f"Error restoring snapshot state for {name}: {e}")
+    return True
+
+class Snapshotter:
+    """
+    Writes a snapshot at most once every ``interval_seconds``. Call
+    ``maybe_snapshot`` after state changes, e.g. at the end of every job.
+    """
+
+    def __init__(self, path: str, interval_seconds: float = 60):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_snapshot(self, force: bool = False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last < self.interval_seconds:
+                return
+            self._last = now
+            try:
+                take_snapshot(self.path)
+            except Exception as e:
+                logging.error(f"Error writing snapshot {self.path}: {e}")
+
+def _collect_candles() -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    from trading_strategy import CANDLE_CACHE
+    arrays, keys = {}, []
+    for i, ((symbol, timeframe), (since, prices_df)) in enumerate(list(CANDLE_CACHE.items())):
+        timestamps = prices_df.index.asi8 // 10**6
+        arrays[str(i)] = np.column_stack([timestamps, prices_df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)])
+        keys.append([symbol, timeframe, since])
+    return arrays, {"keys": keys}
+
+def _restore_candles(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    import pandas as pd
+    from trading_strategy import CANDLE_CACHE
+    for i, (symbol, timeframe, since) in enumerate(meta["keys"]):
+        rows = arrays[str(i)]
+        # Copy out of the read-only memory map, the cache is updated in place by later fetches
+        price_data = pd.DataFrame(rows[:, 1:], columns=['open', 'high', 'low', 'close', 'volume'], index=pd.to_datetime(rows[:, 0].astype(np.int64), unit='ms'), copy=True)
+        price_data.index.name = 'timestamp'
+        CANDLE_CACHE[(symbol, timeframe)] = (since, price_data)
+
+def _collect_signals() -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    from trading_strategy import SIGNAL_CACHE
+    return {}, {name: [list(marker), signals, values] for name, (marker, signals, values) in SIGNAL_CACHE.items()}
+
+def _restore_signals(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    from trading_strategy import SIGNAL_CACHE
+    for name, (marker, signals, *values) in meta.items():
+        # Snapshots taken before indicator levels were cached only hold the signals
+        SIGNAL_CACHE[name] = (tuple(marker), signals, values[0] if values else {})
+
+def _collect_positions() -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    from trading_strategy import load_trade_data
+    # One trade data file per traded symbol, e.g. BTC_trade_data.json or ETH-USD_trade_data.json from the sharded runtime
+    trade_files = {filename: load_trade_data(filename) for filename in sorted(glob.glob("*_trade_data.json"))}
+    return {}, {"trade_files": {filename: trade_data for filename, trade_data in trade_files.items() if trade_data}}
+
+def _restore_positions(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    # Trade data files are written synchronously and are always at least as new
+    # as the snapshot, so they are only recreated when they have gone missing.
+    trade_files = meta.get("trade_files", {})
+    if meta.get("trade_data"):
+        trade_files = {"BTC_trade_data.json": meta["trade_data"]}  # Snapshots from before per-symbol files were covered
+    for filename, trade_data in trade_files.items():
+        if not os.path.exists(filename):
+            with open(filename, "w") as file:
+                json.dump(trade_data, file)
+            logging.info(f"Restored {filename} from snapshot.")
+
+register_snapshot_provider("candles", _collect_candles, _restore_candles)
+register_snapshot_provider("signals", _collect_signals, _restore_signals)
+register_snapshot_provider("positions", _collect_positions, _restore_positions)
@@ -0,0 +1,23 @@
+import unittest
+import pandas as pd
+from backtest import run_backtest
+
+def follow_last_move(prices_df):
+    closes = prices_df['close']
+    return {'MOVE': 'buy' if closes.iloc[-1] > closes.iloc[-2] else 'sell'}
+
+class TestBacktest(unittest.TestCase):
+    def test_long_only_round_trip(self):
+        closes = [10, 11, 12, 11, 10]
+        prices_df = pd.DataFrame({'close': closes}, index=pd.date_range("2024-01-01", periods=len(closes), freq="D"))
+
+        result = run_backtest(prices_df, indicators=follow_last_move, weights={'MOVE': 1.0}, warmup=1)
+
+        # Bought at 11, sold at 11 when the price turned down
+        self.assertEqual(result['trade_returns'], [0.0])
+        self.assertEqual(result['trades'], 1)
+        self.assertAlmostEqual(result['equity_curve'].iloc[2], 12 / 11)
+        self.assertAlmostEqual(result['max_drawdown'], 11 / 12 - 1)
+
+if __name__ == "__main__":
+    unittest.main()
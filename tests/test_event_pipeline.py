@@ -0,0 +1,122 @@
+import queue
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+from event_pipeline import STOP, BarFeed, EventPipeline, MarketDataFeed, MarketEvent, Stage, Subscription
+from trade_journal import DecisionRecord, IndicatorRecord
+from trading_strategy import BTC_WEIGHTS, BTC_indicator_signals
+
+def make_bars(closes):
+    index = pd.date_range("2024-01-01", periods=len(closes), freq="D")
+    return pd.DataFrame({'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': [1.0] * len(closes)}, index=index)
+
+class TestEventPipeline(unittest.TestCase):
+    def make_pipeline(self, signal='buy'):
+        self.indicators = MagicMock(return_value={'MACD': signal})
+        self.on_signal = MagicMock()
+        self.client = MagicMock()
+        pipeline = EventPipeline(self.client)
+        pipeline.subscribe(Subscription(
+            name="test",
+            symbol="BTC/USD",
+            timeframe='1d',
+            indicators=self.indicators,
+            weights={'MACD': 1.0},
+            on_signal=self.on_signal,
+        ))
+        return pipeline
+
+    def test_new_bar_routes_signal(self):
+        pipeline = self.make_pipeline('buy')
+        pipeline.start()
+        pipeline.publish(MarketEvent("bar", "BTC/USD", make_bars([1, 2, 3]), '1d'))
+        pipeline.stop(timeout=5)
+
+        self.indicators.assert_called_once()
+        self.on_signal.assert_called_once_with(self.client, 'buy')
+
+    @patch('event_pipeline.trade_journal.record')
+    def test_indicator_levels_are_journaled(self, mock_record):
+        pipeline = EventPipeline(MagicMock())
+        pipeline.subscribe(Subscription("BTC", "BTC/USD", BTC_indicator_signals, BTC_WEIGHTS, MagicMock(), timeframe='1d'))
+        pipeline.start()
+        pipeline.publish(MarketEvent("bar", "BTC/USD", make_bars(list(np.linspace(100, 160, 60))), '1d'))
+        pipeline.stop(timeout=5)
+
+        indicator_record, decision_record = [call[0][0] for call in mock_record.call_args_list]
+        self.assertIsInstance(indicator_record, IndicatorRecord)
+        self.assertEqual((indicator_record.symbol, indicator_record.close), ("BTC/USD", 160.0))
+        self.assertEqual(set(indicator_record.values), {'MACD', 'MACD_signal', 'MVCD', 'MVCD_signal', 'VWAP', 'TEMA'})
+        self.assertIsInstance(decision_record, DecisionRecord)
+        self.assertEqual(decision_record.symbol, "BTC/USD")
+
+    def test_repeated_bar_is_dropped(self):
+        pipeline = self.make_pipeline('buy')
+        pipeline.start()
+        bars = make_bars([1, 2, 3])
+        pipeline.publish(MarketEvent("bar", "BTC/USD", bars, '1d'))
+        pipeline.publish(MarketEvent("bar", "BTC/USD", bars, '1d'))
+        pipeline.publish(MarketEvent("bar", "BTC/USD", make_bars([1, 2, 3, 4]), '1d'))
+        pipeline.stop(timeout=5)
+
+        self.assertLessEqual(self.indicators.call_count, 2)
+        self.assertEqual(self.indicators.call_args[0][0]['close'].iloc[-1], 4)
+
+    def test_unsubscribed_stream_and_hold_are_not_routed(self):
+        pipeline = self.make_pipeline('hold')
+        pipeline.start()
+        pipeline.publish(MarketEvent("bar", "ETH/USD", make_bars([1, 2]), '1d'))
+        pipeline.publish(MarketEvent("bar", "BTC/USD", make_bars([1, 2]), '1d'))
+        pipeline.stop(timeout=5)
+
+        self.indicators.assert_called_once()
+        self.on_signal.assert_not_called()
+
+    def test_quote_subscription_runs_risk_check(self):
+        pipeline = self.make_pipeline('hold')
+        risk_check = MagicMock()
+        pipeline.subscribe(Subscription(name="risk", symbol="BTC-USD", kind="quote", indicators=None, weights={}, on_signal=None, risk_check=risk_check))
+        pipeline.start()
+        pipeline.publish(MarketEvent("quote", "BTC-USD", ("100", "101")))
+        pipeline.publish(MarketEvent("quote", "BTC-USD", ("102", "103")))
+        pipeline.stop(timeout=5)
+
+        self.assertGreaterEqual(risk_check.call_count, 1)
+        risk_check.assert_called_with(self.client)
+        self.on_signal.assert_not_called()
+
+    @patch('event_pipeline.fetch_historical_data')
+    def test_bar_feed_drops_forming_bar(self, mock_fetch):
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+        opened = now.floor('D')  # Today's daily bar is still open
+        mock_fetch.return_value = pd.DataFrame({'close': [1.0, 2.0, 3.0]}, index=pd.date_range(end=opened, periods=3, freq='D'))
+
+        event = BarFeed(MagicMock(), "BTC/USD", '1d').fetch()
+
+        self.assertEqual(list(event.data['close']), [1.0, 2.0])
+        self.assertEqual(event.data.index[-1], opened - pd.Timedelta(days=1))
+
+    def test_market_data_feed_is_abstract(self):
+        with self.assertRaises(TypeError):
+            MarketDataFeed(self.make_pipeline(), 10)
+
+    def test_stage_applies_backpressure(self):
+        stage = Stage("bounded", lambda events: events, maxsize=1)
+        stage.put("first")
+        with self.assertRaises(queue.Full):
+            stage.put("second", timeout=0.01)
+
+    def test_stage_batches_events(self):
+        batches = []
+        stage = Stage("batched", lambda events: batches.append(list(events)), maxsize=10, batch_size=4)
+        for i in range(6):
+            stage.put(i)
+        stage.start()
+        stage.put(STOP)
+        stage.join(5)
+
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, 5]])
+
+if __name__ == "__main__":
+    unittest.main()
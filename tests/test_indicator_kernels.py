@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+import pandas as pd
+import indicator_kernels
+from trading_strategy import calculate_macd, calculate_mvcd, calculate_tema, calculate_vwap
+
+def random_prices(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, shape), axis=-1))
+
+def pandas_crossover(line, reference):
+    if line.iloc[-1] > reference.iloc[-1] and line.iloc[-2] <= reference.iloc[-2]:
+        return 'buy'
+    if line.iloc[-1] < reference.iloc[-1] and line.iloc[-2] >= reference.iloc[-2]:
+        return 'sell'
+    return 'hold'
+
+class KernelsMatchPandas:
+    numba = None
+
+    def setUp(self):
+        indicator_kernels.use_numba(self.numba)
+
+    def tearDown(self):
+        indicator_kernels.use_numba(True)
+
+    def assert_rows_match(self, got, rows, expected):
+        for row, values in zip(got, rows):
+            np.testing.assert_allclose(row, expected(pd.Series(values)), rtol=1e-9, atol=1e-12, equal_nan=True)
+
+    def test_ema_and_ewm_std(self):
+        prices = random_prices((3, 300))
+        prices[1, :5] = np.nan  # Leading gap, like an EW std fed back into ewm
+        prices[2, 100] = np.nan  # Interior gap
+        for span in (2, 10, 30):
+            self.assert_rows_match(indicator_kernels.ema(prices, span), prices, lambda s: s.ewm(span=span, adjust=False).mean())
+            self.assert_rows_match(indicator_kernels.ewm_std(prices, span), prices, lambda s: s.ewm(span=span, adjust=False).std())
+
+    def test_tema(self):
+        prices = random_prices((2, 300))
+
+        def pandas_tema(s):
+            ema1 = s.ewm(span=20, adjust=False).mean()
+            ema2 = ema1.ewm(span=20, adjust=False).mean()
+            return 3 * (ema1 - ema2) + ema2.ewm(span=20, adjust=False).mean()
+
+        self.assert_rows_match(indicator_kernels.tema(prices, 20), prices, pandas_tema)
+
+    def test_rolling_vwap(self):
+        close = random_prices((2, 100))
+        volume = np.random.default_rng(1).uniform(1, 10, close.shape)
+        vwap = indicator_kernels.rolling_vwap(close * 1.01, close * 0.99, close, volume, 20)
+        for i in range(2):
+            typical_price = pd.Series((close[i] * 1.01 + close[i] * 0.99 + close[i]) / 3)
+            expected = (typical_price * volume[i]).rolling(20).sum() / pd.Series(volume[i]).rolling(20).sum()
+            np.testing.assert_allclose(vwap[i], expected, rtol=1e-9, equal_nan=True)
+
+    def test_one_dimensional_input(self):
+        prices = random_prices(50)
+        self.assertEqual(indicator_kernels.ema(prices, 10).shape, (50,))
+        self.assertEqual(indicator_kernels.crossover_signals(prices, prices).tolist(), ['hold'])
+
+class TestNumPyKernels(KernelsMatchPandas, unittest.TestCase):
+    numba = False
+
+@unittest.skipUnless(indicator_kernels.numba_available(), "numba is not installed")
+class TestNumbaKernels(KernelsMatchPandas, unittest.TestCase):
+    numba = True
+
+class TestIndicatorSignals(unittest.TestCase):
+    def test_signals_match_pandas_implementation(self):
+        for seed in range(20):
+            close = pd.Series(random_prices(120, seed))
+            prices = pd.DataFrame({'high': close * 1.01, 'low': close * 0.99, 'close': close, 'volume': 1000.0 + close})
+
+            macd_line = close.ewm(span=20, adjust=False).mean() - close.ewm(span=30, adjust=False).mean()
+            self.assertEqual(calculate_macd(close), pandas_crossover(macd_line, macd_line.ewm(span=9, adjust=False).mean()))
+
+            mvcd_line = close.ewm(span=20, adjust=False).std() - close.ewm(span=30, adjust=False).std()
+            self.assertEqual(calculate_mvcd(close), pandas_crossover(mvcd_line, mvcd_line.ewm(span=9, adjust=False).std()))
+
+            typical_price = (prices['high'] + prices['low'] + prices['close']) / 3
+            vwap = (typical_price * prices['volume']).rolling(20).sum() / prices['volume'].rolling(20).sum()
+            self.assertEqual(calculate_vwap(prices), pandas_crossover(close, vwap))
+
+            ema1 = close.ewm(span=20, adjust=False).mean()
+            ema2 = ema1.ewm(span=20, adjust=False).mean()
+            tema = 3 * (ema1 - ema2) + ema2.ewm(span=20, adjust=False).mean()
+            self.assertEqual(calculate_tema(close), pandas_crossover(close, tema))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from main import _fetch, build_parser, main
+
+# Import-time budget for the modules every process loads (API client, scheduler, CLI)
+IMPORT_TIME_BUDGET_SECONDS = 0.5
+
+class TestMain(unittest.TestCase):
+    def test_subcommands(self):
+        parser = build_parser()
+        self.assertEqual(parser.parse_args(["run", "--runtime", "events"]).runtime, "events")
+        self.assertEqual(parser.parse_args(["fetch", "--days", "30"]).days, 30)
+        self.assertEqual(parser.parse_args(["backtest"]).symbol, "BTC/USD")
+
+    @patch('trading_strategy.fetch_historical_data')
+    def test_fetch_limit_covers_days(self, mock_fetch):
+        parser = build_parser()
+
+        _fetch(parser.parse_args(["walkforward", "--days", "1095"]))
+        self.assertEqual(mock_fetch.call_args.kwargs['limit'], 1095)
+        _fetch(parser.parse_args(["fetch", "--days", "2", "--timeframe", "1h"]))
+        self.assertEqual(mock_fetch.call_args.kwargs['limit'], 48)
+        _fetch(parser.parse_args(["fetch", "--limit", "10"]))
+        self.assertEqual(mock_fetch.call_args.kwargs['limit'], 10)
+
+    @patch('main.run')
+    def test_no_subcommand_runs_scheduler(self, mock_run):
+        main([])
+        mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args[0][0].runtime, "scheduler")
+
+    def test_journal_reports_missing_directory(self):
+        with tempfile.TemporaryDirectory() as directory, redirect_stdout(io.StringIO()) as output:
+            main(["journal", "--path", f"{directory}/missing"])
+        self.assertIn("No trade journal found", output.getvalue())
+
+    def test_startup_does_not_import_heavy_dependencies(self):
+        code = (
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import main, robinhood_api_trading, trading_scheduler, trading_strategy\n"
+            "print(time.perf_counter() - start)\n"
+            "print(','.join(m for m in ('ccxt', 'pandas', 'numpy') if m in sys.modules))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.splitlines()
+
+        self.assertEqual(output[1], "")
+        self.assertLess(float(output[0]), IMPORT_TIME_BUDGET_SECONDS)
+
+if __name__ == "__main__":
+    unittest.main()
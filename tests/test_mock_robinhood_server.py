@@ -0,0 +1,85 @@
+import unittest
+import uuid
+from mock_robinhood_server import MockRobinhoodServer, run_load_test
+
+class TestMockRobinhoodServer(unittest.TestCase):
+    def start_server(self, **kwargs):
+        server = MockRobinhoodServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_signed_requests_end_to_end(self):
+        server = self.start_server(buying_power=10000.0, prices={"BTC-USD": 50000.0}, spread=0.0)
+        client = server.client()
+
+        self.assertEqual(client.get_account()['buying_power'], "10000.00")
+        self.assertEqual(client.get_best_bid_ask("BTC-USD")['results'][0]['bid_inclusive_of_sell_spread'], "50000.0")
+
+        order = client.place_order(str(uuid.uuid4()), 'bid', 'market', 'BTC-USD', {"amount": "0.1"})
+        self.assertEqual(order['state'], "filled")
+        self.assertEqual(client.get_holdings("BTC")['results'][0]['total_quantity'], "0.1")
+        self.assertEqual(client.get_account()['buying_power'], "5000.00")
+        self.assertEqual(client.get_order(order['id'])['id'], order['id'])
+
+    def test_orders_are_idempotent_on_client_order_id(self):
+        server = self.start_server()
+        client = server.client()
+        client_order_id = str(uuid.uuid4())
+
+        first = client.place_order(client_order_id, 'bid', 'market', 'BTC-USD', {"amount": "0.01"})
+        second = client.place_order(client_order_id, 'bid', 'market', 'BTC-USD', {"amount": "0.01"})
+
+        self.assertEqual(first['id'], second['id'])
+        self.assertEqual(len(client.get_orders()['results']), 1)
+
+    def test_cancel_open_order(self):
+        server = self.start_server(fill_delay=60)
+        client = server.client()
+        order = client.place_order(str(uuid.uuid4()), 'bid', 'market', 'BTC-USD', {"amount": "0.01"})
+
+        client.cancel_order(order['id'])
+
+        self.assertEqual(client.get_order(order['id'])['state'], "canceled")
+
+    def test_rejects_bad_signature(self):
+        server = self.start_server()
+        other = MockRobinhoodServer()
+        self.addCleanup(other._httpd.server_close)
+        client = server.client()
+        client.private_key = other.private_key  # Signs with a key the server does not know
+
+        self.assertIn("errors", client.get_account())
+        self.assertEqual(server.stats.get("401"), 1)
+
+    def test_rate_limit_and_errors(self):
+        server = self.start_server(rate_limit=2)
+        client = server.client()
+        responses = [client.get_account() for _ in range(5)]
+        self.assertTrue(any("errors" in response for response in responses))
+        self.assertGreaterEqual(server.stats.get("429", 0), 1)
+
+        failing = self.start_server(error_rate=1.0)
+        self.assertIn("errors", failing.client().get_account())
+        self.assertEqual(failing.stats.get("500"), 1)
+
+    def test_load_test(self):
+        server = self.start_server(max_concurrency=4)
+        client = server.client(pool_maxsize=4)
+
+        result = run_load_test(client.get_account, requests=50, concurrency=4)
+
+        self.assertEqual(result['failed'], 0)
+        self.assertEqual(server.stats['requests'], 50)
+        self.assertGreater(result['requests_per_second'], 0)
+
+    def test_load_test_counts_error_responses(self):
+        server = self.start_server(error_rate=1.0)
+        client = server.client()
+
+        result = run_load_test(client.get_account, requests=10, concurrency=2)
+
+        self.assertEqual(result['failed'], 10)
+        self.assertEqual(server.stats.get("500"), 10)
+
+if __name__ == "__main__":
+    unittest.main()
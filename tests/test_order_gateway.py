@@ -0,0 +1,164 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from mock_robinhood_server import MockRobinhoodServer
+from order_gateway import GatewayOrder, OrderGateway, OrderIntent, load_gateway_state, net_intents, place_order_with_retries
+from robinhood_api_trading import APIRequestError, APITimeoutError
+from trading_strategy import load_trade_data
+
+class TestOrderGateway(unittest.TestCase):
+    def start_server(self, **kwargs):
+        server = MockRobinhoodServer(prices={"BTC-USD": 50000.0, "ETH-USD": 2500.0}, **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def start_gateway(self, client, **kwargs):
+        gateway = OrderGateway(client, backoff=0, **kwargs).start()
+        self.addCleanup(gateway.stop)
+        return gateway
+
+    def test_net_intents(self):
+        a = OrderIntent("a", "BTC-USD", "buy", 1.0)
+        b = OrderIntent("b", "BTC-USD", "sell", 0.4)
+        c = OrderIntent("c", "ETH-USD", "sell", 0.5)
+        d = OrderIntent("d", "ETH-USD", "buy", 0.5)
+
+        (btc_order, carried, crossed), (eth_order, _, eth_crossed) = net_intents([a, b, c, d])
+
+        self.assertEqual((btc_order.side, btc_order.quantity, btc_order.order_config), ("bid", 0.6, {"amount": "0.6"}))
+        self.assertEqual((carried, crossed), ([a], [b]))
+        self.assertIsNone(eth_order)
+        self.assertEqual(eth_crossed, [c, d])
+        # The combined order id only depends on the intents, so a re-send is idempotent
+        self.assertEqual(net_intents([b, a])[0][0].client_order_id, btc_order.client_order_id)
+        self.assertEqual(net_intents([a])[0][0].client_order_id, a.client_order_id)
+
+    def test_opposing_intents_share_one_order(self):
+        server = self.start_server()
+        gateway = self.start_gateway(server.client(), batch_window=0.5)
+
+        buy = gateway.submit(OrderIntent("trend", "BTC-USD", "buy", 0.3))
+        sell = gateway.submit(OrderIntent("reversion", "BTC-USD", "sell", 0.1))
+
+        self.assertEqual(buy.result(5).status, "placed")
+        self.assertEqual(sell.result(5).status, "netted")
+        self.assertEqual(sell.result().order_id, buy.result().order_id)
+        self.assertEqual(server.state.holdings["BTC"], 0.2)
+        self.assertEqual(server.stats.get("201"), 1)
+        self.assertAlmostEqual(gateway.book.position("trend", "BTC-USD"), 0.3)
+        self.assertAlmostEqual(gateway.book.position("reversion", "BTC-USD"), -0.1)
+        self.assertEqual(gateway.book.pending(), [])
+
+    def test_timed_out_order_is_retried_idempotently(self):
+        server = self.start_server(latency=0.3)
+        client = server.client()
+        client.timeout = 0.1
+        order = GatewayOrder("timeout-test", "BTC-USD", "bid", 0.1, ["timeout-test"])
+
+        result = place_order_with_retries(client, order, max_retries=2, backoff=0)
+
+        self.assertEqual(result.status, "unknown")
+        server.latency = None
+        recovered = place_order_with_retries(client, order, backoff=0)
+        self.assertEqual(recovered.status, "placed")
+        self.assertEqual(len(server.state.orders), 1)
+        self.assertEqual(server.state.holdings["BTC"], 0.1)
+
+    def test_unknown_order_is_resent_until_settled(self):
+        server = self.start_server(latency=0.3)
+        client = server.client()
+        client.timeout = 0.1
+        gateway = self.start_gateway(client, batch_window=0, max_retries=0, retry_interval=0.2)
+
+        future = gateway.submit(OrderIntent("trend", "BTC-USD", "buy", 0.1))
+
+        with self.assertRaises(TimeoutError):
+            future.result(0.5)
+        self.assertEqual(len(gateway.book.pending("trend", "BTC-USD")), 1)
+        server.latency = None
+        self.assertEqual(future.result(5).status, "placed")
+        self.assertEqual(gateway.book.pending(), [])
+        self.assertEqual(gateway.book.in_flight_orders(), [])
+        self.assertEqual(len(server.state.orders), 1)
+        self.assertAlmostEqual(gateway.book.position("trend", "BTC-USD"), 0.1)
+
+    def test_rejection_after_a_timeout_is_unknown(self):
+        client = MagicMock()
+        # The first attempt may have filled; the retry is then refused as a duplicate
+        client.place_order.side_effect = [APITimeoutError("timed out"), APIRequestError("duplicate client_order_id", 400)]
+        order = GatewayOrder("duplicate-test", "BTC-USD", "bid", 0.1, ["duplicate-test"])
+
+        result = place_order_with_retries(client, order, backoff=0)
+
+        self.assertEqual(result.status, "unknown")
+        self.assertEqual(client.place_order.call_count, 2)
+
+    def test_unreadable_success_response_is_unknown(self):
+        order = GatewayOrder("unreadable-test", "BTC-USD", "bid", 0.1, ["unreadable-test"])
+        client = MagicMock()
+        client.place_order.return_value = ["not", "an", "order"]
+        self.assertEqual(place_order_with_retries(client, order, backoff=0).status, "unknown")
+
+        api_client = self.start_server().client()
+        with patch.object(api_client.session, 'post') as post:
+            post.return_value.status_code = 201
+            post.return_value.json.side_effect = ValueError("Expecting value")
+            self.assertEqual(place_order_with_retries(api_client, order, backoff=0).status, "unknown")
+
+    def test_rejected_order_fails_without_retrying(self):
+        server = self.start_server()
+        gateway = self.start_gateway(server.client(), batch_window=0)
+
+        result = gateway.submit(OrderIntent("trend", "BTC-USD", "sell", 1.0)).result(5)
+
+        self.assertEqual(result.status, "failed")
+        self.assertEqual(server.stats.get("requests"), 1)
+        self.assertEqual(gateway.book.position("trend", "BTC-USD"), 0.0)
+
+    def test_raise_errors_distinguishes_failures(self):
+        server = self.start_server()
+        client = server.client()
+
+        self.assertIn("errors", client.get_estimated_price("XYZ-USD", "bid", "1"))
+        with self.assertRaises(APIRequestError) as raised:
+            client.make_api_request("GET", "/api/v1/crypto/marketdata/estimated_price/?symbol=XYZ-USD", raise_errors=True)
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertFalse(raised.exception.retryable)
+
+    def test_in_flight_orders_survive_a_restart(self):
+        server = self.start_server(latency=0.3)
+        client = server.client()
+        client.timeout = 0.1
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        state_file = os.path.join(directory.name, "order_gateway_state.json")
+        trade_data = os.path.join(directory.name, "BTC_trade_data.json")
+        trade = {"filename": trade_data, "entry_price": 50000.0, "stop_loss": 49000.0, "take_profit": 52500.0}
+        intent = OrderIntent("BTC", "BTC-USD", "buy", 0.1, trade=trade)
+
+        # Quit while the order's outcome is unknown
+        stale = self.start_gateway(client, batch_window=0, max_retries=0, retry_interval=60, state_file=state_file)
+        future = stale.submit(intent)
+        deadline = time.monotonic() + 5
+        while getattr(stale.book.results.get(intent.client_order_id), "status", None) != "unknown" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stale.stop()
+        self.assertEqual(future.result(1).status, "unknown")
+        self.assertEqual([order.client_order_id for order in load_gateway_state(state_file)[0]], [intent.client_order_id])
+
+        server.latency = None
+        gateway = self.start_gateway(server.client(), state_file=state_file)
+        gateway.stop()
+
+        self.assertEqual(list(server.state.orders_by_client_id), [intent.client_order_id])
+        self.assertEqual(gateway.book.in_flight_orders(), [])
+        self.assertEqual(gateway.book.pending(), [])
+        self.assertAlmostEqual(gateway.book.position("BTC", "BTC-USD"), 0.1)
+        self.assertEqual(load_gateway_state(state_file), ([], []))
+        # The recovered intent's result is applied to the strategy's trade data
+        self.assertEqual(load_trade_data(trade_data), {"symbol": "BTC-USD", "entry_price": 50000.0, "trade_size": 0.1, "stop_loss": 49000.0, "take_profit": 52500.0, "status": "active"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+from unittest.mock import MagicMock, patch
+import profiling
+from trading_scheduler import job, start_scheduler
+
+def busy_strategy(client):
+    with profiling.phase("compute"):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        client.blocks = [bytearray(1024) for _ in range(100)]
+
+class TestProfiling(unittest.TestCase):
+    def test_no_session_is_a_no_op(self):
+        self.assertIs(profiling.profile_job("strategy"), profiling._NO_PROFILE)
+        self.assertIs(profiling.phase("fetch"), profiling._NO_PROFILE)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @patch('trading_scheduler.get_account_value', return_value=10000.0)
+    def test_profiles_the_next_jobs(self, mock_account_value):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        directory = tmpdir.name
+        session = profiling.start_profiling(2, directory, sample_interval=0.001)
+
+        job(busy_strategy, MagicMock())
+        self.assertIs(profiling._session, session)
+        job(busy_strategy, MagicMock())
+
+        self.assertIsNone(profiling._session)
+        self.assertFalse(tracemalloc.is_tracing())
+        folded_path, memory_path = session.outputs
+        self.assertEqual(os.path.dirname(folded_path), directory)
+        with open(folded_path) as file:
+            stacks = [line.rsplit(" ", 1) for line in file.read().splitlines()]
+        self.assertTrue(any(stack.startswith("busy_strategy/compute;") and "test_profiling.py:busy_strategy" in stack for stack, _ in stacks))
+        self.assertTrue(all(int(count) > 0 for _, count in stacks))
+        # Samples are paused while the profiler takes its memory snapshots
+        self.assertFalse(any("tracemalloc.py" in stack or "profiling.py:phase" in stack for stack, _ in stacks))
+        with open(memory_path) as file:
+            memory = file.read()
+        self.assertIn("busy_strategy/compute: net", memory)
+        self.assertIn("busy_strategy/account_value: net", memory)
+        self.assertIn("test_profiling.py", memory)
+
+    @patch('trading_scheduler.profiling.start_profiling')
+    @patch('trading_scheduler.threading.Thread')
+    def test_profile_command(self, MockThread, mock_start_profiling):
+        with patch('builtins.input', side_effect=['profile 3', 'profile x', 'q']):
+            start_scheduler([(MagicMock(), 10)])
+
+        mock_start_profiling.assert_called_once()
+        self.assertEqual(mock_start_profiling.call_args[0][0], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from sharded_scheduler import SharedCandleSegment, ShardedRunner, ShardIntent, partition_symbols, route_intent, sharded_job, start_sharded_scheduler
+
+def close_direction(prices_df):
+    # Picklable stand-in for a strategy's indicator function
+    return {'UP': 'buy' if prices_df['close'].iloc[-1] > prices_df['close'].iloc[-2] else 'sell'}
+
+def close_level(prices_df, values=None):
+    # Like close_direction, but also reports the indicator level
+    if values is not None:
+        values['CLOSE'] = float(prices_df['close'].iloc[-1])
+    return close_direction(prices_df)
+
+def make_ohlcv(closes):
+    return [[1700000000000 + i * 86400000, c, c, c, c, 1.0] for i, c in enumerate(closes)]
+
+class TestShardedScheduler(unittest.TestCase):
+    def test_partition_symbols(self):
+        shards = partition_symbols(['A', 'B', 'C', 'D', 'E'], 2)
+        self.assertEqual(shards, [['A', 'C', 'E'], ['B', 'D']])
+        self.assertEqual(partition_symbols(['A'], 4), [['A']])
+
+    def test_segment_round_trip(self):
+        segment = SharedCandleSegment.create(['BTC/USD', 'ETH/USD'], max_bars=3)
+        try:
+            segment.write('BTC/USD', make_ohlcv([1, 2, 3, 4]))
+            reader = SharedCandleSegment.attach(segment.name, ['BTC/USD', 'ETH/USD'], max_bars=3)
+            prices_df = reader.read('BTC/USD')
+            reader.close()
+
+            self.assertEqual(list(prices_df['close']), [2, 3, 4])  # Only the newest max_bars are kept
+            self.assertEqual(len(segment.read('ETH/USD')), 0)
+            self.assertEqual(segment.versions[0] % 2, 0)
+        finally:
+            segment.close()
+
+    def test_runner_evaluates_all_shards(self):
+        runner = ShardedRunner(['A/USD', 'B/USD', 'C/USD'], close_direction, {'UP': 1.0}, workers=2)
+        runner.load('A/USD', make_ohlcv([1, 2]))
+        runner.load('B/USD', make_ohlcv([2, 1]))
+        runner.load('C/USD', make_ohlcv([1]))  # Too short to evaluate
+        runner.start()
+        try:
+            intents = {intent.symbol: intent.signal for intent in runner.tick(timeout=30)}
+        finally:
+            runner.stop()
+
+        self.assertEqual(intents, {'A/USD': 'buy', 'B/USD': 'sell'})
+
+    def test_runner_reports_indicator_levels(self):
+        runner = ShardedRunner(['A/USD'], close_level, {'UP': 1.0}, workers=1)
+        runner.load('A/USD', make_ohlcv([1, 2]))
+        runner.start()
+        try:
+            (intent,) = runner.tick(timeout=30)
+        finally:
+            runner.stop()
+
+        self.assertEqual((intent.values, intent.close, intent.score), ({'CLOSE': 2.0}, 2.0, 1.0))
+        self.assertEqual(intent.last_bar, "2023-11-15 22:13:20")
+
+    @patch('sharded_scheduler.trade_journal.record')
+    @patch('sharded_scheduler.get_account_value', return_value=1000.0)
+    def test_sharded_job_routes_through_gateway(self, mock_account_value, mock_record):
+        runner = MagicMock()
+        runner.symbols = []
+        runner.tick.return_value = [
+            ShardIntent('A/USD', 'buy', {}),
+            ShardIntent('B/USD', 'hold', {}),
+            ShardIntent('C/USD', 'sell', {}),
+        ]
+        on_signal = MagicMock()
+        client = MagicMock()
+
+        sharded_job(runner, on_signal, client)
+
+        self.assertEqual(on_signal.call_args_list, [((client, intent, 1000.0),) for intent in runner.tick.return_value if intent.signal != 'hold'])
+        mock_account_value.assert_called_once_with(client)  # Once per tick, not per intent
+        # Every evaluated symbol is journaled, including those that hold
+        self.assertEqual([(type(call[0][0]).__name__, call[0][0].symbol) for call in mock_record.call_args_list][1::2], [('DecisionRecord', 'A/USD'), ('DecisionRecord', 'B/USD'), ('DecisionRecord', 'C/USD')])
+
+    @patch('sharded_scheduler._fetch_ohlcv', return_value=make_ohlcv([1, 2]))
+    @patch('sharded_scheduler.ccxt')
+    def test_sharded_job_shares_one_exchange(self, mock_ccxt, mock_fetch):
+        runner = MagicMock()
+        runner.symbols = ['A/USD', 'B/USD', 'C/USD']
+        runner.tick.return_value = []
+        risk_check = MagicMock()
+
+        sharded_job(runner, MagicMock(), MagicMock(), risk_check=risk_check)
+
+        mock_ccxt.coinbase.assert_called_once()
+        self.assertEqual({call[0][3] for call in mock_fetch.call_args_list}, {mock_ccxt.coinbase.return_value})
+        self.assertEqual(risk_check.call_count, 3)
+
+    @patch('sharded_scheduler.execute_trade')
+    def test_route_intent_uses_per_symbol_trade_data(self, mock_execute_trade):
+        client = MagicMock()
+
+        route_intent(client, ShardIntent('ETH/USD', 'buy', {}), 1000.0)
+
+        args, kwargs = mock_execute_trade.call_args
+        self.assertEqual(args[:4], (client, 'buy', 'ETH-USD', 1000.0))
+        self.assertEqual(kwargs['filename'], "ETH-USD_trade_data.json")
+        self.assertEqual(kwargs['strategy'], "sharded")
+
+    @patch('sharded_scheduler.CryptoAPITrading')
+    @patch('sharded_scheduler.ShardedRunner')
+    def test_stop_shuts_down_workers(self, MockShardedRunner, MockCryptoAPITrading):
+        scheduler = start_sharded_scheduler(['A/USD'], close_direction, {'UP': 1.0}, interval_seconds=60)
+
+        scheduler.stop(timeout=5)
+
+        self.assertFalse(scheduler.thread.is_alive())
+        MockShardedRunner.return_value.start.assert_called_once()
+        MockShardedRunner.return_value.stop.assert_called_once()
+
+if __name__ == "__main__":
+    unittest.main()
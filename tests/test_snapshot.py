@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import trading_strategy
+from snapshot import read_snapshot, restore_snapshot, take_snapshot, write_snapshot
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "snapshot.bin")
+        # The positions provider reads and writes trade data files in the working directory
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmpdir.name)
+        trading_strategy.CANDLE_CACHE.clear()
+        trading_strategy.SIGNAL_CACHE.clear()
+
+    def tearDown(self):
+        trading_strategy.CANDLE_CACHE.clear()
+        trading_strategy.SIGNAL_CACHE.clear()
+        self.tmpdir.cleanup()
+
+    def test_write_and_read_round_trip(self):
+        arrays = {'a': np.arange(5, dtype=np.float64), 'b': np.arange(6, dtype=np.int32).reshape(2, 3)}
+        write_snapshot(self.path, arrays, {'positions': {'BTC-USD': 0.5}})
+
+        loaded, meta = read_snapshot(self.path)
+
+        np.testing.assert_array_equal(loaded['a'], arrays['a'])
+        np.testing.assert_array_equal(loaded['b'], arrays['b'])
+        self.assertEqual(meta, {'positions': {'BTC-USD': 0.5}})
+        self.assertFalse(loaded['a'].flags.writeable)  # Memory-mapped, not copied
+
+    def test_rejects_foreign_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a snapshot")
+        with self.assertRaises(ValueError):
+            read_snapshot(self.path)
+        self.assertFalse(restore_snapshot(os.path.join(self.tmpdir.name, "missing.bin")))
+
+    def test_restores_candle_and_signal_caches(self):
+        prices_df = pd.DataFrame(
+            {'open': [1.0, 2.0], 'high': [1.0, 2.0], 'low': [1.0, 2.0], 'close': [1.0, 2.0], 'volume': [5.0, 6.0]},
+            index=pd.to_datetime([1700000000000, 1700086400000], unit='ms'),
+        )
+        trading_strategy.CANDLE_CACHE[("BTC/USD", '1d')] = (1690000000000, prices_df)
+        trading_strategy.SIGNAL_CACHE["BTC_trading_strategy"] = (("2023-11-15", 2.0), {'MACD': 'buy'}, {'MACD': 1.5})
+        take_snapshot(self.path)
+        trading_strategy.CANDLE_CACHE.clear()
+        trading_strategy.SIGNAL_CACHE.clear()
+
+        self.assertTrue(restore_snapshot(self.path))
+
+        since, restored = trading_strategy.CANDLE_CACHE[("BTC/USD", '1d')]
+        self.assertEqual(since, 1690000000000)
+        pd.testing.assert_frame_equal(restored, prices_df, check_names=False, check_freq=False)
+        restored.loc[restored.index[-1], 'close'] = 3.0  # Not backed by the read-only snapshot
+        self.assertEqual(trading_strategy.SIGNAL_CACHE["BTC_trading_strategy"], (("2023-11-15", 2.0), {'MACD': 'buy'}, {'MACD': 1.5}))
+
+    def test_restores_every_trade_data_file(self):
+        trading_strategy.save_trade_data("BTC-USD", 50000.0, 0.1, 49000.0, 52500.0)
+        trading_strategy.save_trade_data("ETH-USD", 2500.0, 1.0, 2450.0, 2625.0, filename="ETH-USD_trade_data.json")
+        take_snapshot(self.path)
+        os.remove("BTC_trade_data.json")
+        os.remove("ETH-USD_trade_data.json")
+
+        self.assertTrue(restore_snapshot(self.path))
+
+        self.assertEqual(trading_strategy.load_trade_data()["symbol"], "BTC-USD")
+        self.assertEqual(trading_strategy.load_trade_data("ETH-USD_trade_data.json")["entry_price"], 2500.0)
+
+    @patch('trading_strategy.ccxt.coinbase')
+    def test_fetch_only_requests_missing_bars(self, MockCoinbase):
+        exchange = MockCoinbase.return_value
+        exchange.parse8601.return_value = 1700000000000
+        exchange.fetch_ohlcv.return_value = [
+            [1700000000000, 1, 1, 1, 1, 1],
+            [1700086400000, 2, 2, 2, 2, 1],
+        ]
+        trading_strategy.fetch_historical_data()
+
+        exchange.fetch_ohlcv.return_value = [
+            [1700086400000, 2, 2, 2, 2.5, 1],
+            [1700172800000, 3, 3, 3, 3, 1],
+        ]
+        prices_df = trading_strategy.fetch_historical_data()
+
+        self.assertEqual(exchange.fetch_ohlcv.call_args.kwargs['since'], 1700086400000)
+        self.assertEqual(list(prices_df['close']), [1, 2.5, 3])
+
+if __name__ == "__main__":
+    unittest.main()
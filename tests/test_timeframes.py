@@ -0,0 +1,31 @@
+import unittest
+import pandas as pd
+from timeframes import bar_offset, closed_candles, timeframe_seconds
+
+class TestTimeframes(unittest.TestCase):
+    def test_timeframe_seconds(self):
+        self.assertEqual(timeframe_seconds('15m'), 900)
+        self.assertEqual(timeframe_seconds('4h'), 14400)
+        self.assertEqual(timeframe_seconds('1d'), 86400)
+
+    def test_unsupported_timeframes_are_rejected(self):
+        for timeframe in ('1M', '0d', 'h', '1y'):
+            with self.assertRaises(ValueError):
+                timeframe_seconds(timeframe)
+
+    def test_weekly_bars_open_on_monday(self):
+        monday = 1704672000  # 2024-01-08 00:00 UTC
+        self.assertEqual((monday - bar_offset('1w')) % timeframe_seconds('1w'), 0)
+        self.assertEqual(bar_offset('1d'), 0)
+
+    def test_closed_candles_drops_forming_bar(self):
+        prices_df = pd.DataFrame({'close': [1.0, 2.0, 3.0]}, index=pd.date_range('2024-01-01', periods=3, freq='D'))
+
+        # Five seconds after the 2024-01-02 bar closed, the 2024-01-03 bar has only just opened
+        closed = closed_candles(prices_df, '1d', now='2024-01-03 00:00:05')
+
+        self.assertEqual(list(closed['close']), [1.0, 2.0])
+        self.assertEqual(len(closed_candles(prices_df, '1d', now='2024-01-04')), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from trade_journal import (
+    DecisionRecord,
+    IndicatorRecord,
+    OrderRecord,
+    TickRecord,
+    TradeJournal,
+    journal_files,
+    journal_to_frame,
+    read_journal,
+    replay_journal,
+)
+
+class TestTradeJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_records_round_trip(self):
+        journal = TradeJournal(self.tmpdir.name, flush_interval=0.05).start()
+        journal.record(TickRecord("BTC_trading_strategy", 10000.0, timestamp=1.0))
+        journal.record(DecisionRecord("BTC_trading_strategy", 0.75, 'buy', timestamp=2.0))
+        journal.record(IndicatorRecord("BTC_trading_strategy", "BTC/USD", "2024-01-01", 42000.0, {'MACD': 'buy'}, {'MACD': 12.5, 'MACD_signal': 10.0}, timestamp=2.5))
+        journal.record(OrderRecord("abc", "BTC-USD", 'bid', 'market', "0.1", order_id="1", state="filled", timestamp=3.0))
+        journal.stop()
+
+        records = list(read_journal(self.tmpdir.name))
+        self.assertEqual(records, [
+            TickRecord("BTC_trading_strategy", 10000.0, timestamp=1.0),
+            DecisionRecord("BTC_trading_strategy", 0.75, 'buy', timestamp=2.0),
+            IndicatorRecord("BTC_trading_strategy", "BTC/USD", "2024-01-01", 42000.0, {'MACD': 'buy'}, {'MACD': 12.5, 'MACD_signal': 10.0}, timestamp=2.5),
+            OrderRecord("abc", "BTC-USD", 'bid', 'market', "0.1", order_id="1", state="filled", timestamp=3.0),
+        ])
+        self.assertEqual(list(read_journal(self.tmpdir.name, [DecisionRecord])), [records[1]])
+
+    def test_rotation_and_restart(self):
+        journal = TradeJournal(self.tmpdir.name, max_bytes=200, flush_interval=0.01, batch_size=1).start()
+        for i in range(10):
+            journal.record(DecisionRecord("s", float(i), 'hold', timestamp=float(i)))
+        journal.stop()
+        TradeJournal(self.tmpdir.name).start().stop()  # Appends a new file instead of overwriting
+
+        files = journal_files(self.tmpdir.name)
+        self.assertGreater(len(files), 2)
+        self.assertTrue(all(os.path.getsize(f) <= 200 for f in files))
+        self.assertEqual([r.score for r in read_journal(self.tmpdir.name)], [float(i) for i in range(10)])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        journal = TradeJournal(self.tmpdir.name, maxsize=1)  # Not started, so nothing drains the queue
+        journal.record(TickRecord("s", 1.0))
+        journal.record(TickRecord("s", 2.0))
+        self.assertEqual(journal.dropped, 1)
+
+    def test_frame_and_replay(self):
+        journal = TradeJournal(self.tmpdir.name, flush_interval=0.05).start()
+        journal.record(DecisionRecord("s", 0.5, 'hold', timestamp=1.0))
+        journal.record(DecisionRecord("s", -0.9, 'sell', timestamp=2.0))
+        journal.stop()
+
+        frame = journal_to_frame(self.tmpdir.name, DecisionRecord)
+        self.assertEqual(list(frame['signal']), ['hold', 'sell'])
+
+        replayed = []
+        replay_journal(self.tmpdir.name, replayed.append)
+        self.assertEqual([r.signal for r in replayed], ['hold', 'sell'])
+
+if __name__ == "__main__":
+    unittest.main()
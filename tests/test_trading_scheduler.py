@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from trading_scheduler import (
+    AdaptiveStrategy,
     get_account_value,
     job,
     run_scheduler,
@@ -58,6 +59,23 @@ class TestTradingScheduler(unittest.TestCase):
         mock_schedule.every.assert_called_once_with(10)
         mock_schedule.every.return_value.seconds.do.assert_called_once()
 
+    @patch('trading_scheduler.time.sleep', side_effect=InterruptedError)
+    @patch('trading_scheduler.restore_snapshot', return_value=True)
+    @patch('trading_scheduler.schedule')
+    @patch('trading_scheduler.CryptoAPITrading')
+    def test_run_scheduler_runs_jobs_immediately(self, MockCryptoAPITrading, mock_schedule, mock_restore, mock_sleep):
+        calls = MagicMock()
+        mock_schedule.run_all.side_effect = lambda: calls.run_all()
+        MockCryptoAPITrading.return_value.get_account.side_effect = lambda: calls.get_account()
+
+        def strategy(client):
+            pass
+
+        with self.assertRaises(InterruptedError):  # Raised by the first sleep of the polling loop
+            run_scheduler([(strategy, 10)])
+
+        self.assertEqual([call[0] for call in calls.mock_calls], ['run_all', 'get_account'])
+
     @patch('trading_scheduler.threading.Thread')
     @patch('trading_scheduler.run_scheduler')
     def test_start_scheduler(self, mock_run_scheduler, MockThread):
@@ -74,5 +92,80 @@ class TestTradingScheduler(unittest.TestCase):
         # Assert that the thread was started
         mock_thread.start.assert_called_once()
 
+    def make_adaptive(self, prices, timeframe='1h', **kwargs):
+        def strategy(client):
+            pass
+        strategy.timeframe = timeframe
+        strategy.symbol = 'BTC-USD'
+        strategy.risk_check = MagicMock()
+        mock_client = MagicMock()
+        mock_client.get_best_bid_ask.side_effect = [
+            {'results': [{'bid_inclusive_of_sell_spread': str(price), 'ask_inclusive_of_buy_spread': str(price)}]} for price in prices
+        ]
+        return AdaptiveStrategy(strategy, mock_client, 10, max_interval=300, move_threshold=0.002, bar_close_delay=5, **kwargs), strategy
+
+    @patch('trading_scheduler.threading.Thread')
+    def test_start_scheduler_rejects_unsupported_timeframe(self, mock_thread):
+        def strategy(client):
+            pass
+        strategy.timeframe = '1M'
+
+        with self.assertRaises(ValueError):
+            start_scheduler([(strategy, 10)])
+
+        mock_thread.assert_not_called()
+
+    @patch('trading_scheduler.job')
+    @patch('trading_scheduler.time.time')
+    def test_weekly_bars_close_on_monday(self, mock_time, mock_job):
+        runner, strategy = self.make_adaptive([100.0] * 3, timeframe='1w')
+        monday = 1704672000  # 2024-01-08 00:00 UTC
+
+        for now in (monday - 3600, monday + 4, monday + 6):  # Sunday, then either side of the bar close delay
+            mock_time.return_value = now
+            runner.tick()
+
+        self.assertEqual((runner.evaluations, runner.risk_checks), (2, 1))
+        self.assertEqual(runner.next_interval(monday - 3600), 300)
+        self.assertEqual(runner._bar(monday + 6) * runner.bar_seconds + runner.bar_offset, monday)
+
+    @patch('trading_scheduler.job')
+    @patch('trading_scheduler.time.time')
+    def test_adaptive_strategy_evaluates_once_per_bar(self, mock_time, mock_job):
+        runner, strategy = self.make_adaptive([100.0] * 4)
+
+        for now in (3605, 3700, 7000, 7205):  # Two ticks in the first hour bar, one before and one after the next close
+            mock_time.return_value = now
+            runner.tick()
+
+        self.assertEqual(mock_job.call_count, 2)
+        self.assertEqual(strategy.risk_check.call_count, 2)
+        self.assertEqual((runner.evaluations, runner.risk_checks), (2, 2))
+
+    @patch('trading_scheduler.job')
+    @patch('trading_scheduler.time.time')
+    def test_adaptive_interval_follows_volatility(self, mock_time, mock_job):
+        quiet, _ = self.make_adaptive([100.0, 100.0, 100.001])
+        volatile, _ = self.make_adaptive([100.0, 101.0, 99.0])
+        for runner in (quiet, volatile):
+            runner.scheduled_job = MagicMock()
+            for now in (3605, 3615, 3625):
+                mock_time.return_value = now
+                runner.tick()
+
+        self.assertEqual(quiet.interval, 300)
+        self.assertEqual(volatile.interval, 10)
+        self.assertEqual(volatile.scheduled_job.interval, 10)
+
+    @patch('trading_scheduler.job')
+    @patch('trading_scheduler.time.time')
+    def test_adaptive_interval_wakes_for_bar_close(self, mock_time, mock_job):
+        runner, _ = self.make_adaptive([100.0])
+        mock_time.return_value = 7100  # 105 seconds before the next bar can be evaluated
+
+        runner.tick()
+
+        self.assertEqual(runner.interval, 105)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backtest import run_backtest
+from walk_forward import indicator_signal, monte_carlo, strategy_returns, walk_forward
+
+SIGNAL_NAMES = {1: 'buy', -1: 'sell', 0: 'hold'}
+
+def random_walk(bars=300, seed=1):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    return pd.DataFrame({
+        'open': closes,
+        'high': closes * 1.01,
+        'low': closes * 0.99,
+        'close': closes,
+        'volume': rng.uniform(1, 10, bars),
+    }, index=pd.date_range("2024-01-01", periods=bars, freq="D"))
+
+class TestWalkForward(unittest.TestCase):
+    def test_vectorised_returns_match_run_backtest(self):
+        prices_df = random_walk(150)
+        grid = {'MACD': [(12, 26, 9)], 'TEMA': [(20,)]}
+        weights = {'MACD': 1.0, 'TEMA': 0.5}
+
+        def indicators(window_df):
+            return {name: SIGNAL_NAMES[int(indicator_signal(window_df, name, grid[name][0])[-1])] for name in grid}
+
+        expected = run_backtest(prices_df, indicators=indicators, weights=weights, warmup=30)
+
+        closes = prices_df['close'].to_numpy()
+        bar_returns = np.append(closes[1:] / closes[:-1] - 1, 0.0)
+        tables = {name: indicator_signal(prices_df, name, grid[name][0])[None, :] for name in grid}
+        returns, _ = strategy_returns(tables, list(grid), np.zeros((1, 2), dtype=int), np.array([[1.0, 0.5]]), bar_returns, 30, len(closes))
+
+        self.assertAlmostEqual(np.prod(1 + returns[0]) - 1, expected['total_return'])
+
+    def test_folds_are_rolling_and_out_of_sample(self):
+        prices_df = random_walk()
+        grid = {'MACD': [(12, 26, 9), (8, 21, 5)], 'VWAP': [(10,), (20,)]}
+
+        result = walk_forward(prices_df, train_bars=100, test_bars=50, parameter_grid=grid, warmup=30, workers=1)
+
+        self.assertEqual([(fold.train, fold.test) for fold in result.folds], [((30, 130), (130, 180)), ((80, 180), (180, 230)), ((130, 230), (230, 280)), ((180, 280), (280, 299))])
+        self.assertEqual(len(result.returns), 299 - 130)
+        self.assertAlmostEqual(result.total_return, np.prod([1 + fold.test_return for fold in result.folds]) - 1)
+        for fold in result.folds:
+            self.assertIn(fold.params['MACD'], grid['MACD'])
+            self.assertIn(fold.weights['VWAP'], (0.5, 1.0))
+
+    def test_parallel_folds_match_serial(self):
+        prices_df = random_walk()
+        serial = walk_forward(prices_df, train_bars=100, test_bars=50, workers=1)
+        parallel = walk_forward(prices_df, train_bars=100, test_bars=50, workers=2)
+
+        self.assertEqual([fold.params for fold in serial.folds], [fold.params for fold in parallel.folds])
+        np.testing.assert_allclose(serial.returns, parallel.returns)
+
+    def test_monte_carlo_intervals(self):
+        rng = np.random.default_rng(0)
+        trades = rng.normal(0.01, 0.05, 40)
+        bars = rng.normal(0.001, 0.02, 250)
+
+        first = monte_carlo(trades, bars, resamples=500, seed=7, workers=1)
+        second = monte_carlo(trades, bars, resamples=500, seed=7, workers=1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(set(first), {"trade_total_return", "trade_max_drawdown", "total_return", "max_drawdown", "sharpe"})
+        for median, low, high in first.values():
+            self.assertLessEqual(low, median)
+            self.assertLessEqual(median, high)
+        self.assertLessEqual(first["max_drawdown"][2], 0.0)
+
+    def test_monte_carlo_constant_trades(self):
+        result = monte_carlo([0.1, 0.1], [], resamples=50, seed=1, workers=2)
+
+        for value in result["trade_total_return"]:
+            self.assertAlmostEqual(value, 0.21)
+
+if __name__ == "__main__":
+    unittest.main()
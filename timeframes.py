@@ -0,0 +1,45 @@
+"""
+Candle timeframe helpers shared by the strategies and the schedulers.
+
+Timeframes use the ccxt notation: a count followed by a unit, e.g. '15m',
+'4h', '1d' or '1w'. Bars are aligned to the Unix epoch, except weekly bars,
+which open on Monday like the exchange's weekly candles (the epoch was a Thursday).
+"""
+from __future__ import annotations
+from typing import Any
+from lazy_imports import LazyModule
+
+pd = LazyModule("pandas")
+
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+WEEKLY_BAR_OFFSET = 4 * 86400
+
+def timeframe_seconds(timeframe: str) -> int:
+    """
+    Length of a candle timeframe such as '15m', '4h' or '1d', in seconds.
+
+    :raises ValueError: If the timeframe is not a positive count of minutes,
+        hours, days or weeks (e.g. the monthly '1M', whose length varies).
+    """
+    count, unit = timeframe[:-1], timeframe[-1:]
+    if unit not in TIMEFRAME_UNITS or not count.isdigit() or int(count) == 0:
+        raise ValueError(f"Unsupported timeframe {timeframe!r}: expected a count followed by one of {', '.join(TIMEFRAME_UNITS)}, e.g. '4h'.")
+    return int(count) * TIMEFRAME_UNITS[unit]
+
+def bar_offset(timeframe: str) -> int:
+    """
+    Seconds after a multiple of the timeframe's length at which its bars open.
+    """
+    return WEEKLY_BAR_OFFSET if timeframe.endswith('w') else 0
+
+def closed_candles(prices_df: pd.DataFrame, timeframe: str, now: Any = None) -> pd.DataFrame:
+    """
+    Drop the candle that is still forming, keeping those whose bar has closed by ``now``.
+
+    :param prices_df: OHLCV DataFrame indexed by candle open time (UTC), as returned by fetch_historical_data.
+    :param timeframe: The candle interval of ``prices_df``, e.g. '1d'.
+    :param now: Current UTC time; defaults to the clock.
+    """
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None) if now is None else pd.Timestamp(now)
+    return prices_df[prices_df.index + pd.Timedelta(seconds=timeframe_seconds(timeframe)) <= now]
@@ -0,0 +1,243 @@
+"""
+Structured, non-blocking journal of trading decisions.
+
+Every tick's inputs, indicator signals, aggregated score, orders and fills are
+recorded as typed records. ``record`` only puts the record on a bounded queue;
+a background thread encodes the records and appends them to the journal in
+batches, so the trading thread never waits on file I/O.
+
+File format (``journal-00001.bin``, ``journal-00002.bin``, ... after rotation):
+
+    8 bytes   magic "ATJRNL01"
+    records   each: <u32 payload length><u8 record type><f64 unix timestamp><payload>
+
+The payload is the record's remaining fields as compact UTF-8 JSON. Readers
+memory-map the files and walk the fixed-size headers, so a type filter skips
+non-matching payloads without decoding them.
+"""
+import glob
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type
+
+JOURNAL_MAGIC = b"ATJRNL01"
+_RECORD_HEADER = struct.Struct("<IBd")
+
+@dataclass
+class TickRecord:
+    strategy: str
+    account_value: float
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass
+class IndicatorRecord:
+    strategy: str
+    symbol: str
+    last_bar: str
+    close: float
+    signals: Dict[str, str]
+    values: Dict[str, float] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass
+class DecisionRecord:
+    strategy: str
+    score: float
+    signal: str
+    symbol: str = ""
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass
+class OrderRecord:
+    client_order_id: str
+    symbol: str
+    side: str
+    order_type: str
+    amount: str
+    order_id: Optional[str] = None
+    state: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+@dataclass
+class FillRecord:
+    order_id: str
+    symbol: str
+    side: str
+    quantity: float
+    price: float
+    timestamp: float = field(default_factory=time.time)
+
+# Record type codes are part of the file format; only ever append to this list
+RECORD_TYPES: List[Type] = [TickRecord, IndicatorRecord, DecisionRecord, OrderRecord, FillRecord]
+_TYPE_CODES = {record_type: code for code, record_type in enumerate(RECORD_TYPES)}
+
+def encode_record(record: Any) -> bytes:
+    values = asdict(record)
+    timestamp = values.pop("timestamp")
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return _RECORD_HEADER.pack(len(payload), _TYPE_CODES[type(record)], timestamp) + payload
+
+class TradeJournal:
+    """
+    Background writer for journal records.
+
+    :param directory: Directory the journal files are written to.
+    :param max_bytes: Size at which the current file is closed and a new one started.
+    :param flush_interval: Maximum seconds a record waits before being written.
+    :param batch_size: Maximum number of records written per batch.
+    :param maxsize: Capacity of the record queue. When full, records are dropped
+        (and counted in ``dropped``) rather than blocking the trading thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024, flush_interval: float = 1.0, batch_size: int = 512, maxsize: int = 10000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._file = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self) -> "TradeJournal":
+        existing = journal_files(self.directory)
+        self._sequence = int(os.path.basename(existing[-1])[8:13]) if existing else 0
+        self._open_next()
+        self._thread.start()
+        return self
+
+    def record(self, record: Any):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout: Optional[float] = 5):
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+        self._sequence += 1
+        path = os.path.join(self.directory, f"journal-{self._sequence:05d}.bin")
+        self._file = open(path, "wb")
+        self._file.write(JOURNAL_MAGIC)
+
+    def _write_batch(self, batch: List[Any]):
+        encoded = []
+        for record in batch:
+            try:
+                encoded.append(encode_record(record))
+            except Exception as e:
+                logging.error(f"Error encoding journal record {record}: {e}")
+        if not encoded:
+            return
+        if self._file.tell() + sum(map(len, encoded)) > self.max_bytes and self._file.tell() > len(JOURNAL_MAGIC):
+            self._open_next()
+        self._file.write(b"".join(encoded))
+        self._file.flush()
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 or (self._stopped.is_set() and self._queue.empty()):
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(timeout, 0.1)))
+                except queue.Empty:
+                    continue
+            if batch:
+                self._write_batch(batch)
+            if self._stopped.is_set() and self._queue.empty():
+                self._file.close()
+                return
+
+_journal: Optional[TradeJournal] = None
+
+def set_journal(journal: Optional[TradeJournal]):
+    """
+    Install the process-wide journal used by ``record``. None disables journaling.
+    """
+    global _journal
+    _journal = journal
+
+def record(journal_record: Any):
+    """
+    Journal a record if a journal is installed. Never blocks.
+    """
+    if _journal is not None:
+        _journal.record(journal_record)
+
+def journal_files(path: str) -> List[str]:
+    """
+    Journal files under ``path`` (a directory or a single file), oldest first.
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "journal-*.bin")))
+    return [path]
+
+def read_journal(path: str, record_types: Optional[List[Type]] = None) -> Iterator[Any]:
+    """
+    Iterate over the records in a journal directory or file, in write order.
+
+    :param record_types: Only decode records of these types.
+    """
+    wanted = None if record_types is None else {_TYPE_CODES[record_type] for record_type in record_types}
+    for filename in journal_files(path):
+        with open(filename, "rb") as file:
+            if os.fstat(file.fileno()).st_size <= len(JOURNAL_MAGIC):
+                continue
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC:
+                    raise ValueError(f"{filename} is not a journal file")
+                offset = len(JOURNAL_MAGIC)
+                end = len(mapped)
+                while offset + _RECORD_HEADER.size <= end:
+                    length, code, timestamp = _RECORD_HEADER.unpack_from(mapped, offset)
+                    start = offset + _RECORD_HEADER.size
+                    if start + length > end:
+                        break  # Partially written record at the end of a live file
+                    offset = start + length
+                    if wanted is not None and code not in wanted:
+                        continue
+                    values = json.loads(mapped[start:offset])
+                    yield RECORD_TYPES[code](timestamp=timestamp, **values)
+
+def journal_to_frame(path: str, record_type: Type):
+    """
+    Load all records of one type into a pandas DataFrame for analysis.
+    """
+    import pandas as pd
+    columns = [f.name for f in fields(record_type)]
+    rows = [asdict(journal_record) for journal_record in read_journal(path, [record_type])]
+    frame = pd.DataFrame(rows, columns=columns)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+    return frame.set_index('timestamp')
+
+def replay_journal(path: str, handler: Callable[[Any], None], speed: Optional[float] = None):
+    """
+    Feed recorded records to ``handler`` in order.
+
+    :param speed: None replays as fast as possible; otherwise the original gaps
+        between records are reproduced, divided by ``speed``.
+    """
+    previous = None
+    for journal_record in read_journal(path):
+        if speed and previous is not None:
+            time.sleep(max(0.0, (journal_record.timestamp - previous) / speed))
+        previous = journal_record.timestamp
+        handler(journal_record)
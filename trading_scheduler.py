@@ -1,18 +1,41 @@
 import schedule
 import time
+import math
 import logging
+import logging.handlers
+import queue
 import threading
-from typing import Callable, List, Tuple
+from typing import Callable, List, Optional, Tuple
 import functools
 from robinhood_api_trading import CryptoAPITrading
-from config.api_config import LOGGING_CONFIG
+from config.api_config import ADAPTIVE_CONFIG, LOGGING_CONFIG, PROFILING_CONFIG, SNAPSHOT_CONFIG
+import profiling
+from snapshot import Snapshotter, restore_snapshot
+from timeframes import bar_offset, timeframe_seconds
+import trade_journal
+from trade_journal import TickRecord
 
-# Configure logging using the dictionary
-logging.basicConfig(
-    filename=LOGGING_CONFIG["filename"],
-    level=LOGGING_CONFIG["level"],
-    format=LOGGING_CONFIG["format"]
-)
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Configure logging using the dictionary. Called by entry points rather than
+    at import time, so importing this module has no side effects.
+
+    Log records are handed to a queue and written to the file by a background
+    listener, so logging never blocks the trading thread on file I/O.
+
+    :return: The started listener; call ``stop()`` on it to flush on shutdown.
+    """
+    file_handler = logging.FileHandler(LOGGING_CONFIG["filename"])
+    file_handler.setFormatter(logging.Formatter(LOGGING_CONFIG["format"]))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+
+    logging.basicConfig(
+        level=LOGGING_CONFIG["level"],
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    listener.start()
+    return listener
 
 def get_account_value(api_trading_client: CryptoAPITrading) -> float:
     """
@@ -50,33 +73,160 @@ def get_account_value(api_trading_client: CryptoAPITrading) -> float:
         logging.error(f"Error calculating account value: {e}")
         return 0  # Default to 0 if there's an error
 
-def job(trading_strategy: Callable[[CryptoAPITrading], None], api_trading_client: CryptoAPITrading):
-    try:
-        logging.info(f"trading...")
-        account_value = get_account_value(api_trading_client)
-        logging.info(f"Current account value: {account_value:.2f}")
+def job(trading_strategy: Callable[[CryptoAPITrading], None], api_trading_client: CryptoAPITrading, snapshotter: Optional[Snapshotter] = None):
+    strategy_name = getattr(trading_strategy, "__name__", str(trading_strategy))
+    with profiling.profile_job(strategy_name):
+        try:
+            logging.info(f"trading...")
+            with profiling.phase("account_value"):
+                account_value = get_account_value(api_trading_client)
+            logging.info(f"Current account value: {account_value:.2f}")
+            trade_journal.record(TickRecord(strategy_name, account_value))
 
-        # Execute trading strategy if account value is above the threshold
-        trading_strategy(api_trading_client)
-        logging.info(f"Trading strategy executed successfully for {trading_strategy.__name__}.")
+            # Execute trading strategy if account value is above the threshold
+            trading_strategy(api_trading_client)
+            logging.info(f"Trading strategy executed successfully for {trading_strategy.__name__}.")
 
-    except Exception as e:
-        logging.error(f"Error executing trading strategy: {e}")
+        except Exception as e:
+            logging.error(f"Error executing trading strategy: {e}")
+
+    if snapshotter is not None:
+        snapshotter.maybe_snapshot()
+
+def _check_timeframes(trading_strategies: List[Tuple[Callable[[CryptoAPITrading], None], int]]):
+    # Fail before anything is scheduled rather than inside the scheduler thread
+    for trading_strategy, _ in trading_strategies:
+        timeframe = getattr(trading_strategy, "timeframe", None)
+        if isinstance(timeframe, str):
+            timeframe_seconds(timeframe)
+
+class AdaptiveStrategy:
+    """
+    Schedules a strategy by its candle timeframe instead of a fixed interval.
+
+    The full strategy only runs when a new bar of its timeframe has closed. On
+    the ticks in between only its risk check runs. The tick interval follows
+    the measured volatility of the strategy's symbol: it is chosen so the
+    expected price move between ticks is about ``move_threshold``, between
+    ``min_interval`` and ``max_interval``, and never later than the next bar close.
+
+    :param trading_strategy: Strategy with a ``timeframe`` attribute, e.g. '1d'.
+        Optional attributes: ``risk_check``, called with the API client between
+        bars, and ``symbol``, the trading pair whose quotes measure volatility.
+    :param min_interval: Shortest time between ticks, in seconds.
+    :param max_interval: Longest time between ticks, in seconds.
+    :param move_threshold: Target expected fractional price move between ticks.
+    :param bar_close_delay: Seconds after a bar closes before it is evaluated.
+    :param volatility_halflife: Number of price samples over which a sample's
+        weight in the volatility estimate halves.
+    """
+
+    def __init__(self, trading_strategy: Callable[[CryptoAPITrading], None], api_trading_client: CryptoAPITrading, min_interval: int, snapshotter: Optional[Snapshotter] = None, max_interval: int = 300, move_threshold: float = 0.002, bar_close_delay: float = 5, volatility_halflife: float = 20):
+        self.trading_strategy = trading_strategy
+        self.api_trading_client = api_trading_client
+        self.snapshotter = snapshotter
+        self.bar_seconds = timeframe_seconds(trading_strategy.timeframe)
+        self.bar_offset = bar_offset(trading_strategy.timeframe)
+        self.risk_check = getattr(trading_strategy, "risk_check", None)
+        self.symbol = getattr(trading_strategy, "symbol", None)
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.move_threshold = move_threshold
+        self.bar_close_delay = bar_close_delay
+        self.decay = 0.5 ** (1 / volatility_halflife)
+        self.interval = min_interval
+        self.scheduled_job: Optional[schedule.Job] = None
+        self.last_bar: Optional[int] = None
+        self.variance: Optional[float] = None  # EWMA of squared log returns per second
+        self._last_sample: Optional[Tuple[float, float]] = None
+        self.evaluations = 0
+        self.risk_checks = 0
+
+    def _bar(self, now: float) -> int:
+        return int((now - self.bar_close_delay - self.bar_offset) // self.bar_seconds)
+
+    def sample_price(self, now: float):
+        """
+        Update the volatility estimate with the current mid price of the symbol.
+        """
+        if self.symbol is None:
+            return
+        try:
+            quote = self.api_trading_client.get_best_bid_ask(self.symbol)['results'][0]
+            price = (float(quote['bid_inclusive_of_sell_spread']) + float(quote['ask_inclusive_of_buy_spread'])) / 2
+        except Exception as e:
+            logging.error(f"Error sampling price for {self.symbol}: {e}")
+            return
+        if self._last_sample is not None and now > self._last_sample[0] and price > 0:
+            last_time, last_price = self._last_sample
+            rate = math.log(price / last_price) ** 2 / (now - last_time)
+            self.variance = rate if self.variance is None else self.decay * self.variance + (1 - self.decay) * rate
+        self._last_sample = (now, price)
+
+    def next_interval(self, now: float) -> int:
+        """
+        Seconds until the next tick, from the volatility estimate and the next bar close.
+        """
+        interval = self.move_threshold ** 2 / self.variance if self.variance else self.max_interval
+        until_bar_close = (self._bar(now) + 1) * self.bar_seconds + self.bar_offset + self.bar_close_delay - now
+        interval = min(interval, self.max_interval, until_bar_close)
+        return max(self.min_interval, int(math.ceil(interval)))
+
+    def tick(self):
+        now = time.time()
+        bar = self._bar(now)
+        if bar != self.last_bar:
+            job(self.trading_strategy, self.api_trading_client, self.snapshotter)
+            self.last_bar = bar
+            self.evaluations += 1
+        else:
+            self.risk_checks += 1
+            if self.risk_check is not None:
+                with profiling.profile_job(f"{self.trading_strategy.__name__}.risk_check"):
+                    try:
+                        self.risk_check(self.api_trading_client)
+                    except Exception as e:
+                        logging.error(f"Error running risk check: {e}")
+            if self.snapshotter is not None:
+                self.snapshotter.maybe_snapshot()
+
+        self.sample_price(now)
+        self.interval = self.next_interval(now)
+        if self.scheduled_job is not None:
+            # schedule computes the next run from the job's interval after this returns
+            self.scheduled_job.interval = self.interval
 
 def run_scheduler(trading_strategies: List[Tuple[Callable[[CryptoAPITrading], None], int]]):
     """
     Accepts a list of trading strategies with their respective intervals and schedules each strategy.
     
     :param trading_strategies: A list of tuples containing the trading strategy and its interval in seconds.
+        Strategies with a ``timeframe`` attribute are run by AdaptiveStrategy,
+        with the interval as the shortest time between ticks.
+    :raises ValueError: If a strategy's ``timeframe`` is not supported.
     """
+    _check_timeframes(trading_strategies)
     api_trading_client = CryptoAPITrading()  # Instantiate once for the scheduler
-    logging.info(api_trading_client.get_account())
+
+    # Warm start from the last snapshot so the first tick does not re-download everything
+    if restore_snapshot(SNAPSHOT_CONFIG["filename"]):
+        logging.info(f"Restored runtime state from {SNAPSHOT_CONFIG['filename']}.")
+    snapshotter = Snapshotter(SNAPSHOT_CONFIG["filename"], SNAPSHOT_CONFIG["interval_seconds"])
 
     for trading_strategy, interval_seconds in trading_strategies:
+        if isinstance(getattr(trading_strategy, "timeframe", None), str):
+            runner = AdaptiveStrategy(trading_strategy, api_trading_client, interval_seconds, snapshotter, **ADAPTIVE_CONFIG)
+            runner.scheduled_job = schedule.every(interval_seconds).seconds.do(runner.tick)
+            print(f"Scheduler started for {trading_strategy.__name__}, will evaluate each {trading_strategy.timeframe} bar and check risk every {interval_seconds}-{runner.max_interval} seconds.")
+            continue
         # Use functools.partial to pass the strategy and the client properly
-        schedule.every(interval_seconds).seconds.do(functools.partial(job, trading_strategy, api_trading_client))
+        schedule.every(interval_seconds).seconds.do(functools.partial(job, trading_strategy, api_trading_client, snapshotter))
         print(f"Scheduler started for {trading_strategy.__name__}, will run every {interval_seconds} seconds.")
 
+    # Trade straight away on the restored state instead of waiting a full interval
+    schedule.run_all()
+    logging.info(api_trading_client.get_account())
+
     while True:
         schedule.run_pending()
         time.sleep(1)  # Sleep to avoid high CPU usage
@@ -86,18 +236,28 @@ def start_scheduler(trading_strategies: List[Tuple[Callable[[CryptoAPITrading],
     Starts the scheduler for multiple trading strategies in a separate thread.
     
     :param trading_strategies: A list of tuples containing trading strategies and their respective intervals.
+    :raises ValueError: If a strategy's ``timeframe`` is not supported.
     """
+    _check_timeframes(trading_strategies)
     logging.info("Starting scheduler...")
     scheduler_thread = threading.Thread(target=run_scheduler, args=(trading_strategies,), daemon=True)
     scheduler_thread.start()
 
     try:
         while True:
-            command = input("Type 'q' to quit the scheduler:\n").strip().lower()
+            command = input("Type 'q' to quit the scheduler, or 'profile N' to profile the next N jobs:\n").strip().lower()
             if command == 'q':
                 print("\nStopping scheduler...")
                 logging.info("Scheduler Stopped.")
                 logging.info("end.")
                 break
+            if command.split()[:1] == ['profile']:
+                arguments = command.split()[1:]
+                if len(arguments) > 1 or (arguments and (not arguments[0].isdigit() or int(arguments[0]) == 0)):
+                    print("Usage: profile N")
+                    continue
+                jobs = int(arguments[0]) if arguments else 1
+                profiling.start_profiling(jobs, **PROFILING_CONFIG)
+                print(f"Profiling the next {jobs} jobs. Results will be written to {PROFILING_CONFIG['directory']}/.")
     except KeyboardInterrupt:
         print("Scheduler stopped by user.")
@@ -1,21 +1,37 @@
-from typing import Any
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional, Tuple
+import inspect
 import uuid
 import logging
 from robinhood_api_trading import CryptoAPITrading
-import ccxt
-import pandas as pd
+from lazy_imports import LazyModule
+import indicator_kernels
+import trade_journal
+from order_gateway import OrderIntent, OrderResult, get_order_gateway, register_recovery_handler, submit_intent
+import profiling
+from timeframes import closed_candles
+from trade_journal import DecisionRecord, IndicatorRecord
 import json
 import datetime 
 
 # Store the last signal in a file to avoid duplicate trades
 import os
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# ccxt and pandas are only imported once market data is actually needed
+ccxt = LazyModule("ccxt")
+pd = LazyModule("pandas")
 
 # Define a threshold for stopping trades
 ACCOUNT_VALUE_THRESHOLD = 10000  # Set your desired threshold here
 
+# Candles already downloaded, keyed by (symbol, timeframe) -> (since in ms, DataFrame).
+# Later fetches only ask the exchange for bars from the last cached one onwards.
+CANDLE_CACHE: Dict[Tuple[str, str], Tuple[int, pd.DataFrame]] = {}
+
+# Last indicator signals per strategy, keyed by strategy name -> (last bar marker, signals, indicator levels).
+# The marker includes the last close, so the still-forming candle invalidates it.
+SIGNAL_CACHE: Dict[str, Tuple[Tuple[str, float], dict, dict]] = {}
+
 def get_account_value(api_trading_client: CryptoAPITrading) -> float:
     """
     Calculate the total value of the account, including cash and holdings.
@@ -62,166 +78,159 @@ def save_last_signal(signal, filename="BTC_last_signal.txt"):
     with open(filename, "w") as file:
         file.write(signal)
 
-def fetch_historical_data(symbol: str = "BTC/USD",start_date: str = '2022-01-01T00:00:00Z', timeframe: str = '1d', limit: int = 365) -> pd.Series:
+def fetch_historical_data(symbol: str = "BTC/USD",start_date: str = '2022-01-01T00:00:00Z', timeframe: str = '1d', limit: int = 365, exchange: Any = None) -> pd.Series:
     """
     Fetches historical Bitcoin data from a crypto exchange using ccxt.
     
     :param symbol: The trading pair symbol
     :param timeframe: The data interval (e.g., '1m', '5m', '1h', '1d').
     :param limit: The number of data points to retrieve (default is 365).
+    :param exchange: ccxt exchange to fetch from; pass one to share it across many fetches.
     :return: A pandas Series with the closing prices of Bitcoin.
     """
-    exchange = ccxt.coinbase()  # Correct exchange name for Coinbase in ccxt
+    exchange = exchange or ccxt.coinbase()  # Correct exchange name for Coinbase in ccxt
     since = exchange.parse8601(start_date)  # Set the starting point for fetching data
 
+    # Only fetch what is missing if the cache already covers the requested start
+    cached_since, cached = CANDLE_CACHE.get((symbol, timeframe), (None, None))
+    fetch_since = since
+    if cached is not None and len(cached) and cached_since <= since:
+        # Re-fetch the last cached bar as well, it may still have been forming
+        fetch_since = max(since, int(cached.index[-1].value // 10**6))
+
     # Fetch OHLCV data (Open, High, Low, Close, Volume)
-    ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, since=since)
+    ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, since=fetch_since)
     
     # Convert OHLCV to a DataFrame
     price_data = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
 
     # Convert timestamp to a readable datetime format
     price_data['timestamp'] = pd.to_datetime(price_data['timestamp'], unit='ms')
+    price_data = price_data.set_index('timestamp')
+
+    if fetch_since != since:
+        price_data = pd.concat([cached, price_data])
+        price_data = price_data[~price_data.index.duplicated(keep='last')]
+        price_data = price_data[price_data.index >= pd.to_datetime(since, unit='ms')].iloc[:limit]
+
+    CANDLE_CACHE[(symbol, timeframe)] = (since, price_data)
 
     # Return the closing prices
-    return price_data.set_index('timestamp')
+    return price_data
 
-def calculate_macd(prices: pd.Series, short_window: int = 20, long_window: int = 30, signal_window: int = 9) -> pd.DataFrame:
+def calculate_macd(prices: pd.Series, short_window: int = 20, long_window: int = 30, signal_window: int = 9, values: Optional[dict] = None) -> str:
     """
-    Calculates MACD values for a given price series.
+    Calculates MACD values for a given price series and returns a crossover signal.
     
     :param prices: Series of price data.
     :param short_window: Short EMA window for MACD.
     :param long_window: Long EMA window for MACD.
     :param signal_window: Window for MACD signal line.
-    :return: DataFrame with MACD line, signal line, and histogram.
+    :param values: If given, the latest MACD and signal line levels are stored in it.
+    :return: 'buy', 'sell', or 'hold'.
     """
-    short_ema = prices.ewm(span=short_window, adjust=False).mean()
-    long_ema = prices.ewm(span=long_window, adjust=False).mean()
+    closes = prices.to_numpy(dtype=float)
+    short_ema = indicator_kernels.ema(closes, short_window)
+    long_ema = indicator_kernels.ema(closes, long_window)
     
     macd_line = short_ema - long_ema
-    signal_line = macd_line.ewm(span=signal_window, adjust=False).mean()
-
-    macd_df = pd.DataFrame({
-        'MACD': macd_line,
-        'Signal Line': signal_line,
-    })
+    signal_line = indicator_kernels.ema(macd_line, signal_window)
+    if values is not None:
+        values['MACD'] = float(macd_line[-1])
+        values['MACD_signal'] = float(signal_line[-1])
 
-    """
-    Generates buy or sell signal based on MACD strategy.
-    
-    :param macd_df: DataFrame with MACD, Signal line, and Histogram.
-    :return: 'buy' or 'sell' signal.
-    """
-    # Check if the MACD line crosses above the signal line (buy signal)
-    if macd_df.iloc[-1]['MACD'] > macd_df.iloc[-1]['Signal Line'] and macd_df.iloc[-2]['MACD'] <= macd_df.iloc[-2]['Signal Line']:
-        return 'buy'
-    
-    # Check if the MACD line crosses below the signal line (sell signal)
-    elif macd_df.iloc[-1]['MACD'] < macd_df.iloc[-1]['Signal Line'] and macd_df.iloc[-2]['MACD'] >= macd_df.iloc[-2]['Signal Line']:
-        return 'sell'
-    
-    # If no crossover, return 'hold'
-    return 'hold'
+    # Buy when the MACD line crosses above the signal line, sell when it crosses below
+    return str(indicator_kernels.crossover_signals(macd_line, signal_line)[0])
 
-def calculate_mvcd(prices: pd.Series, short_window: int = 20, long_window: int = 30, signal_window: int = 9) -> pd.DataFrame:
+def calculate_mvcd(prices: pd.Series, short_window: int = 20, long_window: int = 30, signal_window: int = 9, values: Optional[dict] = None) -> str:
     """
-    Calculates MACD values for a given price series.
+    Calculates MVCD values (MACD applied to exponentially weighted volatility)
+    for a given price series and returns a crossover signal.
     
     :param prices: Series of price data.
-    :param short_window: Short EMA window for MACD.
-    :param long_window: Long EMA window for MACD.
-    :param signal_window: Window for MACD signal line.
-    :return: DataFrame with MACD line, signal line, and histogram.
+    :param short_window: Short EMA window for MVCD.
+    :param long_window: Long EMA window for MVCD.
+    :param signal_window: Window for MVCD signal line.
+    :param values: If given, the latest MVCD and signal line levels are stored in it.
+    :return: 'buy', 'sell', or 'hold'.
     """
-    # Calculate daily returns
-    returns = prices.pct_change().dropna()
-    
-    short_ema = prices.ewm(span=short_window, adjust=False).std()
-    long_ema = prices.ewm(span=long_window, adjust=False).std()
+    closes = prices.to_numpy(dtype=float)
+    short_ema = indicator_kernels.ewm_std(closes, short_window)
+    long_ema = indicator_kernels.ewm_std(closes, long_window)
     
     mvcd_line = short_ema - long_ema
-    signal_line = mvcd_line.ewm(span=signal_window, adjust=False).std()
-
-    macd_df = pd.DataFrame({
-        'MVCD': mvcd_line,
-        'Signal Line': signal_line,
-    })
+    signal_line = indicator_kernels.ewm_std(mvcd_line, signal_window)
+    if values is not None:
+        values['MVCD'] = float(mvcd_line[-1])
+        values['MVCD_signal'] = float(signal_line[-1])
 
-    """
-    Generates buy or sell signal based on MACD strategy.
-    
-    :param macd_df: DataFrame with MACD, Signal line, and Histogram.
-    :return: 'buy' or 'sell' signal.
-    """
-    # Check if the MACD line crosses above the signal line (buy signal)
-    if macd_df.iloc[-1]['MVCD'] > macd_df.iloc[-1]['Signal Line'] and macd_df.iloc[-2]['MVCD'] <= macd_df.iloc[-2]['Signal Line']:
-        return 'buy'
-    
-    # Check if the MACD line crosses below the signal line (sell signal)
-    elif macd_df.iloc[-1]['MVCD'] < macd_df.iloc[-1]['Signal Line'] and macd_df.iloc[-2]['MVCD'] >= macd_df.iloc[-2]['Signal Line']:
-        return 'sell'
-    
-    # If no crossover, return 'hold'
-    return 'hold'
+    # Buy when the MVCD line crosses above the signal line, sell when it crosses below
+    return str(indicator_kernels.crossover_signals(mvcd_line, signal_line)[0])
 
-def calculate_vwap(prices: pd.DataFrame, vwap_window: int = 20) -> str:
+def calculate_vwap(prices: pd.DataFrame, vwap_window: int = 20, values: Optional[dict] = None) -> str:
     """
     Calculates rolling VWAP and returns a signal.
     
     :param prices: DataFrame containing 'close', 'volume', 'high', 'low'.
     :param vwap_window: Rolling window period for VWAP calculation.
+    :param values: If given, the latest VWAP level is stored in it.
     :return: 'buy', 'sell', or 'hold'.
     """
-    # Calculate the typical price
-    typical_price = (prices['high'] + prices['low'] + prices['close']) / 3
-
-    # Calculate rolling VWAP over the specified window
-    typical_price_volume = typical_price * prices['volume']
-    rolling_cumulative_price_volume = typical_price_volume.rolling(window=vwap_window).sum()
-    rolling_cumulative_volume = prices['volume'].rolling(window=vwap_window).sum()
-
-    vwap = rolling_cumulative_price_volume / rolling_cumulative_volume
+    closes = prices['close'].to_numpy(dtype=float)
+    vwap = indicator_kernels.rolling_vwap(
+        prices['high'].to_numpy(dtype=float),
+        prices['low'].to_numpy(dtype=float),
+        closes,
+        prices['volume'].to_numpy(dtype=float),
+        vwap_window,
+    )
+    if values is not None:
+        values['VWAP'] = float(vwap[-1])
 
-    # Signal based on current price relative to VWAP
-    if prices['close'].iloc[-1] > vwap.iloc[-1] and prices['close'].iloc[-2] <= vwap.iloc[-2]:  # Price above VWAP
-        return 'buy'
-    elif prices['close'].iloc[-1] < vwap.iloc[-1] and prices['close'].iloc[-2] >= vwap.iloc[-2]:  # Price below VWAP
-        return 'sell'
-    else:
-        return 'hold'
+    # Signal based on current price crossing above or below VWAP
+    return str(indicator_kernels.crossover_signals(closes, vwap)[0])
 
-def calculate_tema(prices: pd.Series, window: int = 20) -> str:
+def calculate_tema(prices: pd.Series, window: int = 20, values: Optional[dict] = None) -> str:
     """
     Calculates TEMA and returns a signal.
     
     :param prices: Series of price data.
     :param window: Window period for TEMA.
+    :param values: If given, the latest TEMA level is stored in it.
     :return: 'buy', 'sell', or 'hold'.
     """
-    # Calculate the three EMAs needed for TEMA
-    ema1 = prices.ewm(span=window, adjust=False).mean()  # First EMA
-    ema2 = ema1.ewm(span=window, adjust=False).mean()    # Second EMA of the first EMA
-    ema3 = ema2.ewm(span=window, adjust=False).mean()    # Third EMA of the second EMA
-
-    # Calculate TEMA
-    tema = 3 * (ema1 - ema2) + ema3
+    closes = prices.to_numpy(dtype=float)
+    tema = indicator_kernels.tema(closes, window)
+    if values is not None:
+        values['TEMA'] = float(tema[-1])
 
     # Signal based on price crossing above or below TEMA
-    if prices.iloc[-1] > tema.iloc[-1] and prices.iloc[-2] <= tema.iloc[-2]:  # Price above TEMA
-        return 'buy'
-    elif prices.iloc[-1] < tema.iloc[-1] and prices.iloc[-2] >= tema.iloc[-2]:  # Price below TEMA
-        return 'sell'
-    else:
-        return 'hold'
+    return str(indicator_kernels.crossover_signals(closes, tema)[0])
       
-def aggregate_signals(signals: dict, weights: dict) -> str:
+def evaluate_indicators(indicators: Callable[[pd.DataFrame], dict], prices_df: pd.DataFrame) -> Tuple[dict, dict]:
     """
-    Aggregate signals from multiple indicators using a weighted average.
+    Run a strategy's indicator function, also collecting the indicator levels
+    if it accepts a ``values`` dict like BTC_indicator_signals does.
+
+    :param indicators: Maps an OHLCV DataFrame to a dict of indicator signals.
+    :param prices_df: OHLCV DataFrame to evaluate.
+    :return: (signals, values), values being empty if the function does not report levels.
+    """
+    values = {}
+    try:
+        accepts_values = 'values' in inspect.signature(indicators).parameters
+    except (TypeError, ValueError):
+        accepts_values = False
+    signals = indicators(prices_df, values=values) if accepts_values else indicators(prices_df)
+    return signals, values
+
+def signal_score(signals: dict, weights: dict) -> float:
+    """
+    Weighted average of indicator signals on a -1 (all sell) to +1 (all buy) scale.
     
     :param signals: Dictionary of indicator signals. e.g., {'MACD': 'buy', 'RSI': 'sell'}
     :param weights: Dictionary of weights for each indicator. e.g., {'MACD': 0.6, 'RSI': 0.4}
-    :return: Aggregated signal ('buy', 'sell', 'hold').
+    :return: Normalized score.
     """
     weighted_sum = 0
     total_weight = sum(weights.values())
@@ -234,7 +243,17 @@ def aggregate_signals(signals: dict, weights: dict) -> str:
         # 'hold' contributes 0 to the weighted sum
     
     # Normalize to -1 to +1 scale
-    normalized_score = weighted_sum / total_weight
+    return weighted_sum / total_weight
+
+def aggregate_signals(signals: dict, weights: dict) -> str:
+    """
+    Aggregate signals from multiple indicators using a weighted average.
+    
+    :param signals: Dictionary of indicator signals. e.g., {'MACD': 'buy', 'RSI': 'sell'}
+    :param weights: Dictionary of weights for each indicator. e.g., {'MACD': 0.6, 'RSI': 0.4}
+    :return: Aggregated signal ('buy', 'sell', 'hold').
+    """
+    normalized_score = signal_score(signals, weights)
     
     logging.info(f"Weighted Aggregated Score: {normalized_score}")
 
@@ -245,12 +264,12 @@ def aggregate_signals(signals: dict, weights: dict) -> str:
         return 'sell'
     else:
         return 'hold'
-      
+
 def save_trade_data(symbol: str, entry_price: float, trade_size: float, stop_loss: float, take_profit: float, status: str = "active", filename="BTC_trade_data.json"):
     trade_data = {
         "symbol": symbol,
         "entry_price": entry_price,
-        "trade size": trade_size,
+        "trade_size": trade_size,
         "stop_loss": stop_loss,
         "take_profit": take_profit,
         "status": status  # Track if the trade is "active" or "closed"
@@ -263,24 +282,63 @@ def load_trade_data(filename="BTC_trade_data.json"):
         with open(filename, "r") as file:
             return json.load(file)
     return None  # No active trade
- 
-def execute_trade(api_trading_client: CryptoAPITrading, signal: str, symbol: str, account_value: float, risk_per_trade: float, stop_loss_percent: float, take_profit_percent: float, confidence: float):
+
+def apply_trade_result(intent: OrderIntent, result: OrderResult):
+    """
+    Update the trade data once an order submitted by execute_trade settles:
+    a placed buy opens the trade, a placed sell closes it.
+
+    The intent's ``trade`` holds the trade data file and the entry, stop-loss
+    and take-profit prices, so the result can also be applied to an intent
+    restored from a snapshot after a restart.
+    """
+    trade = intent.trade
+    if "filename" not in trade:
+        return  # Not submitted by execute_trade
+    if result.status not in ('placed', 'netted'):
+        if intent.side == 'sell':
+            logging.error(f"Sell order for {intent.symbol} {result.status}. Trade left open.")
+        else:
+            logging.error(f"Buy order for {intent.symbol} {result.status}. No trade opened.")
+        return
+
+    if intent.side == 'sell':
+        save_trade_data(intent.symbol, 0, 0, 0, 0, status="closed", filename=trade["filename"])
+        logging.info(f"Active trade for {intent.symbol} closed.")
+    else:
+        logging.info(f"Buy order placed for {intent.quantity:.6f} {intent.symbol} at ${trade['entry_price']:.2f}. SL: {trade['stop_loss']}, TP: {trade['take_profit']}.")
+        # Save trade data for monitoring
+        save_trade_data(intent.symbol, trade["entry_price"], intent.quantity, trade["stop_loss"], trade["take_profit"], filename=trade["filename"])
+
+# Orders still in flight at shutdown settle in the next process
+register_recovery_handler(apply_trade_result)
+
+def execute_trade(api_trading_client: CryptoAPITrading, signal: str, symbol: str, account_value: float, risk_per_trade: float, stop_loss_percent: float, take_profit_percent: float, confidence: float, strategy: str = "BTC", filename: str = "BTC_trade_data.json"):
     """
     Execute a trade with risk management, including stop-loss and take-profit.
     Ensure buy signals only execute if no active trade is open, and sell signals close active trades.
+
+    Orders are submitted as intents to the order gateway (or placed directly,
+    with retries, if no gateway is running). The trade data is updated once
+    the order's outcome is known, and no new order is submitted for the
+    strategy and symbol while an earlier one is still pending. ``filename``
+    holds the strategy's trade data, one file per traded symbol.
     """
     try:
+        gateway = get_order_gateway()
+        if gateway is not None and gateway.book.pending(strategy, symbol):
+            logging.info(f"{signal.capitalize()} signal received but an order for {symbol} is still pending. Waiting for it to settle.")
+            return
+
         # Check for active trade
-        trade_data = load_trade_data()
+        trade_data = load_trade_data(filename)
         if signal == 'sell':
             if trade_data and trade_data["status"] == "active":
                 logging.info(f"Sell signal received. Closing active trade for {trade_data['symbol']}.")
-                # Place sell order to close active trade
-                client_order_id = str(uuid.uuid4())
-                order_config = {"amount": str(trade_data["trade_size"])}  # Sell the amount from active trade
-                api_trading_client.place_order(client_order_id, side='ask', order_type='market', symbol=symbol, order_config=order_config)
-                save_trade_data(trade_data["symbol"], 0, 0, 0, status="closed")
-                logging.info(f"Active trade for {trade_data['symbol']} closed.")
+
+                # Sell the amount from active trade
+                intent = OrderIntent(strategy, symbol, 'sell', float(trade_data["trade_size"]), trade={"filename": filename})
+                submit_intent(api_trading_client, intent).add_done_callback(lambda future: apply_trade_result(intent, future.result()))
             else:
                 logging.info("Sell signal received but no active trade to close.")
             return  # Exit after processing sell signal
@@ -290,7 +348,6 @@ def execute_trade(api_trading_client: CryptoAPITrading, signal: str, symbol: str
                 logging.info("Buy signal received but an active trade is already open. No additional buy order placed.")
                 return  # Don't open a new trade if there's already one active
 
-            client_order_id = str(uuid.uuid4())
             risk_amount = account_value * risk_per_trade * confidence
 
             # Fetch buying power from the account
@@ -306,17 +363,15 @@ def execute_trade(api_trading_client: CryptoAPITrading, signal: str, symbol: str
             price_info = api_trading_client.get_best_bid_ask(symbol)
             current_price = float(price_info['results'][0]['bid_inclusive_of_sell_spread'])
             trade_size = risk_amount / current_price
-
-            # Place buy order
-            order_config = {"amount": str(trade_size)}
-            api_trading_client.place_order(client_order_id, side='bid', order_type='market', symbol=symbol, order_config=order_config)
-            
             stop_loss_price = current_price * (1 - stop_loss_percent)
             take_profit_price = current_price * (1 + take_profit_percent)
-            logging.info(f"Buy order placed for {trade_size:.6f} {symbol} at ${current_price:.2f}. Risk: ${risk_amount:.2f}/{trade_size} coins, SL: {stop_loss_price}, TP: {take_profit_price}.")
-            
-            # Save trade data for monitoring
-            save_trade_data(symbol, current_price, trade_sze, stop_loss_price, take_profit_price)
+
+            logging.info(f"Buying {trade_size:.6f} {symbol} at ${current_price:.2f}. Risk: ${risk_amount:.2f}.")
+
+            # Place buy order; the trade data is saved once it settles
+            trade = {"filename": filename, "entry_price": current_price, "stop_loss": stop_loss_price, "take_profit": take_profit_price}
+            intent = OrderIntent(strategy, symbol, 'buy', trade_size, trade=trade)
+            submit_intent(api_trading_client, intent).add_done_callback(lambda future: apply_trade_result(intent, future.result()))
 
         else:
             logging.info("No trade executed. Holding position.")
@@ -324,13 +379,13 @@ def execute_trade(api_trading_client: CryptoAPITrading, signal: str, symbol: str
     except Exception as e:
         logging.error(f"Error executing trade for {symbol}: {e}")
 
-def monitor_risk(api_trading_client: CryptoAPITrading, filename="trade_data.json"):
+def monitor_risk(api_trading_client: CryptoAPITrading, filename="BTC_trade_data.json", strategy: str = "BTC"):
     """
     Monitors open trades for stop-loss and take-profit conditions.
     """
     try:
         trade_data = load_trade_data(filename)
-        if not trade_data:
+        if not trade_data or trade_data["status"] != "active":
             logging.info("No active trades to monitor.")
             return
         
@@ -348,31 +403,31 @@ def monitor_risk(api_trading_client: CryptoAPITrading, filename="trade_data.json
         # Check conditions
         if account_value <= ACCOUNT_VALUE_THRESHOLD:
             logging.info(f"Risk condition met for {symbol} at ${current_price:.2f}. Executing trade to close position.")
-            execute_trade(api_trading_client, 'sell', symbol, 0, 0, 0, 0, 0)  # Close the position by executing a sell trade
+            execute_trade(api_trading_client, 'sell', symbol, 0, 0, 0, 0, 0, strategy, filename)  # Close the position by executing a sell trade
         
         # Check conditions
         if current_price <= stop_loss or current_price >= take_profit:
             logging.info(f"Risk condition met for {symbol} at ${current_price:.2f}. Executing trade to close position.")
-            execute_trade(api_trading_client, 'sell', symbol, 0, 0, 0, 0, 0)  # Close the position by executing a sell trade
+            execute_trade(api_trading_client, 'sell', symbol, 0, 0, 0, 0, 0, strategy, filename)  # Close the position by executing a sell trade
 
     except Exception as e:
         logging.error(f"Error monitoring risk: {e}")
 
-def BTC_trading_strategy(api_trading_client: CryptoAPITrading):
-    """
-    Bitcoin trading strategy with active trade management.
-    """
-    logging.info("Starting BTC trading strategy...")
+BTC_WEIGHTS = {
+    'MACD': 0.01,
+    'MVCD': 0.01,
+    'VWAP': 0.01,
+    'TEMA': 0.01,
+}
 
-    # Check for active trade first
-    trade_data = load_trade_data()
-    if trade_data and trade_data["status"] == "active":
-        logging.info(f"Active trade detected for {trade_data['symbol']} at entry price ${trade_data['entry_price']:.2f}")
-        if trade_data["stop_loss"] or trade_data["take_profit"]:
-            monitor_risk(api_trading_client)  # Monitor the risk for stop-loss/take-profit triggers
-    
-    start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).isoformat() + 'Z'
+def BTC_indicator_signals(prices_df: pd.DataFrame, values: Optional[dict] = None) -> dict:
+    """
+    Calculate the indicator signals used by the Bitcoin strategy.
     
+    :param prices_df: OHLCV DataFrame as returned by fetch_historical_data.
+    :param values: If given, the latest indicator levels are stored in it, e.g. {'MACD': 12.5, 'VWAP': 50100.0}.
+    :return: Dictionary of indicator signals, e.g. {'MACD': 'buy', 'VWAP': 'hold'}.
+    """
     macd_short_window = 20
     macd_long_window = 30
     macd_signal_window = 10
@@ -385,43 +440,32 @@ def BTC_trading_strategy(api_trading_client: CryptoAPITrading):
     
     tema_window = 20
     
-    # Define weights for each indicator
-    weights = {
-        'MACD': 0.01,
-        'MVCD': 0.01,
-        'VWAP': 0.01,
-        'TEMA': 0.01,
-    }
-    
-    # Execute trade based on the signal
-    account_value = get_account_value(api_trading_client)  # Example account value
-    risk_per_trade = 0.01  # 1% risk
-    stop_loss_percent = 0.02  # 2% stop loss
-    take_profit_percent = 0.05  # 5% take profit
-    confidence = 0.3 # 30% confidence
-    
-    # Fetch historical data
-    prices_series = fetch_historical_data(start_date= start_date)['close']
-    prices_df = fetch_historical_data(start_date= start_date)  # For indicators requiring OHLCV
+    prices_series = prices_df['close']
 
     # Calculate signals from different indicators
-    macd_signal_value = calculate_macd(prices_series,macd_short_window,macd_long_window,macd_signal_window)
-    macd_signal_value = calculate_mvcd(prices_series,mvcd_short_window,mvcd_long_window,mvcd_signal_window)
-    vwap_signal_value = calculate_vwap(prices_df,vwap_window)
-    ema_signal_value = calculate_tema(prices_series,tema_window)
+    macd_signal_value = calculate_macd(prices_series,macd_short_window,macd_long_window,macd_signal_window,values)
+    macd_signal_value = calculate_mvcd(prices_series,mvcd_short_window,mvcd_long_window,mvcd_signal_window,values)
+    vwap_signal_value = calculate_vwap(prices_df,vwap_window,values)
+    ema_signal_value = calculate_tema(prices_series,tema_window,values)
 
     # Combine signals into a dictionary
-    signals = {
+    return {
         'MACD': macd_signal_value,
         'MVCD': macd_signal_value,
         'VWAP': vwap_signal_value,
         'TEMA': ema_signal_value,
     }
 
-    # Aggregate signals
-    final_signal = aggregate_signals(signals, weights)
-    logging.info(f"Signals: {signals}")
-    logging.info(f"Aggregated Signal: {final_signal}")
+def BTC_execute_signal(api_trading_client: CryptoAPITrading, final_signal: str):
+    """
+    Size and place the trade for an aggregated Bitcoin signal.
+    """
+    # Execute trade based on the signal
+    account_value = get_account_value(api_trading_client)  # Example account value
+    risk_per_trade = 0.01  # 1% risk
+    stop_loss_percent = 0.02  # 2% stop loss
+    take_profit_percent = 0.05  # 5% take profit
+    confidence = 0.3 # 30% confidence
 
     execute_trade(
         api_trading_client=api_trading_client,
@@ -433,3 +477,59 @@ def BTC_trading_strategy(api_trading_client: CryptoAPITrading):
         take_profit_percent=take_profit_percent,
         confidence=confidence
     )
+
+def BTC_risk_check(api_trading_client: CryptoAPITrading):
+    """
+    Stop-loss/take-profit check for an active Bitcoin trade. Cheap enough to run
+    on every scheduler tick between bar closes.
+    """
+    trade_data = load_trade_data()
+    if trade_data and trade_data["status"] == "active":
+        logging.info(f"Active trade detected for {trade_data['symbol']} at entry price ${trade_data['entry_price']:.2f}")
+        if trade_data["stop_loss"] or trade_data["take_profit"]:
+            monitor_risk(api_trading_client)  # Monitor the risk for stop-loss/take-profit triggers
+
+def BTC_trading_strategy(api_trading_client: CryptoAPITrading):
+    """
+    Bitcoin trading strategy with active trade management.
+    """
+    logging.info("Starting BTC trading strategy...")
+
+    # Check for active trade first
+    with profiling.phase("risk_check"):
+        BTC_risk_check(api_trading_client)
+
+    start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).isoformat() + 'Z'
+    
+    # Fetch historical data once; the close series is taken from the same frame
+    with profiling.phase("fetch"):
+        prices_df = fetch_historical_data(start_date= start_date)  # For indicators requiring OHLCV
+        # Evaluate the bar that just closed, not the one that has only started forming
+        prices_df = closed_candles(prices_df, BTC_trading_strategy.timeframe)
+
+    # Reuse the previous signals if the candles have not changed since the last tick
+    with profiling.phase("indicators"):
+        bar_marker = (str(prices_df.index[-1]), float(prices_df['close'].iloc[-1]))
+        cached_marker, cached_signals, cached_values = SIGNAL_CACHE.get("BTC_trading_strategy", (None, None, None))
+        if cached_marker == bar_marker:
+            signals, values = cached_signals, cached_values
+        else:
+            values = {}
+            signals = BTC_indicator_signals(prices_df, values)
+            SIGNAL_CACHE["BTC_trading_strategy"] = (bar_marker, signals, values)
+    trade_journal.record(IndicatorRecord("BTC_trading_strategy", "BTC/USD", bar_marker[0], bar_marker[1], signals, values))
+
+    # Aggregate signals
+    final_signal = aggregate_signals(signals, BTC_WEIGHTS)
+    trade_journal.record(DecisionRecord("BTC_trading_strategy", signal_score(signals, BTC_WEIGHTS), final_signal, "BTC/USD"))
+    logging.info(f"Signals: {signals}")
+    logging.info(f"Aggregated Signal: {final_signal}")
+
+    with profiling.phase("execute"):
+        BTC_execute_signal(api_trading_client, final_signal)
+
+# Scheduling hints: the signals only change once per daily candle, so the scheduler
+# evaluates the strategy when a bar closes and runs the risk check in between.
+BTC_trading_strategy.timeframe = '1d'
+BTC_trading_strategy.symbol = 'BTC-USD'
+BTC_trading_strategy.risk_check = BTC_risk_check
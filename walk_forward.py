@@ -0,0 +1,315 @@
+"""
+Walk-forward and Monte Carlo evaluation of the aggregated indicator strategy.
+
+The history is split into rolling train/test folds. On each train window every
+combination of indicator windows and aggregate_signals weights is scored, and
+the best one is then evaluated, untouched, on the following test window. The
+concatenated test windows give an out-of-sample equity curve, which is
+resampled (whole trades, and blocks of bar returns) to put bootstrap
+confidence intervals on the result.
+
+Indicator signals are causal, so each indicator variant is computed once over
+the full history with indicator_kernels and cached as a (variants x bars)
+array; folds only slice it. Scoring all parameter combinations of a fold is
+vectorised, and folds and resamples are spread over worker processes.
+
+Trading rules match backtest.run_backtest: long only, a 'buy' opens a position
+at the bar's close if flat and a 'sell' closes it.
+"""
+from __future__ import annotations
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from lazy_imports import LazyModule
+import indicator_kernels
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+# Candidate windows per indicator: MACD/MVCD (short, long, signal), VWAP and TEMA (window,)
+DEFAULT_PARAMETER_GRID: Dict[str, List[Tuple[int, ...]]] = {
+    'MACD': [(12, 26, 9), (20, 30, 10), (8, 21, 5)],
+    'MVCD': [(20, 30, 10), (10, 30, 10), (5, 20, 5)],
+    'VWAP': [(10,), (20,), (50,)],
+    'TEMA': [(10,), (20,), (50,)],
+}
+
+# Candidate weights per indicator; every combination across indicators is tried
+DEFAULT_WEIGHT_GRID: Tuple[float, ...] = (0.5, 1.0)
+
+@dataclass
+class Fold:
+    train: Tuple[int, int]
+    test: Tuple[int, int]
+    params: Dict[str, Tuple[int, ...]]
+    weights: Dict[str, float]
+    train_score: float
+    test_return: float
+    test_trades: int
+
+@dataclass
+class WalkForwardResult:
+    folds: List[Fold]
+    returns: pd.Series  # Out-of-sample strategy return per bar
+    trade_returns: List[float]
+    monte_carlo: Dict[str, Tuple[float, float, float]] = field(default_factory=dict)  # metric -> (estimate, low, high)
+
+    @property
+    def total_return(self) -> float:
+        return float(np.prod(1 + self.returns.to_numpy()) - 1)
+
+def _crossovers(line: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """
+    Per-bar crossover signal: +1 buy, -1 sell, 0 hold (the rule used by calculate_*).
+    """
+    signals = np.zeros(line.shape, dtype=np.int8)
+    previous_line, previous_reference = line[:-1], reference[:-1]
+    current_line, current_reference = line[1:], reference[1:]
+    signals[1:][(current_line > current_reference) & (previous_line <= previous_reference)] = 1
+    signals[1:][(current_line < current_reference) & (previous_line >= previous_reference)] = -1
+    return signals
+
+def indicator_signal(prices_df: pd.DataFrame, indicator: str, params: Tuple[int, ...]) -> np.ndarray:
+    """
+    Signals of one indicator variant at every bar of ``prices_df``.
+    """
+    close = prices_df['close'].to_numpy(dtype=float)
+    if indicator == 'MACD':
+        short_window, long_window, signal_window = params
+        line = indicator_kernels.ema(close, short_window) - indicator_kernels.ema(close, long_window)
+        return _crossovers(line, indicator_kernels.ema(line, signal_window))
+    if indicator == 'MVCD':
+        short_window, long_window, signal_window = params
+        line = indicator_kernels.ewm_std(close, short_window) - indicator_kernels.ewm_std(close, long_window)
+        return _crossovers(line, indicator_kernels.ewm_std(line, signal_window))
+    if indicator == 'VWAP':
+        high, low, volume = (prices_df[column].to_numpy(dtype=float) for column in ('high', 'low', 'volume'))
+        return _crossovers(close, indicator_kernels.rolling_vwap(high, low, close, volume, params[0]))
+    if indicator == 'TEMA':
+        return _crossovers(close, indicator_kernels.tema(close, params[0]))
+    raise ValueError(f"Unknown indicator {indicator}")
+
+class IndicatorCache:
+    """
+    Signals for every indicator variant over the full history, computed once
+    and shared by all folds.
+    """
+
+    def __init__(self, prices_df: pd.DataFrame, parameter_grid: Dict[str, List[Tuple[int, ...]]]):
+        self.indicators = list(parameter_grid)
+        self.parameter_grid = parameter_grid
+        self.tables = {
+            indicator: np.vstack([indicator_signal(prices_df, indicator, params) for params in variants])
+            for indicator, variants in parameter_grid.items()
+        }
+
+def _combinations(parameter_grid: Dict[str, List[Tuple[int, ...]]], weight_grid: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All (variant index per indicator, weight per indicator) combinations.
+    """
+    variant_choices = [range(len(variants)) for variants in parameter_grid.values()]
+    weight_choices = [weight_grid] * len(parameter_grid)
+    variants = np.array(list(itertools.product(*variant_choices)), dtype=np.int64)
+    weights = np.array(list(itertools.product(*weight_choices)), dtype=float)
+    # Cross product of the two tables
+    return np.repeat(variants, len(weights), axis=0), np.tile(weights, (len(variants), 1))
+
+def _positions(decisions: np.ndarray) -> np.ndarray:
+    """
+    Long/flat position after each bar: long if the most recent buy/sell decision was a buy.
+    """
+    bars = np.arange(decisions.shape[-1])
+    last_decision_bar = np.maximum.accumulate(np.where(decisions != 0, bars, -1), axis=-1)
+    last_decision = np.take_along_axis(decisions, np.maximum(last_decision_bar, 0), axis=-1)
+    return ((last_decision_bar >= 0) & (last_decision == 1)).astype(float)
+
+def _decisions(tables: Dict[str, np.ndarray], indicators: List[str], variants: np.ndarray, weights: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """
+    aggregate_signals decision (+1 buy, -1 sell, 0 hold) per combination and bar.
+    """
+    score = np.zeros((len(variants), stop - start))
+    for i, indicator in enumerate(indicators):
+        score += weights[:, i, None] * tables[indicator][variants[:, i], start:stop]
+    score /= weights.sum(axis=1, keepdims=True)
+    return np.where(score > 0.5, 1, np.where(score < -0.5, -1, 0))
+
+def strategy_returns(tables: Dict[str, np.ndarray], indicators: List[str], variants: np.ndarray, weights: np.ndarray, bar_returns: np.ndarray, start: int, stop: int, fee: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-bar returns of many parameter combinations over bars [start, stop).
+
+    :param variants: (combinations x indicators) variant index per indicator.
+    :param weights: (combinations x indicators) aggregate_signals weight per indicator.
+    :param bar_returns: close-to-close return earned from bar t to t+1, per bar.
+    :return: (combinations x bars) returns and positions; positions start flat at ``start``.
+    """
+    positions = _positions(_decisions(tables, indicators, variants, weights, start, stop))
+    returns = positions * bar_returns[start:stop]
+    if fee:
+        changes = np.abs(np.diff(positions, axis=1, prepend=0.0))
+        returns = (1 + returns) * (1 - fee) ** changes - 1
+    return returns, positions
+
+def _objective(returns: np.ndarray, objective: str) -> np.ndarray:
+    if objective == 'sharpe':
+        deviation = returns.std(axis=1)
+        return np.where(deviation > 0, returns.mean(axis=1) / np.where(deviation > 0, deviation, 1), 0.0)
+    return np.log1p(returns).sum(axis=1)
+
+def trade_returns_from(returns: np.ndarray, positions: np.ndarray) -> List[float]:
+    """
+    Compound per-bar returns into one return per trade (a run of long bars).
+    """
+    trades, current = [], None
+    for bar_return, position in zip(returns, positions):
+        if position:
+            current = (1 + bar_return) * (current if current is not None else 1.0)
+        elif current is not None:
+            trades.append(current - 1)
+            current = None
+    if current is not None:
+        trades.append(current - 1)
+    return trades
+
+# State shared with worker processes through the pool initializer, so the
+# cached indicator tables are sent to each worker once rather than per task.
+_worker_state: Dict[str, object] = {}
+
+def _init_worker(state: Dict[str, object]):
+    _worker_state.update(state)
+
+def _run_fold(train: Tuple[int, int], test: Tuple[int, int]) -> Tuple[int, float, np.ndarray, np.ndarray]:
+    """
+    Pick the best combination on ``train`` and run it over ``test``.
+    """
+    state = _worker_state
+    tables, indicators, variants, weights = state["tables"], state["indicators"], state["variants"], state["weights"]
+    train_returns, _ = strategy_returns(tables, indicators, variants, weights, state["bar_returns"], *train, fee=state["fee"])
+    scores = _objective(train_returns, state["objective"])
+    best = int(np.argmax(scores))
+
+    chosen = slice(best, best + 1)
+    test_returns, positions = strategy_returns(tables, indicators, variants[chosen], weights[chosen], state["bar_returns"], *test, fee=state["fee"])
+    return best, float(scores[best]), test_returns[0], positions[0]
+
+def walk_forward(prices_df: pd.DataFrame, train_bars: int = 180, test_bars: int = 30, parameter_grid: Optional[Dict[str, List[Tuple[int, ...]]]] = None, weight_grid: Sequence[float] = DEFAULT_WEIGHT_GRID, objective: str = 'return', fee: float = 0.0, warmup: int = 30, workers: Optional[int] = None) -> WalkForwardResult:
+    """
+    Rolling walk-forward optimisation of indicator windows and weights.
+
+    :param prices_df: OHLCV DataFrame as returned by fetch_historical_data.
+    :param train_bars: Bars in each optimisation window.
+    :param test_bars: Bars in each out-of-sample window; windows advance by this much.
+    :param parameter_grid: Candidate windows per indicator, defaults to DEFAULT_PARAMETER_GRID.
+    :param weight_grid: Candidate weights for each indicator.
+    :param objective: 'return' (total log return) or 'sharpe' (per-bar mean / std).
+    :param fee: Proportional cost charged on entry and on exit.
+    :param warmup: Bars skipped before the first train window so indicators have history.
+    :param workers: Worker processes for the folds; 1 runs in-process.
+    """
+    parameter_grid = parameter_grid or DEFAULT_PARAMETER_GRID
+    cache = IndicatorCache(prices_df, parameter_grid)
+    variants, weights = _combinations(parameter_grid, weight_grid)
+
+    closes = prices_df['close'].to_numpy(dtype=float)
+    bar_returns = np.zeros_like(closes)
+    bar_returns[:-1] = closes[1:] / closes[:-1] - 1  # Return earned by holding from bar t to t+1
+
+    folds = []
+    for test_start in range(warmup + train_bars, len(closes) - 1, test_bars):
+        folds.append(((test_start - train_bars, test_start), (test_start, min(test_start + test_bars, len(closes) - 1))))
+    if not folds:
+        raise ValueError("Not enough bars for a single train/test fold")
+
+    state = {"tables": cache.tables, "indicators": cache.indicators, "variants": variants, "weights": weights, "bar_returns": bar_returns, "fee": fee, "objective": objective}
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(folds) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(folds)), initializer=_init_worker, initargs=(state,)) as executor:
+            outcomes = list(executor.map(_run_fold, *zip(*folds)))
+    else:
+        _init_worker(state)
+        outcomes = [_run_fold(train, test) for train, test in folds]
+
+    results, returns, trades = [], [], []
+    for (train, test), (best, train_score, test_returns, positions) in zip(folds, outcomes):
+        fold_trades = trade_returns_from(test_returns, positions)
+        results.append(Fold(
+            train=train,
+            test=test,
+            params={indicator: parameter_grid[indicator][variants[best, i]] for i, indicator in enumerate(cache.indicators)},
+            weights={indicator: float(weights[best, i]) for i, indicator in enumerate(cache.indicators)},
+            train_score=train_score,
+            test_return=float(np.prod(1 + test_returns) - 1),
+            test_trades=len(fold_trades),
+        ))
+        returns.append(test_returns)
+        trades.extend(fold_trades)
+
+    index = prices_df.index[folds[0][1][0]:folds[-1][1][1]]
+    return WalkForwardResult(results, pd.Series(np.concatenate(returns), index=index), trades)
+
+def _max_drawdown(equity: np.ndarray) -> np.ndarray:
+    return (equity / np.maximum.accumulate(equity, axis=-1) - 1).min(axis=-1)
+
+def _resample_chunk(trade_returns: np.ndarray, bar_returns: np.ndarray, block: int, resamples: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    samples: Dict[str, np.ndarray] = {}
+
+    if len(trade_returns):
+        # Bootstrap the sequence of trades: same number of trades, drawn with replacement
+        drawn = trade_returns[rng.integers(0, len(trade_returns), (resamples, len(trade_returns)))]
+        equity = np.cumprod(1 + drawn, axis=1)
+        samples["trade_total_return"] = equity[:, -1] - 1
+        samples["trade_max_drawdown"] = _max_drawdown(np.hstack([np.ones((resamples, 1)), equity]))
+
+    if len(bar_returns):
+        # Moving-block bootstrap of per-bar returns keeps short-range autocorrelation
+        n_blocks = -(-len(bar_returns) // block)
+        starts = rng.integers(0, max(1, len(bar_returns) - block + 1), (resamples, n_blocks))
+        drawn = bar_returns[(starts[:, :, None] + np.arange(block)).reshape(resamples, -1)[:, :len(bar_returns)] % len(bar_returns)]
+        equity = np.cumprod(1 + drawn, axis=1)
+        samples["total_return"] = equity[:, -1] - 1
+        samples["max_drawdown"] = _max_drawdown(np.hstack([np.ones((resamples, 1)), equity]))
+        deviation = drawn.std(axis=1)
+        samples["sharpe"] = np.where(deviation > 0, drawn.mean(axis=1) / np.where(deviation > 0, deviation, 1), 0.0)
+    return samples
+
+def bootstrap_ci(samples: np.ndarray, confidence: float = 0.95) -> Tuple[float, float, float]:
+    """
+    Median and percentile confidence interval of bootstrap samples.
+    """
+    tail = (1 - confidence) / 2 * 100
+    low, median, high = np.percentile(samples, [tail, 50, 100 - tail])
+    return float(median), float(low), float(high)
+
+def monte_carlo(trade_returns: Sequence[float], bar_returns: Sequence[float], resamples: int = 10000, block: int = 5, confidence: float = 0.95, seed: Optional[int] = None, workers: Optional[int] = None) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Bootstrap confidence intervals for total return, max drawdown and Sharpe ratio.
+
+    Trades are resampled with replacement; per-bar returns are resampled in
+    blocks of ``block`` bars. Resamples are split across worker processes,
+    each with an independent random stream derived from ``seed``.
+
+    :return: metric -> (median, low, high).
+    """
+    trade_array = np.asarray(trade_returns, dtype=float)
+    bar_array = np.asarray(bar_returns, dtype=float)
+    workers = max(1, min(workers or os.cpu_count() or 1, resamples))
+    chunks = [resamples // workers + (i < resamples % workers) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_resample_chunk, [trade_array] * workers, [bar_array] * workers, [block] * workers, chunks, seeds))
+    else:
+        parts = [_resample_chunk(trade_array, bar_array, block, chunks[0], seeds[0])]
+
+    return {metric: bootstrap_ci(np.concatenate([part[metric] for part in parts]), confidence) for metric in parts[0]}
+
+def evaluate(prices_df: pd.DataFrame, resamples: int = 10000, seed: Optional[int] = None, workers: Optional[int] = None, **walk_forward_kwargs) -> WalkForwardResult:
+    """
+    Walk-forward optimisation followed by Monte Carlo resampling of the out-of-sample results.
+    """
+    result = walk_forward(prices_df, workers=workers, **walk_forward_kwargs)
+    result.monte_carlo = monte_carlo(result.trade_returns, result.returns.to_numpy(), resamples=resamples, seed=seed, workers=workers)
+    return result